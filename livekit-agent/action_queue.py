@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import random
+
+from supabase_client import IDEMPOTENT_ACTIONS, SupabaseClient
+
+logger = logging.getLogger("ColdCallAgent")
+
+
+class ActionQueue:
+    """Per-call write-behind queue for CRM side effects.
+
+    Tools enqueue actions and return to the LLM immediately. Pending actions are
+    coalesced (latest status/e-mail wins, notes are merged) and sent to
+    agent-actions as one "batch" request every few seconds or when the batch
+    is full. flush()/aclose() drain everything before the call ends; actions
+    that could not be persisted end up in `failed`. Retries wait a jittered,
+    doubling `retry_backoff` so a struggling backend is not hammered.
+    """
+
+    def __init__(
+        self,
+        client: SupabaseClient,
+        flush_interval: float = 2.0,
+        max_batch: int = 10,
+        max_attempts: int = 3,
+        retry_backoff: float = 0.5,
+    ) -> None:
+        self.client = client
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.failed: list[dict] = []
+        self.sent = 0
+        self._pending: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._late: set[asyncio.Task] = set()
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, action: str, data: dict):
+        if self._closed:
+            # Late tool call after the queue was drained - flush it right away, aclose() awaits it
+            logger.warning(f"Action queue closed, sending {action} directly")
+            self._pending.append({"action": action, "data": dict(data), "attempts": 0})
+            task = asyncio.create_task(self.flush())
+            self._late.add(task)
+            task.add_done_callback(self._late.discard)
+            return
+
+        self._coalesce(action, dict(data))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def _coalesce(self, action: str, data: dict):
+        for item in self._pending:
+            if item["action"] != action or item["data"].get("lead_id") != data.get("lead_id"):
+                continue
+            if action == "add_note" and item["data"].get("call_log_id") == data.get("call_log_id"):
+                item["data"]["note"] = f"{item['data']['note']}\n{data['note']}"
+                return
+            if action == "update_lead_status":
+                notes = [n for n in (item["data"].get("notes"), data.get("notes")) if n]
+                item["data"] = {**data, "notes": " | ".join(notes)}
+                return
+            if action == "update_lead_email":
+                item["data"] = data
+                return
+        self._pending.append({"action": action, "data": data, "attempts": 0})
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                await self._flush_once()
+
+    async def _flush_once(self):
+        async with self._lock:
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch:]
+            if batch:
+                await self._send(batch)
+
+    async def _send(self, batch: list[dict]):
+        for item in batch:
+            item["attempts"] += 1
+
+        if len(batch) == 1:
+            response = await self.client.action(batch[0]["action"], batch[0]["data"])
+            results = [response]
+        else:
+            response = await self.client.action("batch", {
+                "actions": [{"action": item["action"], "data": item["data"]} for item in batch],
+            })
+            results = response.get("results")
+            if not isinstance(results, list) or len(results) != len(batch):
+                results = [response] * len(batch)
+        # Connect failure: nothing reached the CRM. Any other transport error (read timeout, dropped
+        # connection) may have been applied already, so only idempotent actions are sent again
+        not_sent = bool(response.get("connect_error"))
+        transport_failed = bool(response.get("transport_error"))
+
+        retry = []
+        for item, result in zip(batch, results):
+            if result.get("success"):
+                self.sent += 1
+            elif item["attempts"] < self.max_attempts and (
+                not_sent or (transport_failed and item["action"] in IDEMPOTENT_ACTIONS)
+            ):
+                retry.append(item)
+            else:
+                self.failed.append({
+                    "action": item["action"],
+                    "data": item["data"],
+                    "error": result.get("error", "unknown error"),
+                    "outcome_unknown": transport_failed and not not_sent,
+                })
+                logger.error(f"Queued action {item['action']} failed: {result.get('error')}")
+        self._pending[:0] = retry
+        if retry:
+            attempt = max(item["attempts"] for item in retry)
+            await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    async def flush(self):
+        """Send everything that is pending, retrying transient failures."""
+        while self._pending:
+            await self._flush_once()
+
+    async def aclose(self):
+        # Also awaits sends of actions enqueued after an earlier aclose()
+        if self._closed:
+            if self._late:
+                await asyncio.wait(set(self._late))
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+        if self._late:
+            await asyncio.wait(set(self._late))
+        if self.failed:
+            logger.error(f"{len(self.failed)} queued actions could not be persisted: {self.failed}")
+
+    def report(self) -> dict:
+        return {"sent": self.sent, "pending": len(self._pending), "failed": self.failed}
@@ -0,0 +1,253 @@
+"""Dispatch payload and per-call config cost: inline campaign vs. worker cache.
+
+- payload: job metadata bytes as start-call builds them, with the campaign
+  inline (before) and as IDs + lead fields (after)
+- parse: time per call from metadata string to instructions/voice/LLM;
+  the inline path is the former entrypoint code, the cached path is
+  CallConfig + CampaignConfigCache (hit)
+- campaign run: --calls calls of one campaign, --concurrency at a time,
+  against the Supabase stand-in; the campaign is edited halfway. Counts
+  fetches and calls that started with outdated settings after the edit.
+
+    python benchmarks/call_config_cache.py
+    python benchmarks/call_config_cache.py --calls 500 --concurrency 20 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent as agent_module  # noqa: E402
+from call_config import CallConfig, CampaignConfigCache  # noqa: E402
+from prompts import build_instructions  # noqa: E402
+from standins import MockSupabaseServer  # noqa: E402
+from supabase_client import SupabaseClient  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+CAMPAIGN_ID = str(uuid.uuid4())
+AI_PROMPT = {
+    "aiName": "Lisa",
+    "companyName": "Acme GmbH",
+    "aiPersonality": "Locker, freundlich und direkt. Hoert gut zu und stellt Rueckfragen, statt Monologe zu halten.",
+    "aiGreeting": "Hi, hier ist Lisa von Acme, haben Sie kurz zwei Minuten?",
+    "aiVoice": "viktoria",
+    "llmProvider": "openai",
+    "customPrompt": "Frage immer nach der aktuellen Anzahl an Vertriebsmitarbeitern und dem groessten Zeitfresser. " * 6,
+}
+
+
+def campaign_row(version: str, voice: str = "viktoria") -> dict:
+    return {
+        "id": CAMPAIGN_ID,
+        "name": "Herbstkampagne Logistik",
+        "product_description": "KI-Telefonassistent, der Erstgespraeche fuehrt, Leads qualifiziert und Termine bucht. " * 5,
+        "call_goal": "Demo-Termin mit dem Entscheider vereinbaren",
+        "ai_prompt": json.dumps({**AI_PROMPT, "aiVoice": voice}),
+        "updated_at": version,
+    }
+
+
+def lead_fields(i: int) -> dict:
+    return {
+        "phone_number": f"+4930{1000000 + i}",
+        "lead_name": f"Markus Weber {i}",
+        "lead_company": "Weber Logistik GmbH",
+        "lead_notes": "Interesse an Automatisierung, ruft selbst viel kalt an",
+        "lead_phone": f"+4930{1000000 + i}",
+        "lead_email": f"m.weber{i}@weber-logistik.de",
+        "user_id": str(uuid.uuid4()),
+        "call_log_id": str(uuid.uuid4()),
+        "lead_id": str(uuid.uuid4()),
+        "campaign_id": CAMPAIGN_ID,
+    }
+
+
+def inline_metadata(row: dict, i: int) -> str:
+    return json.dumps({
+        "ai_prompt": row["ai_prompt"],
+        "product_description": row["product_description"],
+        "call_goal": row["call_goal"],
+        "campaign_name": row["name"],
+        **lead_fields(i),
+    })
+
+
+def id_metadata(row: dict, i: int) -> str:
+    return json.dumps({**lead_fields(i), "campaign_version": row["updated_at"]})
+
+
+def legacy_parse(job_metadata: str, room_metadata: str = ""):
+    """The former entrypoint metadata handling."""
+    metadata = {}
+    if job_metadata:
+        try:
+            metadata = json.loads(job_metadata)
+        except json.JSONDecodeError:
+            pass
+    if room_metadata and not metadata:
+        try:
+            metadata = json.loads(room_metadata)
+        except json.JSONDecodeError:
+            pass
+    ai_prompt = metadata.get("ai_prompt", "")
+    ai_name = ai_greeting = ai_personality = company_name = custom_prompt = ""
+    voice_id = agent_module.DEFAULT_VOICE_ID
+    llm_provider = agent_module.DEFAULT_LLM
+    if ai_prompt:
+        try:
+            settings = json.loads(ai_prompt)
+            if isinstance(settings, dict):
+                ai_name = settings.get("aiName", "")
+                ai_greeting = settings.get("aiGreeting", "")
+                ai_personality = settings.get("aiPersonality", "")
+                company_name = settings.get("companyName", "")
+                custom_prompt = settings.get("customPrompt", "")
+                voice_setting = settings.get("aiVoice", "").lower()
+                llm_setting = settings.get("llmProvider", "").lower()
+                if voice_setting in agent_module.CARTESIA_VOICES:
+                    voice_id = agent_module.CARTESIA_VOICES[voice_setting]
+                if llm_setting in agent_module.LLM_PROVIDERS:
+                    llm_provider = llm_setting
+        except json.JSONDecodeError:
+            custom_prompt = ai_prompt
+    instructions, _ = build_instructions(
+        ai_name, company_name, ai_personality, ai_greeting,
+        metadata.get("lead_name", ""), metadata.get("lead_company", ""), metadata.get("lead_notes", ""),
+        metadata.get("product_description", ""), metadata.get("call_goal", ""), custom_prompt,
+    )
+    return instructions, voice_id, llm_provider
+
+
+def new_cache(fetch) -> CampaignConfigCache:
+    return CampaignConfigCache(
+        fetch,
+        voices=agent_module.CARTESIA_VOICES,
+        default_voice=agent_module.DEFAULT_VOICE_ID,
+        llm_providers=agent_module.LLM_PROVIDERS,
+        default_llm=agent_module.DEFAULT_LLM,
+    )
+
+
+async def measure_parse(args) -> dict:
+    row = campaign_row("2026-10-01T09:00:00+00:00")
+    inline = [inline_metadata(row, i) for i in range(args.repeat)]
+    by_id = [id_metadata(row, i) for i in range(args.repeat)]
+
+    async def fetch(_):
+        return row
+
+    cache = new_cache(fetch)
+    await cache.get(CallConfig.from_metadata(by_id[0]))
+
+    legacy, cached = [], []
+    for raw in inline:
+        started = time.perf_counter()
+        legacy_parse(raw)
+        legacy.append(time.perf_counter() - started)
+    for raw in by_id:
+        started = time.perf_counter()
+        call = CallConfig.from_metadata(raw)
+        campaign = await cache.get(call)
+        call.instructions(campaign)
+        cached.append(time.perf_counter() - started)
+    legacy.sort()
+    cached.sort()
+    return {
+        "payload_bytes": {"inline": len(inline[0].encode()), "ids": len(by_id[0].encode())},
+        "parse_us": {
+            "inline_p50": round(percentile(legacy, 50) * 1e6, 1),
+            "inline_p99": round(percentile(legacy, 99) * 1e6, 1),
+            "cached_p50": round(percentile(cached, 50) * 1e6, 1),
+            "cached_p99": round(percentile(cached, 99) * 1e6, 1),
+        },
+    }
+
+
+async def campaign_run(args) -> dict:
+    versions = ["2026-10-01T09:00:00+00:00", "2026-10-02T14:30:00+00:00"]
+    campaigns = {CAMPAIGN_ID: campaign_row(versions[0])}
+    server = MockSupabaseServer(delay=args.backend_delay, campaigns=campaigns)
+    client = SupabaseClient(await server.start(), "bench")
+    agent_module._supabase_client = client
+    cache = new_cache(agent_module.fetch_campaign)
+    cache.ttl = args.ttl
+
+    edited = asyncio.Event()
+    stale_after_edit = 0
+    setup_ms: list[float] = []
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one_call(i: int):
+        nonlocal stale_after_edit
+        async with sem:
+            if i == args.calls // 2:
+                # Campaign is edited in the UI: new row version, new voice
+                voice = next(name for name in agent_module.CARTESIA_VOICES if name != AI_PROMPT["aiVoice"])
+                campaigns[CAMPAIGN_ID] = campaign_row(versions[1], voice)
+                edited.set()
+            # Dispatches after the edit carry the new version (start-call reads updated_at)
+            row = campaigns[CAMPAIGN_ID]
+            started = time.perf_counter()
+            call = CallConfig.from_metadata(id_metadata(row, i))
+            campaign = await cache.get(call)
+            setup_ms.append((time.perf_counter() - started) * 1000)
+            if edited.is_set() and campaign.version != versions[1]:
+                stale_after_edit += 1
+            await asyncio.sleep(args.call_seconds)
+
+    try:
+        await asyncio.gather(*(one_call(i) for i in range(args.calls)))
+    finally:
+        await client.close()
+        await server.stop()
+    setup_ms.sort()
+    return {
+        "calls": args.calls,
+        "fetches": server.calls.get("agent-actions:get_campaign_config", 0),
+        "cache": cache.stats(),
+        "stale_after_edit": stale_after_edit,
+        "config_ms_p50": round(percentile(setup_ms, 50), 2),
+        "config_ms_p99": round(percentile(setup_ms, 99), 2),
+    }
+
+
+async def run(args) -> dict:
+    return {"parse": await measure_parse(args), "campaign_run": await campaign_run(args)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="calls for the parse timing")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--call-seconds", type=float, default=0.05)
+    parser.add_argument("--backend-delay", type=float, default=0.05, help="Supabase stand-in latency (s)")
+    parser.add_argument("--ttl", type=float, default=300.0)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    p = report["parse"]
+    print(f"payload bytes: inline {p['payload_bytes']['inline']} | ids {p['payload_bytes']['ids']}")
+    print(
+        f"per-call config us p50/p99: inline {p['parse_us']['inline_p50']}/{p['parse_us']['inline_p99']} | "
+        f"cached {p['parse_us']['cached_p50']}/{p['parse_us']['cached_p99']}"
+    )
+    r = report["campaign_run"]
+    print(
+        f"campaign run: {r['calls']} calls, {r['fetches']} fetches, cache {r['cache']}, "
+        f"stale after edit {r['stale_after_edit']}, config ms p50/p99 {r['config_ms_p50']}/{r['config_ms_p99']}"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""LLM input size over a long call, with and without the context window.
+
+Simulates a discovery call of --minutes length (one caller turn every
+--turn-seconds, with tool calls in --tool-rate of the turns) against a real
+Agent chat context. After every reply ContextWindow.maybe_compact runs like
+in the agent; summaries come from the local mock LLM (through the openai
+plugin), so the background path including its latency is exercised.
+Reports estimated input tokens per turn (instructions + history) at
+minute marks, the number of compactions and summary latency.
+
+    python benchmarks/context_growth.py
+    python benchmarks/context_growth.py --minutes 30 --budget 1000 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.agents import Agent, llm  # noqa: E402
+from livekit.plugins import openai  # noqa: E402
+
+from context_window import SUMMARY_ID, ContextWindow, estimate_tokens  # noqa: E402
+from prompts import build_instructions  # noqa: E402
+from standins import MockLLMServer  # noqa: E402
+
+CALLER_LINES = [
+    "Hm, also wir machen das momentan noch ganz klassisch mit zwei Leuten im Vertrieb, die den ganzen Tag telefonieren.",
+    "Ja, das Problem ist halt, dass die meisten gar nicht rangehen und wir viel Zeit verlieren.",
+    "Was kostet sowas denn ungefaehr im Monat, wenn wir so dreihundert Anrufe am Tag machen?",
+    "Und wie ist das mit dem Datenschutz, die Gespraeche werden ja aufgezeichnet, oder?",
+    "Okay, verstehe. Wir haben aber schon ein CRM, das muesste dann angebunden werden.",
+    "Naja, ich muss das sowieso noch mit meinem Chef besprechen, der entscheidet das am Ende.",
+    "Koennen Sie mir mal ein Beispiel nennen, wo das bei einer aehnlichen Firma gut funktioniert hat?",
+    "Mhm, und wie lange dauert so eine Einrichtung typischerweise?",
+]
+AGENT_LINES = [
+    "Ach so, ja, das hoer ich oft. [pause: 0.3s] Darf ich fragen, wie viele Termine dabei so pro Woche rauskommen?",
+    "Verstehe total. Genau da setzen wir an, weil unser Assistent die Vorqualifizierung komplett uebernimmt.",
+    "Also das haengt ein bisschen vom Volumen ab, aber bei dreihundert Anrufen liegen Sie grob bei ein paar hundert Euro.",
+    "Gute Frage! Die Daten liegen bei uns in Deutschland, und aufgezeichnet wird nur mit Einwilligung.",
+    "Hmm, ja, das CRM binden wir ueber eine Schnittstelle an, das ist meistens in ein, zwei Tagen erledigt.",
+    "Klar, das macht Sinn. Wollen wir einfach einen kurzen Termin zu dritt machen, mit Ihrem Chef?",
+]
+TOOLS = [
+    ("add_note", {"note": "Zwei Vertriebler, ca. 300 Anrufe/Tag, CRM vorhanden"}, "Notiz gespeichert."),
+    ("schedule_callback", {"date": "2026-11-03", "time": "10:00", "notes": "mit Chef"}, "Rueckruf geplant."),
+    ("save_email_address", {"email": "m.weber@weber-logistik.de"}, "E-Mail m.weber@weber-logistik.de wurde gespeichert."),
+]
+
+
+async def simulate(args, budget: int, summary_llm) -> dict:
+    rng = random.Random(args.seed)
+    instructions, _ = build_instructions(
+        "Lisa", "Acme GmbH", "Locker und freundlich.", None, "Markus Weber", "Weber Logistik",
+        "Interesse an Automatisierung", "KI-Telefonassistent fuer Vertriebsteams", "Demo-Termin vereinbaren", None,
+    )
+    instructions_tokens = len(instructions) // 4
+    agent = Agent(instructions=instructions)
+    facts: dict[str, str] = {}
+    window = ContextWindow(agent, summary_llm, budget_tokens=budget, facts=facts) if budget else None
+
+    turns = int(args.minutes * 60 / args.turn_seconds)
+    per_turn: list[int] = []
+    summary_ms: list[float] = []
+    for turn in range(turns):
+        ctx = agent.chat_ctx.copy()
+        ctx.add_message(role="user", content=rng.choice(CALLER_LINES))
+        # What the LLM gets for this reply
+        history = sum(estimate_tokens(item) for item in ctx.items if not (item.type == "message" and item.role == "system"))
+        summary_item = ctx.get_by_id(SUMMARY_ID)
+        pinned = estimate_tokens(summary_item) if summary_item else 0
+        per_turn.append(instructions_tokens + history + pinned)
+
+        if rng.random() < args.tool_rate:
+            name, arguments, output = rng.choice(TOOLS)
+            call_id = f"call_{uuid.uuid4().hex[:8]}"
+            ctx.items.append(llm.FunctionCall(call_id=call_id, name=name, arguments=json.dumps(arguments)))
+            ctx.items.append(llm.FunctionCallOutput(call_id=call_id, name=name, output=output, is_error=False))
+            facts[name] = ", ".join(str(v) for v in arguments.values())
+        ctx.add_message(role="assistant", content=rng.choice(AGENT_LINES))
+        await agent.update_chat_ctx(ctx)
+
+        if window is not None:
+            compactions = window.compactions
+            window.maybe_compact()
+            # The caller talks while the summary runs
+            await asyncio.sleep(args.turn_gap)
+            if window.compactions > compactions:
+                summary_ms.append(window.last_ms)
+
+    marks = {}
+    for minute in sorted({1, 5, 10, 15, 20, int(args.minutes)}):
+        index = min(len(per_turn) - 1, int(minute * 60 / args.turn_seconds) - 1)
+        if 0 <= index and minute <= args.minutes:
+            marks[f"{minute}min"] = per_turn[index]
+    return {
+        "turns": turns,
+        "input_tokens_at": marks,
+        "input_tokens_max": max(per_turn) if per_turn else 0,
+        "compactions": window.compactions if window else 0,
+        "summary_failures": window.failures if window else 0,
+        "summary_ms_max": round(max(summary_ms)) if summary_ms else 0,
+    }
+
+
+async def run(args) -> dict:
+    server = MockLLMServer(ttft=args.summary_ttft, tool_rate=0.0)
+    url = await server.start()
+    summary_llm = openai.LLM(model="gpt-4o-mini", base_url=url, api_key="bench")
+    try:
+        return {
+            "minutes": args.minutes,
+            "unbounded": await simulate(args, 0, summary_llm),
+            f"budget_{args.budget}": await simulate(args, args.budget, summary_llm),
+        }
+    finally:
+        await summary_llm.aclose()
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--turn-seconds", type=float, default=10, help="one caller turn + reply every N seconds of call")
+    parser.add_argument("--turn-gap", type=float, default=0.2, help="real seconds between simulated turns")
+    parser.add_argument("--budget", type=int, default=1500, help="CONTEXT_TOKEN_BUDGET")
+    parser.add_argument("--tool-rate", type=float, default=0.15)
+    parser.add_argument("--summary-ttft", type=float, default=0.1, help="mock summary LLM time to first token (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    for label in [k for k in report if k != "minutes"]:
+        r = report[label]
+        marks = ", ".join(f"{m}: {t}" for m, t in r["input_tokens_at"].items())
+        print(
+            f"{label:<12} input tokens/turn {marks} | max {r['input_tokens_max']} | "
+            f"compactions {r['compactions']} (failed {r['summary_failures']}, slowest {r['summary_ms_max']}ms)"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
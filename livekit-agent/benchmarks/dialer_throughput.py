@@ -0,0 +1,195 @@
+"""Campaign dialer against a local LiveKit stand-in.
+
+MockLiveKitServer plays the room/dispatch/SIP APIs; every dispatched job
+runs the agent's own dial_lead/report_dial_status against it (job start,
+ringing, SIP failures, conversation, hang-up), so the dial-status contract
+between agent and dialer is on the measured path. Compared:
+
+- naive: every lead dispatched like start-call does, at --naive-rate per second, no retries
+- dialer: CampaignDialer with per-trunk cap, CPS pacing, retries and callbacks
+
+Reported: wall time, answered calls per minute, outcomes, retries, peak SIP
+calls per trunk (vs capacity), INVITEs rejected by the trunk, the most
+dispatches and INVITEs in any one second per trunk (vs CPS; INVITEs follow
+dispatches after a jittered job start) and calls placed before the lead's
+callback time. Times are scaled down (seconds instead of minutes).
+
+    python benchmarks/dialer_throughput.py
+    python benchmarks/dialer_throughput.py --leads 300 --trunks 3 --capacity 20 --cps 10 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit import api  # noqa: E402
+
+import agent as agent_module  # noqa: E402
+from dialer import AGENT_NAME, CampaignDialer, Trunk, dial_outcome  # noqa: E402
+from standins import MockLiveKitServer, jittered  # noqa: E402
+
+
+def build_leads(args) -> list[tuple[dict, float | None]]:
+    rng = random.Random(args.seed)
+    leads = []
+    for i in range(args.leads):
+        metadata = {
+            "phone_number": f"+4930{1000000 + i}",
+            "lead_name": f"Lead {i}",
+            "lead_company": f"Firma {i} GmbH",
+            "lead_id": str(uuid.uuid4()),
+            "call_log_id": str(uuid.uuid4()),
+            "campaign_id": "bench-campaign",
+            "campaign_version": "2026-10-01T09:00:00+00:00",
+        }
+        callback_at = None
+        if rng.random() < args.callback_share:
+            callback_at = time.time() + rng.uniform(0.5, 1.5) * args.callback_delay
+        leads.append((metadata, callback_at))
+    return leads
+
+
+def max_per_second(timestamps: list[float]) -> int:
+    timestamps = sorted(timestamps)
+    best = start = 0
+    for end, t in enumerate(timestamps):
+        while t - timestamps[start] >= 1.0:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+async def run_mode(mode: str, args, leads) -> dict:
+    server = MockLiveKitServer(ring_time=args.ring_time, trunk_capacity=args.capacity, seed=args.seed)
+    url = await server.start()
+    lkapi = api.LiveKitAPI(url, "bench", "bench-secret-bench-secret-bench-secret", failover=False)
+    callbacks = {}
+    answered = []
+
+    async def play_agent(room: str, metadata: dict):
+        # What entrypoint does for an outbound job, with the real dial/report helpers
+        ctx = SimpleNamespace(api=lkapi, room=SimpleNamespace(name=room))
+        await asyncio.sleep(jittered(args.job_start, 0.3))
+        try:
+            await agent_module.dial_lead(ctx, metadata["phone_number"], metadata.get("sip_trunk_id"), metadata.get("ring_timeout"))
+        except api.TwirpError as e:
+            status, code = dial_outcome(e)
+            await agent_module.report_dial_status(ctx, status, code)
+            return
+        answered.append(time.monotonic())
+        await agent_module.report_dial_status(ctx, "answered")
+        await asyncio.sleep(jittered(args.call_seconds, 0.5))
+        # Agent hangs up (hangup_call) - the room and the SIP leg go away
+        await lkapi.room.delete_room(api.DeleteRoomRequest(room=room))
+
+    server.on_dispatch = play_agent
+    started = time.monotonic()
+    try:
+        if mode == "naive":
+            for metadata, _ in leads:
+                room = f"outbound-{uuid.uuid4().hex[:9]}"
+                # start-call: CreateRoom, then CreateDispatch; the agent uses its fixed trunk
+                await lkapi.room.create_room(api.CreateRoomRequest(name=room, empty_timeout=300, max_participants=2))
+                await lkapi.agent_dispatch.create_dispatch(
+                    api.CreateAgentDispatchRequest(room=room, agent_name=AGENT_NAME, metadata=json.dumps(metadata))
+                )
+                await asyncio.sleep(1 / args.naive_rate)
+            while server._tasks:
+                await asyncio.sleep(0.05)
+            summary = {"leads": len(leads), "retries": 0}
+        else:
+            trunks = [Trunk(f"ST_bench{i}", args.capacity, args.cps) for i in range(args.trunks)]
+            dialer = CampaignDialer(
+                lkapi,
+                trunks,
+                max_attempts=args.max_attempts,
+                backoff={"busy": args.backoff, "no_answer": args.backoff * 2, "congestion": args.backoff / 2},
+                ring_timeout=args.ring_timeout,
+                poll_interval=args.poll_interval,
+            )
+            for metadata, callback_at in leads:
+                dialer.add(metadata, callback_at)
+                if callback_at:
+                    callbacks[metadata["phone_number"]] = started + (callback_at - time.time())
+            summary = await dialer.run()
+        elapsed = time.monotonic() - started
+    finally:
+        await lkapi.aclose()
+        await server.stop()
+
+    def per_second(events) -> int:
+        by_trunk: dict[str, list[float]] = {}
+        for t, trunk, *_ in events:
+            by_trunk.setdefault(trunk or agent_module.SIP_TRUNK_ID, []).append(t)
+        return max((max_per_second(ts) for ts in by_trunk.values()), default=0)
+
+    early = sum(1 for t, _, number in server.invites if number in callbacks and t < callbacks[number])
+    return {
+        "elapsed_s": round(elapsed, 1),
+        "answered": len(answered),
+        "answered_per_min": round(len(answered) / elapsed * 60, 1),
+        "outcomes": summary.get("outcomes", {}),
+        "retries": summary.get("retries", 0),
+        "invites": len(server.invites),
+        "trunk_rejected": sum(server.trunk_rejected.values()),
+        "peak_sip_per_trunk": max(server.trunk_peak.values(), default=0),
+        "max_dispatches_per_s": per_second(server.dispatches),
+        "max_invites_per_s": per_second(server.invites),
+        "before_callback": early,
+    }
+
+
+async def run(args) -> dict:
+    leads = build_leads(args)
+    report = {"leads": args.leads, "trunks": args.trunks, "capacity": args.capacity, "cps": args.cps}
+    for mode in ("naive", "dialer"):
+        report[mode] = await run_mode(mode, args, leads)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=150)
+    parser.add_argument("--trunks", type=int, default=2)
+    parser.add_argument("--capacity", type=int, default=10, help="simultaneous calls per trunk")
+    parser.add_argument("--cps", type=float, default=5.0, help="calls per second per trunk")
+    parser.add_argument("--naive-rate", type=float, default=20.0, help="dispatches per second without the dialer")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=1.0, help="busy backoff (s); no answer 2x, congestion 0.5x")
+    parser.add_argument("--job-start", type=float, default=0.2, help="dispatch to dial (s)")
+    parser.add_argument("--ring-time", type=float, default=0.4, help="ringing before answer (s)")
+    parser.add_argument("--ring-timeout", type=float, default=1.0)
+    parser.add_argument("--call-seconds", type=float, default=2.0, help="mean answered call length (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--callback-share", type=float, default=0.1, help="share of leads with a callback time")
+    parser.add_argument("--callback-delay", type=float, default=3.0, help="callback time from start (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"{args.leads} leads, {args.trunks} trunks x {args.capacity} calls, {args.cps} CPS per trunk")
+    print(f"{'mode':<7} {'time':>6} {'answered':>8} {'/min':>6} {'retries':>7} {'invites':>7} {'rejected':>8} {'peak/trunk':>10} {'dispatch/s':>10} {'invite/s':>8} {'early':>5}")
+    for mode in ("naive", "dialer"):
+        r = report[mode]
+        print(
+            f"{mode:<7} {r['elapsed_s']:>5}s {r['answered']:>8} {r['answered_per_min']:>6} {r['retries']:>7} "
+            f"{r['invites']:>7} {r['trunk_rejected']:>8} {r['peak_sip_per_trunk']:>10} {r['max_dispatches_per_s']:>10} "
+            f"{r['max_invites_per_s']:>8} "
+            f"{r['before_callback']:>5}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Accuracy and latency of the local spoken e-mail parser.
+
+Runs every entry of the corpus (final STT transcripts of callers saying or
+spelling an address, plus look-alikes without one) through
+SpokenEmailTracker the way the agent feeds it, and reports:
+
+- accuracy: hint matches the expected address, or no hint where none was said
+- precision: share of hints that were correct (a wrong hint costs a correction turn)
+- recall: share of addresses that got a hint (the rest fall back to the LLM)
+- parse latency per final transcript
+
+    python benchmarks/email_accuracy.py
+    python benchmarks/email_accuracy.py --corpus my_calls.jsonl --verbose
+
+Corpus format, one case per line: {"finals": ["...", ...], "expected": "a@b.de" | null}
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_parser import SpokenEmailTracker  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "email_corpus.jsonl")
+
+
+def run(corpus: str, repeat: int, verbose: bool) -> dict:
+    with open(corpus) as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    correct = hints = correct_hints = addresses = 0
+    timings: list[float] = []
+    for case in cases:
+        expected = case.get("expected")
+        addresses += expected is not None
+        got = None
+        for _ in range(repeat):
+            tracker = SpokenEmailTracker()
+            got = None
+            for final in case["finals"]:
+                started = time.perf_counter()
+                candidate = tracker.feed(final)
+                timings.append(time.perf_counter() - started)
+                got = candidate or got
+        address = got.address if got else None
+        hints += address is not None
+        correct_hints += address is not None and address == expected
+        correct += address == expected
+        if verbose or address != expected:
+            mark = "ok  " if address == expected else "MISS"
+            print(f"{mark} {' / '.join(case['finals'])!r} -> {address} (expected {expected})")
+
+    timings.sort()
+    return {
+        "cases": len(cases),
+        "accuracy": round(correct / len(cases), 3) if cases else 0.0,
+        "precision": round(correct_hints / hints, 3) if hints else 0.0,
+        "recall": round(correct_hints / addresses, 3) if addresses else 0.0,
+        "parse_p50_us": round(percentile(timings, 50) * 1e6, 1),
+        "parse_p99_us": round(percentile(timings, 99) * 1e6, 1),
+        "parse_max_us": round(timings[-1] * 1e6, 1) if timings else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=50, help="runs per case for stable latency numbers")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = run(args.corpus, args.repeat, args.verbose)
+    print(
+        f"{report['cases']} cases | accuracy {report['accuracy']:.1%} | precision {report['precision']:.1%} | "
+        f"recall {report['recall']:.1%} | parse p50/p99/max {report['parse_p50_us']}/{report['parse_p99_us']}/"
+        f"{report['parse_max_us']} us"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Campaign knowledge: local BM25 lookup vs. pasting the knowledge into the prompt.
+
+- index: build time, passages, terms and on-disk size for the corpus
+  (repeated --scale times with distinct ids to see larger campaigns)
+- retrieval: share of questions whose expected item is the top result / in
+  the top KNOWLEDGE_RESULTS, and the lookup latency (search + formatting as
+  the tool returns it)
+- prompt: estimated tokens per LLM request with all knowledge pasted into
+  the instructions vs. the knowledge instructions plus one tool result
+- store: --calls calls of one campaign against the Supabase stand-in, all
+  starting at once: fetches, builds, time to the index on the first call
+  and on later calls, and a restarted worker loading it from disk
+
+    python benchmarks/knowledge_lookup.py
+    python benchmarks/knowledge_lookup.py --scale 20 --verbose --output report.json
+
+Corpus format: {"items": [{"id", "title", "content", "source_url"}], "questions": [{"question", "item_id"}]}
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent as agent_module  # noqa: E402
+from knowledge_index import KnowledgeIndex, KnowledgeStore  # noqa: E402
+from prompts import KNOWLEDGE_INSTRUCTIONS  # noqa: E402
+from standins import MockSupabaseServer  # noqa: E402
+from supabase_client import SupabaseClient  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "knowledge_corpus.json")
+CAMPAIGN_ID = "bench-campaign"
+
+
+def tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def scaled_items(items: list[dict], scale: int) -> list[dict]:
+    return [{**item, "id": f"{item['id']}#{n}" if n else item["id"]} for n in range(scale) for item in items]
+
+
+def format_results(results: list[dict]) -> str:
+    # Same shape as ColdCallAgent.lookup_knowledge returns
+    return "\n".join(f"- {r['title']}: {r['text']}" if r["title"] else f"- {r['text']}" for r in results)
+
+
+def measure_index(args, items: list[dict], questions: list[dict]) -> dict:
+    started = time.perf_counter()
+    index = KnowledgeIndex.build(items, "v1")
+    build_ms = (time.perf_counter() - started) * 1000
+    k = agent_module.KNOWLEDGE_RESULTS
+
+    top1 = topk = 0
+    result_tokens = []
+    for q in questions:
+        results = index.search(q["question"], k)
+        ids = [r["item_id"].split("#")[0] for r in results]
+        top1 += bool(ids) and ids[0] == q["item_id"]
+        topk += q["item_id"] in ids
+        result_tokens.append(tokens(format_results(results)))
+        if args.verbose and (not ids or ids[0] != q["item_id"]):
+            print(f"  miss: {q['question']!r} -> {[r['title'] for r in results]} (expected {q['item_id']})")
+
+    timings = []
+    for _ in range(args.repeat):
+        for q in questions:
+            started = time.perf_counter()
+            format_results(index.search(q["question"], k))
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    pasted = sum(tokens(f"{item['title']}\n{item['content']}") for item in items)
+    tool_description = tokens(agent_module.ColdCallAgent.lookup_knowledge.__doc__ or "") + 30
+    per_lookup = sum(result_tokens) / len(result_tokens)
+    return {
+        "passages": len(index),
+        "terms": len(index.postings),
+        "index_bytes": len(json.dumps(index.to_dict(), ensure_ascii=False, separators=(",", ":")).encode()),
+        "build_ms": round(build_ms, 1),
+        "top1": round(top1 / len(questions), 3),
+        f"top{k}": round(topk / len(questions), 3),
+        "lookup_us_p50": round(percentile(timings, 50) * 1e6, 1),
+        "lookup_us_p99": round(percentile(timings, 99) * 1e6, 1),
+        "prompt_tokens": {
+            "pasted": pasted,
+            "lookup": tokens(KNOWLEDGE_INSTRUCTIONS) + tool_description,
+            "per_lookup_result": round(per_lookup),
+        },
+    }
+
+
+async def measure_store(args, items: list[dict]) -> dict:
+    version = f"{len(items)}:2026-10-01T09:00:00+00:00"
+    server = MockSupabaseServer(
+        delay=args.backend_delay,
+        knowledge={CAMPAIGN_ID: {"items": items, "version": version}},
+    )
+    client = SupabaseClient(await server.start(), "bench")
+    agent_module._supabase_client = client
+    cache_dir = tempfile.mkdtemp(prefix="knowledge-bench-")
+    store = KnowledgeStore(agent_module.fetch_knowledge, cache_dir)
+    ready_ms: list[float] = []
+
+    async def one_call():
+        started = time.perf_counter()
+        await store.get(CAMPAIGN_ID, version)
+        ready_ms.append((time.perf_counter() - started) * 1000)
+
+    try:
+        await asyncio.gather(*(one_call() for _ in range(args.concurrency)))
+        first_ms = max(ready_ms)
+        ready_ms.clear()
+        for _ in range(args.calls - args.concurrency):
+            await one_call()
+        # Restarted worker: same cache dir, empty memory
+        restarted = KnowledgeStore(agent_module.fetch_knowledge, cache_dir)
+        started = time.perf_counter()
+        await restarted.get(CAMPAIGN_ID, version)
+        disk_ms = (time.perf_counter() - started) * 1000
+    finally:
+        await client.close()
+        await server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    ready_ms.sort()
+    return {
+        "calls": args.calls,
+        "fetches": server.calls.get("agent-actions:get_campaign_knowledge", 0),
+        "store": store.stats(),
+        "first_call_ms": round(first_ms, 1),
+        "cached_us_p50": round(percentile(ready_ms, 50) * 1000, 1) if ready_ms else 0,
+        "restart_from_disk_ms": round(disk_ms, 1),
+        "restart_fetches": server.calls.get("agent-actions:get_campaign_knowledge", 0) - 1,
+    }
+
+
+async def run(args) -> dict:
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    items = scaled_items(corpus["items"], args.scale)
+    return {
+        "items": len(items),
+        "questions": len(corpus["questions"]),
+        "index": measure_index(args, items, corpus["questions"]),
+        "store": await measure_store(args, items),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--scale", type=int, default=1, help="repeat the corpus items N times")
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the questions for the latency")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10, help="calls starting together on a cold worker")
+    parser.add_argument("--backend-delay", type=float, default=0.05, help="Supabase stand-in latency (s)")
+    parser.add_argument("--verbose", action="store_true", help="print questions whose top result is wrong")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    i, s = report["index"], report["store"]
+    k = agent_module.KNOWLEDGE_RESULTS
+    print(
+        f"index: {report['items']} items, {i['passages']} passages, {i['terms']} terms, "
+        f"{i['index_bytes'] // 1024} KiB, built in {i['build_ms']}ms"
+    )
+    print(
+        f"retrieval: top1 {i['top1']:.0%}, top{k} {i[f'top{k}']:.0%} of {report['questions']} questions | "
+        f"lookup us p50/p99 {i['lookup_us_p50']}/{i['lookup_us_p99']}"
+    )
+    p = i["prompt_tokens"]
+    print(f"prompt tokens per request: pasted {p['pasted']} | lookup {p['lookup']} (+{p['per_lookup_result']} per lookup result)")
+    print(
+        f"store: {s['calls']} calls, {s['fetches']} fetch, {s['store']}, first call {s['first_call_ms']}ms, "
+        f"cached {s['cached_us_p50']}us, restart from disk {s['restart_from_disk_ms']}ms ({s['restart_fetches']} fetches)"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
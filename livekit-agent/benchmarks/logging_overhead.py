@@ -0,0 +1,203 @@
+"""Per-call logging cost on the event loop: direct vs. LogPipeline.
+
+Like in a job process, the root logger has livekit's IPC LogQueueHandler,
+whose other end is read by a separate "worker" process that JSON-formats
+every record (as the agent worker does). --calls simulated calls share
+one event loop; each turn logs what agent.py logs per turn (two transcript
+lines, LLM turn metrics, an action result, sometimes a recognized e-mail)
+with the lead's name, e-mail and phone number in them.
+
+- direct: the former f-string calls, formatted and pickled on the loop
+- pipeline: lazy calls with structured extras through install_log_pipeline
+  (background formatting, PII redaction, per-event rate limit)
+
+Reported per mode and level: loop time spent in logging calls per turn,
+event-loop lag, records that reached the worker per call and minute, and
+records there that still contain the lead's e-mail or phone number.
+
+    python benchmarks/logging_overhead.py
+    python benchmarks/logging_overhead.py --calls 1,16,64 --seconds 10 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.agents.cli.log import JsonFormatter  # noqa: E402
+from livekit.agents.ipc.log_queue import LogQueueHandler  # noqa: E402
+from livekit.agents.utils.aio import duplex_unix  # noqa: E402
+
+from log_pipeline import install_log_pipeline, set_call_fields  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+LEAD_EMAIL = "markus.weber@weber-logistik.de"
+LEAD_PHONE = "+49 151 23456789"
+CALLER_LINES = [
+    "Ja, hier Weber, worum geht es denn?",
+    f"Schicken Sie mir das an {LEAD_EMAIL}.",
+    f"Rufen Sie mich lieber auf dem Handy an, {LEAD_PHONE}.",
+    "Wir machen das aktuell alles per Hand, ehrlich gesagt.",
+]
+AGENT_LINES = [
+    "Verstehe, Herr Weber. Darf ich kurz erklaeren, wie wir das loesen?",
+    "Perfekt, ich schick Ihnen die Unterlagen direkt zu.",
+    "Klingt gut, dann trag ich uns fuer Donnerstag ein.",
+]
+
+
+def worker(sock: socket.socket, other_end: socket.socket, conn):
+    # Stand-in for the agent worker: unpickle and JSON-format every record like its log handler
+    other_end.close()
+    duplex = duplex_unix._Duplex.open(sock)
+    formatter = JsonFormatter()
+    count = leaks = 0
+    while True:
+        try:
+            data = duplex.recv_bytes()
+        except duplex_unix.DuplexClosed:
+            break
+        line = formatter.format(pickle.loads(data))
+        count += 1
+        leaks += LEAD_EMAIL in line or LEAD_PHONE in line
+    conn.send({"records": count, "leaks": leaks})
+
+
+def log_turn_direct(logger, call_log_id: str, turn: int, rng: random.Random):
+    caller = rng.choice(CALLER_LINES)
+    logger.info(f"[Transcript] Markus Weber: {caller}")
+    if LEAD_EMAIL in caller:
+        logger.info(f"[Email] Erkannt: {LEAD_EMAIL} (0.92, 0.41ms)")
+    logger.info(f"LLM turn: {1800 + turn * 40} prompt tokens, 1536 cached ({1536 / (1800 + turn * 40):.0%})")
+    result = {"success": True, "lead_id": "lead-1", "call_log_id": call_log_id, "note": caller}
+    logger.info(f"Supabase action add_note: {result}")
+    logger.info(f"[Transcript] Lisa: {rng.choice(AGENT_LINES)}")
+
+
+def log_turn_pipeline(logger, call_log_id: str, turn: int, rng: random.Random):
+    caller = rng.choice(CALLER_LINES)
+    logger.info("[Transcript] %s: %s", "Markus Weber", caller, extra={"event": "transcript", "turn": turn})
+    if LEAD_EMAIL in caller:
+        logger.info("[Email] Erkannt: %s (%.2f, %.2fms)", LEAD_EMAIL, 0.92, 0.41, extra={"event": "email", "turn": turn})
+    prompt_tokens = 1800 + turn * 40
+    logger.info(
+        "LLM turn: %d prompt tokens, %d cached (%.0f%%)", prompt_tokens, 1536, 1536 / prompt_tokens * 100,
+        extra={"event": "llm_turn", "turn": turn, "latency_ms": 410},
+    )
+    logger.info("Supabase action %s ok", "add_note", extra={"event": "action"})
+    logger.debug("Supabase action %s: %s", "add_note", {"success": True, "call_log_id": call_log_id})
+    logger.info("[Transcript] %s: %s%s", "Lisa", rng.choice(AGENT_LINES), "", extra={"event": "transcript", "turn": turn})
+
+
+async def run_call(i: int, args, log_turn, spent: list[float], turns: list[int]):
+    call_log_id = f"bench-{i}"
+    set_call_fields(call_log_id, "Markus Weber", LEAD_EMAIL, LEAD_PHONE)
+    logger = logging.getLogger("ColdCallAgent")
+    rng = random.Random(i)
+    await asyncio.sleep(rng.uniform(0, args.turn_seconds))
+    deadline = time.perf_counter() + args.seconds
+    turn = 0
+    while time.perf_counter() < deadline:
+        turn += 1
+        started = time.perf_counter()
+        log_turn(logger, call_log_id, turn, rng)
+        spent.append(time.perf_counter() - started)
+        await asyncio.sleep(args.turn_seconds)
+    turns.append(turn)
+
+
+async def measure_lag(samples: list[float], stop: asyncio.Event, interval: float = 0.01):
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - t - interval))
+
+
+def run_level(args, mode: str, calls: int) -> dict:
+    ours, theirs = socket.socketpair()
+    parent_conn, child_conn = multiprocessing.Pipe()
+    reader = multiprocessing.get_context("fork").Process(target=worker, args=(theirs, ours, child_conn))
+    reader.start()
+    theirs.close()
+
+    root = logging.getLogger()
+    root.handlers = []
+    root.setLevel(logging.INFO)
+    ipc_handler = LogQueueHandler(duplex_unix._Duplex.open(ours))
+    root.addHandler(ipc_handler)
+    logger = logging.getLogger("ColdCallAgent")
+    logger.handlers, logger.propagate = [], True
+    pipeline = None
+    if mode == "pipeline":
+        pipeline = install_log_pipeline(rate=args.rate, burst=args.burst)
+
+    spent, turns, lag = [], [], []
+
+    async def main():
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_lag(lag, stop))
+        log_turn = log_turn_pipeline if mode == "pipeline" else log_turn_direct
+        await asyncio.gather(*(run_call(i, args, log_turn, spent, turns) for i in range(calls)))
+        stop.set()
+        await lag_task
+
+    asyncio.run(main())
+    if pipeline is not None:
+        pipeline.flush(10)
+    ipc_handler.close()
+    ipc_handler.thread.join()
+    received = parent_conn.recv()
+    reader.join()
+
+    spent.sort()
+    lag.sort()
+    return {
+        "mode": mode,
+        "calls": calls,
+        "turns": sum(turns),
+        "log_us_per_turn_p50": round(percentile(spent, 50) * 1e6, 1),
+        "log_us_per_turn_p99": round(percentile(spent, 99) * 1e6, 1),
+        "loop_lag_p99_ms": round(percentile(lag, 99) * 1000, 2),
+        "records_per_call_minute": round(received["records"] / calls / (args.seconds / 60)),
+        "pii_leaks": received["leaks"],
+        "pipeline": pipeline.stats() if pipeline else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", default="1,8,32", help="comma-separated numbers of simulated calls")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per level")
+    parser.add_argument("--turn-seconds", type=float, default=0.05, help="time between turns (sped up)")
+    parser.add_argument("--rate", type=float, default=5.0, help="LOG_EVENT_RATE")
+    parser.add_argument("--burst", type=int, default=20, help="LOG_EVENT_BURST")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = []
+    for calls in (int(c) for c in args.calls.split(",")):
+        for mode in ("direct", "pipeline"):
+            # Fresh process state per run: the pipeline replaces the logger's handlers
+            r = run_level(args, mode, calls)
+            report.append(r)
+            print(
+                f"{calls:>3} calls {mode:>8} | logging per turn us p50/p99 {r['log_us_per_turn_p50']}/{r['log_us_per_turn_p99']} | "
+                f"loop lag p99 {r['loop_lag_p99_ms']} ms | {r['records_per_call_minute']} records/call/min to the worker | "
+                f"PII leaks {r['pii_leaks']}" + (f" | {r['pipeline']}" if r["pipeline"] else "")
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
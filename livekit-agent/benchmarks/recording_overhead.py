@@ -0,0 +1,168 @@
+"""Call recording overhead: turn latency with and without RECORD_CALLS.
+
+- latency: replay.py levels run twice, without and with --record, in
+  alternating subprocesses; compares caller-perceived response latency,
+  event-loop lag and CPU per session, and reports what the recorder did
+  (frames, drops, encoder CPU, uploaded bytes)
+- overload: a recorder whose encoder cannot keep up (tiny --queue) gets a
+  burst of frames; every frame that did not fit must be counted as dropped,
+  and the per-frame cost on the event loop (put_frame) is measured
+
+Recording counts as having no measurable effect on a level when its
+response p50 is not slower than without by more than the run-to-run
+spread of the baseline (--repeat runs each) or --tolerance-ms.
+
+    python benchmarks/recording_overhead.py
+    python benchmarks/recording_overhead.py --concurrency 1,4,8 --codec flac --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit import rtc  # noqa: E402
+
+from call_recorder import AGENT, CALLER, CallRecorder  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+REPLAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay.py")
+
+
+def replay(args, record: bool) -> list[dict]:
+    with tempfile.NamedTemporaryFile(suffix=".json") as out:
+        cmd = [
+            sys.executable, REPLAY,
+            "--conversations", args.conversations,
+            "--concurrency", args.concurrency,
+            "--keep-going",
+            "--record-codec", args.codec,
+            "--output", out.name,
+        ]
+        if record:
+            cmd.append("--record")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:], file=sys.stderr)
+            raise SystemExit("replay failed")
+        return json.load(open(out.name))["levels"]
+
+
+def measure_latency(args) -> list[dict]:
+    runs = {False: [], True: []}
+    for _ in range(args.repeat):
+        for record in (False, True):
+            runs[record].append(replay(args, record))
+
+    levels = []
+    for i, base_level in enumerate(runs[False][0]):
+        off = [run[i] for run in runs[False]]
+        on = [run[i] for run in runs[True]]
+
+        def median(results, *keys):
+            values = []
+            for r in results:
+                for key in keys:
+                    r = r[key]
+                values.append(r)
+            return round(percentile(sorted(values), 50), 1)
+
+        base_p50 = [r["response"]["p50_ms"] for r in off]
+        levels.append({
+            "sessions": base_level["sessions"],
+            "response_p50_ms": {"off": median(off, "response", "p50_ms"), "on": median(on, "response", "p50_ms")},
+            "response_p95_ms": {"off": median(off, "response", "p95_ms"), "on": median(on, "response", "p95_ms")},
+            "baseline_noise_ms": round(max(base_p50) - min(base_p50), 1),
+            "loop_lag_p95_ms": {"off": median(off, "loop_lag", "p95_ms"), "on": median(on, "loop_lag", "p95_ms")},
+            "cpu_pct_per_session": {"off": median(off, "cpu_core_pct_per_session"), "on": median(on, "cpu_core_pct_per_session")},
+            "timeouts": sum(r["timeouts"] for r in off + on),
+            "recording": on[-1]["recording"],
+        })
+    return levels
+
+
+async def measure_overload(args) -> dict:
+    spool_dir = tempfile.mkdtemp(prefix="recording-overload-")
+    recorder = CallRecorder(spool_dir, "overload", codec=args.codec, max_queued=args.queue)
+    recorder.start()
+    samples = (np.sin(np.arange(320) / 8) * 6000).astype(np.int16).tobytes()
+    frame = rtc.AudioFrame(samples, 16000, 1, 320)
+    timings = []
+    now = time.time()
+    for i in range(args.burst):
+        # Both sides at once, far faster than real time: the queue must overflow
+        started = time.perf_counter()
+        recorder.put_frame(CALLER if i % 2 else AGENT, frame, now + i // 2 * 0.02)
+        timings.append(time.perf_counter() - started)
+    path = await recorder.aclose()
+    timings.sort()
+    stats = recorder.stats()
+    size = os.path.getsize(path) if path else 0
+    if path:
+        os.remove(path)
+    return {
+        "pushed": args.burst,
+        "queue": args.queue,
+        **stats,
+        "accounted": stats["frames"] == args.burst and stats["dropped_frames"] > 0,
+        "put_frame_us_p50": round(percentile(timings, 50) * 1e6, 2),
+        "put_frame_us_p99": round(percentile(timings, 99) * 1e6, 2),
+        "file_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", help="directory of <name>.wav + <name>.json pairs (default: generated)")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated session counts")
+    parser.add_argument("--repeat", type=int, default=2, help="replay runs per mode")
+    parser.add_argument("--codec", default="opus", choices=["opus", "flac"])
+    parser.add_argument("--tolerance-ms", type=float, default=50, help="minimum p50 slowdown that counts as an effect")
+    parser.add_argument("--queue", type=int, default=50, help="recorder queue size for the overload check")
+    parser.add_argument("--burst", type=int, default=20000, help="frames pushed in the overload check")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    if not args.conversations:
+        args.conversations = tempfile.mkdtemp(prefix="bench-conversations-")
+        subprocess.run([sys.executable, REPLAY, "--generate", args.conversations], check=True, capture_output=True)
+
+    report = {"codec": args.codec, "latency": measure_latency(args), "overload": asyncio.run(measure_overload(args))}
+    for level in report["latency"]:
+        p50, p95, lag, cpu, rec = (
+            level["response_p50_ms"], level["response_p95_ms"], level["loop_lag_p95_ms"],
+            level["cpu_pct_per_session"], level["recording"],
+        )
+        delta = p50["on"] - p50["off"]
+        verdict = "no measurable effect" if delta <= max(level["baseline_noise_ms"], args.tolerance_ms) else f"{delta:+.0f} ms"
+        print(
+            f"{level['sessions']:>3} sessions | response p50 {p50['off']} -> {p50['on']} ms, "
+            f"p95 {p95['off']} -> {p95['on']} ms (noise {level['baseline_noise_ms']} ms: {verdict}) | "
+            f"loop lag p95 {lag['off']} -> {lag['on']} ms | CPU {cpu['off']} -> {cpu['on']}%/session"
+        )
+        print(
+            f"    recorded {rec['encoded_seconds']}s in {rec['calls']} calls, encoder CPU {rec['encode_cpu_seconds']}s, "
+            f"dropped {rec['dropped_frames']}/{rec['frames']} frames, uploaded {rec['uploaded']} files "
+            f"{rec['uploaded_bytes'] // 1024} KiB, {rec['left_in_spool']} left in spool"
+        )
+    o = report["overload"]
+    print(
+        f"overload: {o['pushed']} frames into a queue of {o['queue']}: dropped {o['dropped_frames']} "
+        f"({o['dropped_seconds']}s), accounted={o['accounted']} | put_frame us p50/p99 "
+        f"{o['put_frame_us_p50']}/{o['put_frame_us_p99']}"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
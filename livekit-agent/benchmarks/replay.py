@@ -0,0 +1,514 @@
+"""Offline replay benchmark for ColdCallAgent.
+
+Plays recorded caller audio (WAV + JSON script with the spoken lines) into
+AgentSession instances built like `entrypoint` does, with local stand-ins
+for STT/LLM/TTS and a mock Supabase backend. Nothing leaves the machine.
+
+    python benchmarks/replay.py --concurrency 1,2,4,8,16
+    python benchmarks/replay.py --conversations recordings/ --output report.json
+
+Without --conversations, synthetic demo conversations are generated into a
+temp directory (see --generate).
+
+Each concurrency level runs in a fresh subprocess so RSS numbers are not
+polluted by earlier levels. Reported per level: caller-perceived response
+latency (end of caller speech -> first agent audio), per-stage latency from
+TurnMetrics, CPU per session, memory per call (RSS growth during the level
+over the baseline after an untimed warm-up call, per session) and
+event-loop lag. The max concurrent sessions figure is the highest level
+whose p95 response latency stays within --budget-ms of the single-session
+p95 and whose loop lag p95 stays under --max-lag-ms. With --record every
+call is also recorded and uploaded like with RECORD_CALLS=1 (see
+recording_overhead.py); --tool and --action-delay make the tool turns wait
+on a slow backend action (see slow_actions.py). Noise cancellation is not
+included (it needs LiveKit Cloud); VAD is the real Silero model. Silero
+does not classify the synthetic --generate audio as speech, so those turns
+are endpointed by the stand-in STT alone - use real recordings to cover the
+VAD turn path.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GREETING_CACHE_DIR", tempfile.mkdtemp(prefix="bench-greetings-"))
+
+from livekit import rtc  # noqa: E402
+from livekit.agents import AgentSession  # noqa: E402
+from livekit.agents.voice import io  # noqa: E402
+from livekit.plugins import openai, silero  # noqa: E402
+
+import agent as agent_module  # noqa: E402
+from call_recorder import CallRecorder  # noqa: E402
+from prompts import build_instructions  # noqa: E402
+from standins import TOOL_ARGUMENTS, MockLLMServer, MockSupabaseServer, ScriptedSTT, StandinTTS  # noqa: E402
+from supabase_client import SupabaseClient  # noqa: E402
+from turn_metrics import STAGES, LatencyStats  # noqa: E402
+
+FRAME_MS = 20
+SAMPLE_RATE = 16000
+MIN_GAP = 0.5  # silence that separates two caller utterances in a recording
+TURN_TIMEOUT = 20.0
+
+GREETING = "Hallo, hier ist Lisa von Acme. Haben Sie kurz eine Minute?"
+DEMO_SCRIPTS = [
+    ["Ja, hallo?", "Worum geht es denn?", "Wir machen das aktuell alles per Hand.", "Ja, schicken Sie mir gern was zu.", "Danke, tschuess."],
+    ["Ja bitte?", "Hm, eigentlich habe ich wenig Zeit.", "Okay, ganz kurz.", "Klingt interessant.", "Meine Mail ist max punkt mustermann at gmail punkt com.", "Tschuess."],
+    ["Hallo?", "Wer ist da?", "Ah okay.", "Nein, kein Interesse, danke."],
+]
+
+
+def generate_conversations(out_dir: str):
+    """Synthetic recordings: band-limited noise per spoken line, silence between."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(7)
+    for i, script in enumerate(DEMO_SCRIPTS):
+        chunks = [np.zeros(int(SAMPLE_RATE * 0.5), dtype=np.int16)]
+        for line in script:
+            n = int(SAMPLE_RATE * max(0.6, len(line) * 0.07))
+            noise = rng.normal(0, 3000, n)
+            envelope = np.abs(np.sin(np.linspace(0, np.pi * max(2, len(line) // 6), n))) * 0.8 + 0.2
+            chunks.append(np.clip(noise * envelope, -32768, 32767).astype(np.int16))
+            chunks.append(np.zeros(int(SAMPLE_RATE * 1.0), dtype=np.int16))
+        path = os.path.join(out_dir, f"demo_{i + 1}")
+        with wave.open(f"{path}.wav", "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(np.concatenate(chunks).tobytes())
+        with open(f"{path}.json", "w") as f:
+            json.dump({"lead_name": "Max Mustermann", "lead_company": "Muster GmbH", "turns": script}, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(DEMO_SCRIPTS)} conversations to {out_dir}")
+
+
+def load_conversation(wav_path: str) -> dict:
+    with wave.open(wav_path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{wav_path}: only 16-bit PCM is supported")
+        sample_rate, channels = f.getframerate(), f.getnchannels()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels)[:, 0].copy()
+    with open(os.path.splitext(wav_path)[0] + ".json") as f:
+        meta = json.load(f)
+
+    # Split into utterances at silences longer than MIN_GAP
+    frame = sample_rate * FRAME_MS // 1000
+    usable = len(samples) // frame * frame
+    rms = np.sqrt(np.mean(samples[:usable].reshape(-1, frame).astype(np.float32) ** 2, axis=1))
+    voiced = rms > 500
+    utterances, start, silent = [], None, 0
+    for i, v in enumerate(voiced):
+        if v:
+            start = i if start is None else start
+            silent = 0
+        elif start is not None:
+            silent += 1
+            if silent * FRAME_MS / 1000 >= MIN_GAP:
+                utterances.append(samples[start * frame:(i - silent + 1) * frame])
+                start, silent = None, 0
+    if start is not None:
+        utterances.append(samples[start * frame:usable])
+    return {"name": os.path.basename(wav_path), "sample_rate": sample_rate, "utterances": utterances, **meta}
+
+
+class CallerAudioInput(io.AudioInput):
+    """Real-time caller microphone: silence until `play()` queues an utterance."""
+
+    def __init__(self, sample_rate: int):
+        super().__init__(label="bench-caller")
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * FRAME_MS // 1000
+        self._queue: list[np.ndarray] = []
+        self._silence = np.zeros(self.frame_samples, dtype=np.int16).tobytes()
+        self._next_at = None
+        self.speech_ended = asyncio.Event()
+        self.speech_end_time = 0.0
+
+    def play(self, samples: np.ndarray):
+        pad = (-len(samples)) % self.frame_samples
+        samples = np.concatenate([samples, np.zeros(pad, dtype=np.int16)])
+        self._queue.extend(samples.reshape(-1, self.frame_samples))
+        self.speech_ended.clear()
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        now = time.perf_counter()
+        if self._next_at is None:
+            self._next_at = now
+        if self._next_at > now:
+            await asyncio.sleep(self._next_at - now)
+        self._next_at += FRAME_MS / 1000
+
+        if self._queue:
+            data = self._queue.pop(0).tobytes()
+            if not self._queue:
+                self.speech_end_time = time.perf_counter()
+                self.speech_ended.set()
+        else:
+            data = self._silence
+        return rtc.AudioFrame(data=data, sample_rate=self.sample_rate, num_channels=1, samples_per_channel=self.frame_samples)
+
+
+class PlayoutSink(io.AudioOutput):
+    """Stands in for the room's audio track: plays out in real time, notes first-frame times."""
+
+    def __init__(self):
+        super().__init__(label="bench-playout", capabilities=io.AudioOutputCapabilities(pause=False))
+        self.first_frame_times: list[float] = []
+        self._segment_start = None
+        self._pushed = 0.0
+        self._finish_task: asyncio.Task | None = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self._segment_start is None:
+            self._segment_start = time.perf_counter()
+            self.first_frame_times.append(self._segment_start)
+            self.on_playback_started(created_at=time.time())
+        self._pushed += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if self._segment_start is None:
+            return
+        remaining = self._segment_start + self._pushed - time.perf_counter()
+        pushed = self._pushed
+        self._segment_start, self._pushed = None, 0.0
+        self._finish_task = asyncio.create_task(self._finish(max(0.0, remaining), pushed))
+
+    async def _finish(self, delay: float, position: float):
+        await asyncio.sleep(delay)
+        self.on_playback_finished(playback_position=position, interrupted=False)
+
+    def clear_buffer(self) -> None:
+        if self._finish_task is not None and not self._finish_task.done():
+            self._finish_task.cancel()
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        elif self._segment_start is not None:
+            super().flush()
+            self.on_playback_finished(playback_position=time.perf_counter() - self._segment_start, interrupted=True)
+        self._segment_start, self._pushed = None, 0.0
+
+
+async def wait_for_state(states: dict, wanted: str, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while states["agent"] != wanted:
+        if time.perf_counter() > deadline:
+            raise asyncio.TimeoutError(f"agent stayed {states['agent']}")
+        await asyncio.sleep(0.02)
+
+
+async def run_call(conv: dict, args, llm_url: str, vad, results: dict):
+    tts = StandinTTS(ttfb=args.tts_ttfb)
+    stt = ScriptedSTT(conv["turns"], final_delay=args.stt_delay)
+    llm = openai.LLM(model="gpt-4o", base_url=llm_url, api_key="bench")
+
+    instructions, cache_key = build_instructions(
+        "Lisa", "Acme", "", GREETING,
+        conv.get("lead_name", ""), conv.get("lead_company", ""), "",
+        "Automatisierte Kaltakquise", "Termin vereinbaren", "",
+    )
+    agent = agent_module.ColdCallAgent(
+        instructions=instructions,
+        lead_name=conv.get("lead_name", ""),
+        lead_company=conv.get("lead_company", ""),
+        lead_email="max.mustermann@example.com",
+        lead_phone="+4915100000000",
+        lead_id="bench-lead",
+        call_log_id=f"bench-{random.getrandbits(32):08x}",
+        ai_name="Lisa",
+        ai_greeting=GREETING,
+        voice_id=agent_module.DEFAULT_VOICE_ID,
+    )
+    agent.greeting_task = asyncio.create_task(agent_module.prepare_greeting(tts, agent.voice_id, GREETING))
+    agent.filler_task = asyncio.create_task(agent_module.prepare_fillers(tts, agent.voice_id, after=agent.greeting_task))
+    agent.usage_stats["prompt_cache_key"] = cache_key
+    if args.record:
+        agent.recorder = CallRecorder(agent_module.RECORDING_SPOOL_DIR, agent.call_log_id, codec=args.record_codec)
+
+    session = AgentSession(stt=stt, llm=llm, tts=tts, vad=vad)
+    agent_module.watch_session(session, agent)
+    caller = CallerAudioInput(conv["sample_rate"])
+    sink = PlayoutSink()
+    session.input.audio = caller
+    session.output.audio = sink
+    states = {"agent": "initializing"}
+    session.on("agent_state_changed", lambda ev: states.update(agent=ev.new_state))
+
+    await session.start(agent=agent, record=False)
+    if agent.recorder is not None:
+        agent.recorder.attach(session)
+    agent.mark_answered()
+    try:
+        await wait_for_state(states, "speaking", TURN_TIMEOUT)
+        await wait_for_state(states, "listening", TURN_TIMEOUT)
+        for utterance in conv["utterances"]:
+            await asyncio.sleep(random.uniform(0.2, 0.6))
+            replies_before = len(sink.first_frame_times)
+            caller.play(utterance)
+            await caller.speech_ended.wait()
+            deadline = time.perf_counter() + TURN_TIMEOUT
+            while len(sink.first_frame_times) == replies_before:
+                if time.perf_counter() > deadline:
+                    raise asyncio.TimeoutError("no reply")
+                await asyncio.sleep(0.01)
+            results["response"].append(sink.first_frame_times[replies_before] - caller.speech_end_time)
+            await wait_for_state(states, "listening", TURN_TIMEOUT)
+        results["completed"] += 1
+    except asyncio.TimeoutError as e:
+        results["timeouts"] += 1
+        logging.getLogger("bench").warning(f"{conv['name']}: turn timed out ({e})")
+    finally:
+        await agent.finalize("bench")
+        await session.aclose()
+    for stage, stats in agent.turn_metrics.stages.items():
+        results["stages"][stage].extend(stats.samples)
+    if agent.recorder is not None:
+        results["recordings"].append(agent.recorder.stats())
+    deadlines = agent.action_deadlines
+    for action, stats in deadlines.stats.items():
+        results["actions"].setdefault(action, []).extend(stats.samples)
+    results["fillers"] += sum(deadlines.fillers.values())
+    results["deferred"] += sum(deadlines.deferred.values())
+    results["deferred_failed"] += len(deadlines.failed)
+
+
+async def measure_loop_lag(samples: list[float], stop: asyncio.Event, interval: float = 0.05):
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - t - interval))
+
+
+async def run_level(args) -> dict:
+    convs = [load_conversation(p) for p in sorted(glob.glob(os.path.join(args.conversations, "*.wav")))]
+    if not convs:
+        raise SystemExit(f"No conversations in {args.conversations} (use --generate first)")
+    random.seed(args.seed)
+
+    llm_server = MockLLMServer(ttft=args.llm_ttft, tool_rate=args.tool_rate, tool=args.tool)
+    # Actions a tool waits for (not write-behind)
+    slow = {"send_email", "send_meeting_link", "schedule_callback"}
+    supabase = MockSupabaseServer(
+        delay=args.backend_delay,
+        action_delays={a: args.action_delay for a in slow} if args.action_delay is not None else None,
+    )
+    llm_url = await llm_server.start()
+    agent_module._supabase_client = SupabaseClient(await supabase.start(), "bench")
+    vad = silero.VAD.load()
+    if args.record:
+        agent_module.RECORDING_SPOOL_DIR = tempfile.mkdtemp(prefix="bench-recordings-")
+
+    def new_results() -> dict:
+        return {
+            "response": [], "stages": {s: [] for s in STAGES}, "recordings": [], "completed": 0, "timeouts": 0,
+            "actions": {}, "fillers": 0, "deferred": 0, "deferred_failed": 0,
+        }
+
+    # Untimed one-turn call first: model sessions, imports and pools are paid once per process,
+    # so the RSS baseline below leaves only what the measured calls add
+    await run_call({**convs[0], "utterances": convs[0]["utterances"][:1]}, args, llm_url, vad, new_results())
+    if agent_module._upload_sweep is not None:
+        await agent_module._upload_sweep.drain(agent_module.RECORDING_UPLOAD_TIMEOUT)
+    supabase.calls.clear()
+    supabase.deferred_actions.clear()
+    supabase.uploads.clear()
+    llm_server.requests = 0
+
+    proc = psutil.Process()
+    results = new_results()
+    lag, rss_samples = [], []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lag, stop))
+
+    async def sample_rss():
+        while not stop.is_set():
+            rss_samples.append(proc.memory_info().rss)
+            await asyncio.sleep(0.25)
+
+    rss_base = proc.memory_info().rss
+    rss_task = asyncio.create_task(sample_rss())
+    cpu_start = proc.cpu_times()
+    wall_start = time.perf_counter()
+
+    async def staggered(i: int):
+        await asyncio.sleep(random.uniform(0, args.ramp))
+        await run_call(convs[i % len(convs)], args, llm_url, vad, results)
+
+    await asyncio.gather(*(staggered(i) for i in range(args.level)))
+    if agent_module._upload_sweep is not None:
+        # Like job shutdown: recordings upload after the calls
+        await agent_module._upload_sweep.drain(agent_module.RECORDING_UPLOAD_TIMEOUT)
+
+    wall = time.perf_counter() - wall_start
+    cpu_end = proc.cpu_times()
+    stop.set()
+    await asyncio.gather(lag_task, rss_task)
+    await agent_module.get_supabase_client().close()
+    await llm_server.stop()
+    await supabase.stop()
+
+    cpu_seconds = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    response = LatencyStats(max_samples=100_000)
+    for v in results["response"]:
+        response.add(v)
+    loop_lag = LatencyStats(max_samples=100_000)
+    for v in lag:
+        loop_lag.add(v)
+    stages = {stage: stats_of(values) for stage, values in results["stages"].items() if values}
+    report = {
+        "sessions": args.level,
+        "completed": results["completed"],
+        "timeouts": results["timeouts"],
+        "response": response.as_dict(),
+        "stages": stages,
+        "loop_lag": loop_lag.as_dict(),
+        "cpu_core_pct_per_session": round(cpu_seconds / wall / args.level * 100, 2),
+        "rss_mb_per_call": round((max(rss_samples, default=rss_base) - rss_base) / args.level / 2**20, 2),
+        "rss_peak_mb": round(max(rss_samples, default=rss_base) / 2**20, 1),
+        "wall_seconds": round(wall, 1),
+        "backend_calls": supabase.calls,
+        "llm_requests": llm_server.requests,
+        "actions": {
+            "fillers": results["fillers"],
+            "deferred": results["deferred"],
+            "deferred_failed": results["deferred_failed"],
+            "outbox": len(supabase.deferred_actions),
+            "latency": {action: stats_of(values) for action, values in results["actions"].items()},
+        },
+    }
+    if args.record:
+        recordings = results["recordings"]
+        report["recording"] = {
+            "codec": args.record_codec,
+            "calls": len(recordings),
+            **{key: round(sum(r[key] for r in recordings), 3) for key in ("frames", "dropped_frames", "dropped_seconds", "late_seconds", "encoded_seconds", "encode_cpu_seconds")},
+            "uploaded": len(supabase.uploads),
+            "uploaded_bytes": sum(len(data) for data in supabase.uploads.values()),
+            "left_in_spool": len(os.listdir(agent_module.RECORDING_SPOOL_DIR)),
+        }
+    return report
+
+
+def stats_of(values: list[float]) -> dict:
+    stats = LatencyStats(max_samples=100_000)
+    for v in values:
+        stats.add(v)
+    return stats.as_dict()
+
+
+def run_levels(args):
+    results = []
+    base_p95 = None
+    for level in args.concurrency:
+        cmd = [sys.executable, os.path.abspath(__file__), "--level", str(level)] + args.passthrough
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(out.stderr[-2000:], file=sys.stderr)
+            raise SystemExit(f"level {level} failed")
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        p95 = result["response"]["p95_ms"]
+        base_p95 = p95 if base_p95 is None else base_p95
+        result["within_budget"] = (
+            result["timeouts"] == 0
+            and p95 <= base_p95 + args.budget_ms
+            and result["loop_lag"]["p95_ms"] <= args.max_lag_ms
+        )
+        results.append(result)
+        print(
+            f"{level:>4} sessions | response p50/p95/p99 "
+            f"{result['response']['p50_ms']}/{p95}/{result['response']['p99_ms']} ms | "
+            f"loop lag p95 {result['loop_lag']['p95_ms']} ms | "
+            f"CPU {result['cpu_core_pct_per_session']}%/session | "
+            f"{result['rss_mb_per_call']} MB/call | "
+            f"{'ok' if result['within_budget'] else 'over budget'}"
+        )
+        if not result["within_budget"] and not args.keep_going:
+            break
+
+    # One-off costs (model sessions, imports, pools) dominate a single call; the slope is what scales
+    for prev, cur in zip(results, results[1:]):
+        cur["rss_mb_marginal_per_call"] = round(
+            (cur["rss_peak_mb"] - prev["rss_peak_mb"]) / (cur["sessions"] - prev["sessions"]), 2
+        )
+
+    passing = [r["sessions"] for r in results if r["within_budget"]]
+    summary = {"levels": results, "max_concurrent_sessions": max(passing, default=0)}
+    print(f"Max concurrent sessions per process: {summary['max_concurrent_sessions']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generate", metavar="DIR", help="write synthetic demo conversations and exit")
+    parser.add_argument("--conversations", help="directory of <name>.wav + <name>.json pairs")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated session counts")
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--budget-ms", type=int, default=250, help="allowed p95 response latency increase over 1 session")
+    parser.add_argument("--max-lag-ms", type=int, default=50, help="allowed event-loop lag p95")
+    parser.add_argument("--keep-going", action="store_true", help="run all levels even after one is over budget")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--stt-delay", type=float, default=0.15, help="end of speech -> final transcript (s)")
+    parser.add_argument("--llm-ttft", type=float, default=0.35, help="LLM time to first token (s)")
+    parser.add_argument("--tts-ttfb", type=float, default=0.12, help="TTS time to first byte (s)")
+    parser.add_argument("--backend-delay", type=float, default=0.05, help="Supabase function latency (s)")
+    parser.add_argument("--tool-rate", type=float, default=0.2, help="share of turns starting with a tool call")
+    parser.add_argument("--tool", default="add_note", choices=sorted(TOOL_ARGUMENTS), help="tool the LLM stand-in calls")
+    parser.add_argument("--action-delay", type=float, help="backend latency of the actions tools wait for (s)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="spread session starts over this many seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--record", action="store_true", help="record and upload every call")
+    parser.add_argument("--record-codec", default="opus", choices=["opus", "flac"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("ColdCallAgent").setLevel(logging.WARNING)
+
+    if args.generate:
+        generate_conversations(args.generate)
+        return
+    if args.level:
+        print(json.dumps(asyncio.run(run_level(args))))
+        return
+
+    if not args.conversations:
+        args.conversations = tempfile.mkdtemp(prefix="bench-conversations-")
+        generate_conversations(args.conversations)
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.passthrough = [
+        "--conversations", args.conversations,
+        "--stt-delay", str(args.stt_delay),
+        "--llm-ttft", str(args.llm_ttft),
+        "--tts-ttfb", str(args.tts_ttfb),
+        "--backend-delay", str(args.backend_delay),
+        "--tool-rate", str(args.tool_rate),
+        "--tool", args.tool,
+        "--ramp", str(args.ramp),
+        "--seed", str(args.seed),
+        "--record-codec", args.record_codec,
+    ]
+    if args.record:
+        args.passthrough.append("--record")
+    if args.action_delay is not None:
+        args.passthrough += ["--action-delay", str(args.action_delay)]
+    run_levels(args)
+
+
+if __name__ == "__main__":
+    main()
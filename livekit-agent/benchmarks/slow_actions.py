@@ -0,0 +1,95 @@
+"""Tool turns behind a slow backend: dead air with and without action deadlines.
+
+Every caller turn makes the LLM stand-in call --tool, whose agent-action
+takes --delays seconds; each delay runs once without budgets (no filler,
+no deadline - how tools behaved before) and once with the configured
+ACTION_FILLER_AFTER / ACTION_DEADLINES. Per run, from replay.py with one
+session:
+
+- response: end of caller speech -> first agent audio, i.e. how long the
+  caller hears nothing (the filler counts as audio)
+- fillers / deferred: tool calls that got a filler / missed the deadline
+  and were finished during call finalization (deferred_failed: those that
+  failed even then, e.g. past the Supabase client timeout; outbox: failed
+  actions handed to the server-side outbox)
+- action p50: latency of the action itself
+
+    python benchmarks/slow_actions.py
+    python benchmarks/slow_actions.py --tool schedule_callback --delays 0.5,2,7 --output report.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPLAY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay.py")
+
+
+def replay(args, delay: float, budgets: bool) -> dict:
+    env = dict(os.environ)
+    if not budgets:
+        env.update(ACTION_FILLER_AFTER="0", ACTION_DEADLINES="", DEFAULT_ACTION_DEADLINE="3600")
+    with tempfile.NamedTemporaryFile(suffix=".json") as out:
+        cmd = [
+            sys.executable, REPLAY,
+            "--conversations", args.conversations,
+            "--concurrency", "1",
+            "--tool", args.tool,
+            "--tool-rate", "1",
+            "--action-delay", str(delay),
+            "--output", out.name,
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:], file=sys.stderr)
+            raise SystemExit("replay failed")
+        return json.load(open(out.name))["levels"][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", help="directory of <name>.wav + <name>.json pairs (default: generated)")
+    parser.add_argument("--tool", default="send_email")
+    parser.add_argument("--delays", default="0.3,3,8", help="comma-separated action latencies (s)")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    if not args.conversations:
+        args.conversations = tempfile.mkdtemp(prefix="bench-conversations-")
+        subprocess.run([sys.executable, REPLAY, "--generate", args.conversations], check=True, capture_output=True)
+
+    report = []
+    for delay in (float(d) for d in args.delays.split(",")):
+        for budgets in (False, True):
+            level = replay(args, delay, budgets)
+            actions = level["actions"]
+            latency = next(iter(actions["latency"].values()), {})
+            row = {
+                "delay": delay,
+                "budgets": budgets,
+                "response": level["response"],
+                "timeouts": level["timeouts"],
+                "tool_calls": latency.get("count", 0),
+                "fillers": actions["fillers"],
+                "deferred": actions["deferred"],
+                "deferred_failed": actions["deferred_failed"],
+                "outbox": actions["outbox"],
+                "action_p50_ms": latency.get("p50_ms", 0),
+            }
+            report.append(row)
+            print(
+                f"{args.tool} {delay:>4}s {'budgets' if budgets else 'none':>7} | response p50/p95 "
+                f"{row['response']['p50_ms']}/{row['response']['p95_ms']} ms | {row['tool_calls']} calls, "
+                f"{row['fillers']} fillers, {row['deferred']} deferred ({row['deferred_failed']} failed, {row['outbox']} to the outbox) | "
+                f"action p50 {row['action_p50_ms']} ms | timeouts {row['timeouts']}"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"tool": args.tool, "runs": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,578 @@
+"""Offline stand-ins for the providers and the Supabase backend.
+
+STT and TTS are in-process plugins with configurable delays; the LLM is a
+local OpenAI-compatible server so the real openai plugin (HTTP, SSE parsing,
+tool calls) stays on the measured path. The Supabase mock answers
+agent-actions and end-call like the edge functions do.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import numpy as np
+from aiohttp import web
+from livekit import rtc
+from livekit.agents import APIConnectOptions, stt, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN
+
+from transcript import decode_records
+
+TTS_SAMPLE_RATE = 24000
+# Roughly German speaking rate: ~14 characters per second
+TTS_SECONDS_PER_CHAR = 0.07
+SPEECH_RMS = 500
+
+
+def jittered(delay: float, jitter: float) -> float:
+    return max(0.0, random.gauss(delay, delay * jitter))
+
+
+class ScriptedSTT(stt.STT):
+    """Streaming STT that "recognizes" the scripted text of each utterance.
+
+    Speech is detected by frame energy; once an utterance has been silent
+    for `endpoint_silence`, the next scripted line is emitted as the final
+    transcript after `final_delay` (the provider's recognition latency).
+    """
+
+    def __init__(self, script: list[str], final_delay: float = 0.15, endpoint_silence: float = 0.1, jitter: float = 0.2):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=True, interim_results=False))
+        self.script = list(script)
+        self.final_delay = final_delay
+        self.endpoint_silence = endpoint_silence
+        self.jitter = jitter
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        raise NotImplementedError("ScriptedSTT only supports streaming")
+
+    def stream(self, *, language=NOT_GIVEN, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return ScriptedRecognizeStream(stt=self, conn_options=conn_options)
+
+
+class ScriptedRecognizeStream(stt.RecognizeStream):
+    async def _run(self) -> None:
+        owner: ScriptedSTT = self._stt
+        speaking = False
+        silence = 0.0
+        audio_seconds = 0.0
+        request_id = uuid.uuid4().hex[:12]
+
+        async for frame in self._input_ch:
+            if not isinstance(frame, rtc.AudioFrame):
+                continue
+            duration = frame.samples_per_channel / frame.sample_rate
+            audio_seconds += duration
+            samples = np.frombuffer(frame.data, dtype=np.int16)
+            voiced = samples.size and np.sqrt(np.mean(samples.astype(np.float32) ** 2)) > SPEECH_RMS
+
+            if voiced:
+                silence = 0.0
+                if not speaking:
+                    speaking = True
+                    self._event_ch.send_nowait(stt.SpeechEvent(type=stt.SpeechEventType.START_OF_SPEECH))
+            elif speaking:
+                silence += duration
+                if silence >= owner.endpoint_silence:
+                    speaking = False
+                    text = owner.script.pop(0) if owner.script else "Ja."
+                    await asyncio.sleep(jittered(owner.final_delay, owner.jitter))
+                    self._event_ch.send_nowait(stt.SpeechEvent(
+                        type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                        request_id=request_id,
+                        alternatives=[stt.SpeechData(language="de", text=text, confidence=0.95)],
+                    ))
+                    self._event_ch.send_nowait(stt.SpeechEvent(type=stt.SpeechEventType.END_OF_SPEECH))
+
+            if audio_seconds >= 5.0:
+                self._event_ch.send_nowait(stt.SpeechEvent(
+                    type=stt.SpeechEventType.RECOGNITION_USAGE,
+                    request_id=request_id,
+                    recognition_usage=stt.RecognitionUsage(audio_duration=audio_seconds),
+                ))
+                audio_seconds = 0.0
+
+
+class StandinTTS(tts.TTS):
+    """Non-streaming TTS returning a quiet tone after `ttfb`; AgentSession
+    wraps it in a sentence StreamAdapter like any chunked provider."""
+
+    def __init__(self, ttfb: float = 0.12, jitter: float = 0.2, realtime_factor: float = 4.0):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+        self.jitter = jitter
+        # How much faster than playback the "provider" delivers audio
+        self.realtime_factor = realtime_factor
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return StandinChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def update_options(self, **kwargs):
+        pass
+
+
+class StandinChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        owner: StandinTTS = self._tts
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex[:12],
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(jittered(owner.ttfb, owner.jitter))
+
+        total = max(0.2, len(self.input_text) * TTS_SECONDS_PER_CHAR)
+        chunk = 0.1
+        t = np.arange(int(TTS_SAMPLE_RATE * chunk)) / TTS_SAMPLE_RATE
+        tone = (np.sin(2 * np.pi * 220 * t) * 1000).astype(np.int16).tobytes()
+        sent = 0.0
+        while sent < total:
+            output_emitter.push(tone)
+            sent += chunk
+            await asyncio.sleep(chunk / owner.realtime_factor)
+        output_emitter.flush()
+
+
+REPLIES = [
+    "Verstehe, das klingt spannend.",
+    "Genau deshalb rufe ich an. Wir helfen Firmen wie Ihrer, bei Kaltakquise Zeit zu sparen.",
+    "Darf ich kurz fragen, wie Sie das heute machen?",
+    "Super, dann schicke ich Ihnen gerne ein paar Infos per E-Mail.",
+    "Alles klar, vielen Dank fuer Ihre Zeit!",
+]
+
+
+TOOL_ARGUMENTS = {
+    "add_note": {"note": "Interesse an Demo"},
+    "send_email": {"subject": "Unterlagen", "body": "Wie besprochen die Infos zu unserer Loesung."},
+    "send_meeting_link_email": {"date": "2026-10-20", "time": "10:00"},
+    "schedule_callback": {"date": "2026-10-20", "time": "14:00", "notes": "Nach dem Urlaub"},
+}
+
+
+class MockLLMServer:
+    """OpenAI-compatible /v1/chat/completions with streamed replies.
+
+    Time-to-first-token and token rate are configurable; `tool_rate` is the
+    share of user turns answered with a call of `tool` (see TOOL_ARGUMENTS) first.
+    """
+
+    def __init__(
+        self,
+        ttft: float = 0.35,
+        tokens_per_second: float = 60.0,
+        jitter: float = 0.25,
+        tool_rate: float = 0.2,
+        tool: str = "add_note",
+    ):
+        self.ttft = ttft
+        self.tool = tool
+        self.tokens_per_second = tokens_per_second
+        self.jitter = jitter
+        self.tool_rate = tool_rate
+        self.requests = 0
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._completions)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _chunk(self, model: str, delta: dict, finish_reason=None) -> bytes:
+        body = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body)}\n\n".encode()
+
+    async def _completions(self, request: web.Request) -> web.StreamResponse:
+        try:
+            return await self._stream_completion(request)
+        except ConnectionResetError:
+            # Client went away (cancelled turn or lost hedge race)
+            return web.Response(status=499)
+
+    async def _stream_completion(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        model = body.get("model", "bench")
+        messages = body.get("messages", [])
+        prompt_chars = sum(len(json.dumps(m.get("content", ""))) for m in messages)
+        last_role = messages[-1].get("role") if messages else "user"
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        await asyncio.sleep(jittered(self.ttft, self.jitter))
+
+        completion_tokens = 0
+        use_tool = last_role == "user" and body.get("tools") and random.random() < self.tool_rate
+        if use_tool:
+            args = json.dumps(TOOL_ARGUMENTS[self.tool])
+            await resp.write(self._chunk(model, {
+                "role": "assistant",
+                "tool_calls": [{
+                    "index": 0,
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {"name": self.tool, "arguments": args},
+                }],
+            }))
+            completion_tokens = 12
+            finish_reason = "tool_calls"
+        else:
+            words = random.choice(REPLIES).split(" ")
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else f" {word}"}
+                if i == 0:
+                    delta["role"] = "assistant"
+                await resp.write(self._chunk(model, delta))
+                await asyncio.sleep(1 / self.tokens_per_second)
+            completion_tokens = len(words)
+            finish_reason = "stop"
+
+        await resp.write(self._chunk(model, {}, finish_reason))
+        usage = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_chars // 4 + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        }
+        await resp.write(f"data: {json.dumps(usage)}\n\n".encode())
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+
+class MockSupabaseServer:
+    """agent-actions / end-call stand-in; records every payload it receives.
+
+    `campaigns` (id -> campaigns row) backs get_campaign_config, `knowledge`
+    (id -> {"items", "version"}) backs get_campaign_knowledge. Recordings
+    PUT to the signed upload URL end up in `uploads` (path -> bytes).
+    `action_delays` (action -> seconds) overrides `delay` for single actions.
+    Actions handed to defer_actions (the outbox) are kept in `deferred_actions`.
+    """
+
+    def __init__(self, delay: float = 0.05, campaigns: dict = None, knowledge: dict = None, action_delays: dict = None):
+        self.delay = delay
+        self.action_delays = action_delays or {}
+        self.campaigns = campaigns if campaigns is not None else {}
+        self.knowledge = knowledge if knowledge is not None else {}
+        self.calls: dict[str, int] = {}
+        self.finalized: list[dict] = []
+        # Decoded transcript records and request body bytes per function
+        self.records: list[dict] = []
+        self.received_bytes: dict[str, int] = {}
+        self.uploads: dict[str, bytes] = {}
+        self.saved_recordings: dict[str, str] = {}
+        self.deferred_actions: list[dict] = []
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/functions/v1/{function}", self._handle)
+        app.router.add_put("/storage/v1/object/upload/sign/call-recordings/{path:.+}", self._upload)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        function = request.match_info["function"]
+        body = await request.json()
+        key = function
+        if function == "agent-actions":
+            key = f"{function}:{body.get('action')}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+        await asyncio.sleep(jittered(self.action_delays.get(body.get("action"), self.delay), 0.3))
+
+        if function == "end-call":
+            self.received_bytes[function] = self.received_bytes.get(function, 0) + (request.content_length or 0)
+            records = decode_records(body["records"])[1] if body.get("records") else body.get("segments", [])
+            self.records.extend(records)
+            if body.get("finalize"):
+                self.finalized.append(body)
+                return web.json_response({"success": True, "summary": "Benchmark"})
+            return web.json_response({"success": True, "stored": len(records)})
+        if body.get("action") == "get_campaign_config":
+            campaign = self.campaigns.get(body.get("data", {}).get("campaign_id"))
+            if campaign is None:
+                return web.json_response({"success": False, "error": "Campaign not found"}, status=400)
+            return web.json_response({"success": True, "campaign": campaign})
+        if body.get("action") == "get_campaign_knowledge":
+            knowledge = self.knowledge.get(body.get("data", {}).get("campaign_id"), {"items": [], "version": ""})
+            return web.json_response({"success": True, **knowledge})
+        if body.get("action") == "create_recording_upload":
+            data = body.get("data", {})
+            path = f"bench-user/{data.get('call_log_id')}.{data.get('extension')}"
+            signed_url = f"{self.url}/storage/v1/object/upload/sign/call-recordings/{path}?token=bench"
+            return web.json_response({"success": True, "signed_url": signed_url, "path": path})
+        if body.get("action") == "save_recording":
+            data = body.get("data", {})
+            self.saved_recordings[data.get("call_log_id")] = data.get("path")
+            return web.json_response({"success": True})
+        if body.get("action") == "defer_actions":
+            self.deferred_actions.extend(body.get("data", {}).get("actions", []))
+            return web.json_response({"success": True})
+        if body.get("action") == "batch":
+            actions = body.get("data", {}).get("actions", [])
+            return web.json_response({"success": True, "results": [{"success": True} for _ in actions]})
+        return web.json_response({"success": True})
+
+    async def _upload(self, request: web.Request) -> web.Response:
+        self.calls["storage:upload"] = self.calls.get("storage:upload", 0) + 1
+        self.uploads[request.match_info["path"]] = await request.read()
+        return web.json_response({"Key": f"call-recordings/{request.match_info['path']}"})
+
+
+class MockLiveKitServer:
+    """Twirp stand-in for the LiveKit room, dispatch and SIP APIs.
+
+    Rooms live in memory; every agent dispatch (CreateRoom with `agents` or
+    CreateDispatch) is handed to `on_dispatch(room_name, metadata)`, which
+    plays the agent. CreateSIPParticipant rings for a while and then answers
+    or fails with a SIP status like a carrier would: `outcomes` are the
+    probabilities of answered/busy/no_answer/failed. Each trunk accepts at
+    most `trunk_capacity` simultaneous calls and rejects the rest with 503.
+    A SIP call occupies its trunk until its room is deleted.
+    """
+
+    def __init__(
+        self,
+        on_dispatch=None,
+        outcomes: dict = None,
+        ring_time: float = 0.3,
+        trunk_capacity: int = 10,
+        jitter: float = 0.3,
+        seed: int = 1,
+    ):
+        self.on_dispatch = on_dispatch
+        self.outcomes = outcomes or {"answered": 0.35, "busy": 0.15, "no_answer": 0.4, "failed": 0.1}
+        self.ring_time = ring_time
+        self.trunk_capacity = trunk_capacity
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.rooms: dict = {}
+        self.calls: dict[str, int] = {}
+        self.trunk_active: dict[str, set] = {}
+        self.trunk_peak: dict[str, int] = {}
+        self.trunk_rejected: dict[str, int] = {}
+        # (monotonic time, trunk, phone number) of every INVITE, (time, trunk) of every dispatch
+        self.invites: list[tuple[float, str, str]] = []
+        self.dispatches: list[tuple[float, str]] = []
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+        self._tasks: set = set()
+
+    async def start(self) -> str:
+        from livekit import api
+
+        self._routes = {
+            "RoomService/CreateRoom": (api.CreateRoomRequest, self._create_room),
+            "RoomService/ListRooms": (api.ListRoomsRequest, self._list_rooms),
+            "RoomService/DeleteRoom": (api.DeleteRoomRequest, self._delete_room),
+            "RoomService/UpdateRoomMetadata": (api.UpdateRoomMetadataRequest, self._update_metadata),
+            "AgentDispatchService/CreateDispatch": (api.CreateAgentDispatchRequest, self._create_dispatch),
+            "SIP/CreateSIPParticipant": (api.CreateSIPParticipantRequest, self._create_sip_participant),
+        }
+        app = web.Application()
+        app.router.add_post("/twirp/livekit.{service}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        route = f"{request.match_info['service']}/{request.match_info['method']}"
+        if route not in self._routes:
+            return web.json_response({"code": "bad_route", "msg": route}, status=404)
+        self.calls[route] = self.calls.get(route, 0) + 1
+        request_class, handler = self._routes[route]
+        result = await handler(request_class.FromString(await request.read()))
+        if isinstance(result, web.Response):
+            return result
+        return web.Response(body=result.SerializeToString(), content_type="application/protobuf")
+
+    def _dispatch(self, room: str, metadata: str):
+        metadata = json.loads(metadata) if metadata else {}
+        self.dispatches.append((time.monotonic(), metadata.get("sip_trunk_id", "")))
+        if self.on_dispatch is None:
+            return
+        task = asyncio.create_task(self.on_dispatch(room, metadata))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _create_room(self, req):
+        from livekit import api
+
+        room = self.rooms.get(req.name)
+        if room is None:
+            room = api.Room(sid=f"RM_{uuid.uuid4().hex[:12]}", name=req.name, metadata=req.metadata,
+                            creation_time=int(time.time()))
+            self.rooms[req.name] = room
+            for agent in req.agents:
+                self._dispatch(req.name, agent.metadata)
+        return room
+
+    async def _list_rooms(self, req):
+        from livekit import api
+
+        names = set(req.names)
+        return api.ListRoomsResponse(rooms=[r for name, r in self.rooms.items() if not names or name in names])
+
+    async def _delete_room(self, req):
+        from livekit import api
+
+        self.rooms.pop(req.room, None)
+        for active in self.trunk_active.values():
+            active.discard(req.room)
+        return api.DeleteRoomResponse()
+
+    async def _update_metadata(self, req):
+        room = self.rooms.get(req.room)
+        if room is None:
+            return web.json_response({"code": "not_found", "msg": "room not found"}, status=404)
+        room.metadata = req.metadata
+        return room
+
+    async def _create_dispatch(self, req):
+        from livekit import api
+
+        if req.room not in self.rooms:
+            await self._create_room(api.CreateRoomRequest(name=req.room))
+        self._dispatch(req.room, req.metadata)
+        return api.AgentDispatch(id=f"AD_{uuid.uuid4().hex[:12]}", agent_name=req.agent_name, room=req.room,
+                                 metadata=req.metadata)
+
+    def _sip_error(self, code: int, reason: str) -> web.Response:
+        body = {"code": "unavailable", "msg": f"INVITE failed: {code} {reason}",
+                "meta": {"sip_status_code": str(code), "sip_status": reason}}
+        return web.json_response(body, status=503 if code == 503 else 409)
+
+    async def _create_sip_participant(self, req):
+        from livekit import api
+
+        trunk = req.sip_trunk_id
+        self.invites.append((time.monotonic(), trunk, req.sip_call_to))
+        active = self.trunk_active.setdefault(trunk, set())
+        if len(active) >= self.trunk_capacity:
+            self.trunk_rejected[trunk] = self.trunk_rejected.get(trunk, 0) + 1
+            return self._sip_error(503, "Service Unavailable")
+        active.add(req.room_name)
+        self.trunk_peak[trunk] = max(self.trunk_peak.get(trunk, 0), len(active))
+
+        outcome = self.rng.choices(list(self.outcomes), weights=list(self.outcomes.values()))[0]
+        ring_timeout = req.ringing_timeout.ToTimedelta().total_seconds() if req.HasField("ringing_timeout") else 30.0
+        if outcome == "no_answer":
+            await asyncio.sleep(ring_timeout)
+        elif outcome == "answered":
+            await asyncio.sleep(min(ring_timeout, jittered(self.ring_time, self.jitter)))
+        else:
+            await asyncio.sleep(jittered(self.ring_time / 3, self.jitter))
+
+        if outcome == "answered" and req.room_name in self.rooms:
+            return api.SIPParticipantInfo(participant_id=f"PA_{uuid.uuid4().hex[:12]}",
+                                          participant_identity=req.participant_identity,
+                                          room_name=req.room_name)
+        active.discard(req.room_name)
+        if outcome == "busy":
+            return self._sip_error(486, "Busy Here")
+        if outcome == "no_answer":
+            return self._sip_error(480, "Temporarily Unavailable")
+        return self._sip_error(404, "Not Found")
+
+
+class MockWorkerEndpoint:
+    """The LiveKit server's /agent websocket, as far as worker registration goes.
+
+    Answers the worker's RegisterWorkerRequest with a worker id and records
+    when it arrived (time.monotonic) in `registered`; `on_register` is
+    called with that time. The connection is then kept open and everything
+    else the worker sends (status updates) is ignored.
+    """
+
+    def __init__(self, on_register=None):
+        self.on_register = on_register
+        self.registered: list[float] = []
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/agent", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        from livekit.protocol import agent
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != web.WSMsgType.BINARY:
+                continue
+            worker_msg = agent.WorkerMessage.FromString(msg.data)
+            if not worker_msg.HasField("register"):
+                continue
+            now = time.monotonic()
+            self.registered.append(now)
+            response = agent.ServerMessage()
+            response.register.worker_id = f"AW_{uuid.uuid4().hex[:12]}"
+            await ws.send_bytes(response.SerializeToString())
+            if self.on_register is not None:
+                self.on_register(now)
+        return ws
@@ -0,0 +1,156 @@
+"""Worker cold start: process spawn -> registered with LiveKit and ready for jobs.
+
+Starts `agent.py start` against MockWorkerEndpoint (LiveKit's /agent
+websocket) with dummy provider keys. The worker only registers once its
+idle job processes are warm (forkserver up, prewarm done), so the
+registration request is the moment it can take a job. Per mode and run:
+
+- import: spawn -> `import agent` done (a separate `python -c "import agent"`)
+- ready: spawn -> RegisterWorkerRequest at the endpoint
+
+Modes:
+
+- lazy: agent.py as it is - plugins are imported by the forkserver / prewarm
+- eager: every plugin of required_plugins() imported at interpreter start in
+  every process (sitecustomize on PYTHONPATH), like agent.py's former
+  module-level `from livekit.plugins import ...`
+
+With --budget-ms the script exits non-zero when the lazy ready p50 is over
+budget, so CI can hold the line against new module-level imports.
+
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --runs 5 --budget-ms 6000 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from livekit.agents.worker import ServerEnvOption  # noqa: E402
+
+import agent as agent_module  # noqa: E402
+from providers import plugin_module  # noqa: E402
+from standins import MockWorkerEndpoint  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+DUMMY_ENV = {
+    "LIVEKIT_API_KEY": "bench-key",
+    "LIVEKIT_API_SECRET": "bench-secret-bench-secret-bench-secret",
+    "DEEPGRAM_API_KEY": "bench",
+    "CARTESIA_API_KEY": "bench",
+    "OPENAI_API_KEY": "bench",
+}
+
+
+def mode_env(mode: str, site_dir: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in ("METRICS_PORT", "PYTHONPATH")}
+    env.update(DUMMY_ENV)
+    if mode == "eager":
+        env["PYTHONPATH"] = site_dir
+    return env
+
+
+def import_run(env: dict) -> float:
+    started = time.monotonic()
+    proc = subprocess.run(
+        [sys.executable, "-c", "import agent, time; print(time.monotonic())"],
+        cwd=AGENT_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        raise SystemExit("import agent failed")
+    return float(proc.stdout.split()[-1]) - started
+
+
+async def ready_run(env: dict, timeout: float) -> float:
+    registered = asyncio.get_running_loop().create_future()
+    endpoint = MockWorkerEndpoint(on_register=lambda t: registered.done() or registered.set_result(t))
+    url = await endpoint.start()
+    with tempfile.TemporaryFile() as log:
+        started = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "agent.py", "start", "--url", url,
+            cwd=AGENT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+        exited = asyncio.ensure_future(proc.wait())
+        try:
+            await asyncio.wait({registered, exited}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not registered.done():
+                log.seek(0)
+                print(log.read()[-3000:].decode(errors="replace"), file=sys.stderr)
+                raise SystemExit("worker did not register" + (" (exited)" if exited.done() else ""))
+            return registered.result() - started
+        finally:
+            # The worker takes its forkserver and job processes down with it
+            if not exited.done():
+                proc.send_signal(signal.SIGTERM)
+                try:
+                    await asyncio.wait_for(asyncio.shield(exited), 20)
+                except asyncio.TimeoutError:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    await exited
+            await endpoint.stop()
+
+
+def stats(values: list[float]) -> dict:
+    values = sorted(values)
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000),
+        "max_ms": round(values[-1] * 1000),
+        "runs_ms": [round(v * 1000) for v in values],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="runs per mode (modes alternate)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="max seconds until registration")
+    parser.add_argument("--budget-ms", type=float, help="fail when the lazy ready p50 is above this")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    plugins = agent_module.required_plugins()
+    idle_processes = ServerEnvOption.getvalue(agent_module.server._num_idle_processes, False)
+    site_dir = tempfile.mkdtemp(prefix="bench-eager-")
+    with open(os.path.join(site_dir, "sitecustomize.py"), "w") as f:
+        f.writelines(f"import {plugin_module(name)}\n" for name in plugins)
+
+    # Untimed: fills the page cache and writes .pyc files
+    import_run(mode_env("lazy", site_dir))
+    results = {mode: {"import": [], "ready": []} for mode in ("eager", "lazy")}
+    for _ in range(args.runs):
+        for mode, times in results.items():
+            env = mode_env(mode, site_dir)
+            times["import"].append(import_run(env))
+            times["ready"].append(asyncio.run(ready_run(env, args.timeout)))
+
+    report = {"plugins": plugins, "idle_processes": idle_processes, "budget_ms": args.budget_ms}
+    for mode, times in results.items():
+        report[mode] = {kind: stats(values) for kind, values in times.items()}
+        print(
+            f"{mode:>5} | import p50/max {report[mode]['import']['p50_ms']}/{report[mode]['import']['max_ms']} ms | "
+            f"spawn -> ready p50/max {report[mode]['ready']['p50_ms']}/{report[mode]['ready']['max_ms']} ms "
+            f"({idle_processes} idle process(es))"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.budget_ms is not None:
+        p50 = report["lazy"]["ready"]["p50_ms"]
+        verdict = "ok" if p50 <= args.budget_ms else "OVER BUDGET"
+        print(f"lazy ready p50 {p50} ms vs budget {args.budget_ms:.0f} ms: {verdict}")
+        if p50 > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
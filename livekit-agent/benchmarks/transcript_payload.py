@@ -0,0 +1,202 @@
+"""Transcript upload size and memory: segment dicts vs. compressed records.
+
+Simulates a call of --minutes (one caller turn every --turn-seconds, tool
+calls in --tool-rate of the turns, --interrupt-rate of the replies cut off)
+and compares, for the same utterances:
+
+- payload: end-call request bytes in batches of --batch-size (as streamed
+  during the call) and as one request (the tail after a backend outage);
+  legacy is the former JSON segment list, records is encode_records
+- memory: bytes held per buffered utterance (dict vs. TranscriptRecord)
+- encode: time to build one batch payload
+- live: the call streamed through TranscriptStream to the Supabase
+  stand-in, which decodes every batch like end-call; checks that all
+  records, turn indexes, interruptions and tool calls arrive
+
+    python benchmarks/transcript_payload.py
+    python benchmarks/transcript_payload.py --minutes 30 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_growth import AGENT_LINES, CALLER_LINES, TOOLS  # noqa: E402
+from standins import MockSupabaseServer  # noqa: E402
+from supabase_client import SupabaseClient  # noqa: E402
+from transcript import TranscriptRecord, TranscriptStream, encode_records, tool_invocation  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+SPEAKERS = {"agent": "Lisa", "user": "Markus Weber"}
+
+
+def simulate(args) -> list[tuple]:
+    """(role, text, start, end, interrupted, tools) per utterance, greeting first."""
+    rng = random.Random(args.seed)
+    t = time.time()
+    utterances = [("agent", "Hi, hier ist Lisa von Acme, haben Sie kurz zwei Minuten?", t, t + 3.1, False, [])]
+    for _ in range(int(args.minutes * 60 / args.turn_seconds)):
+        t += args.turn_seconds
+        caller = rng.choice(CALLER_LINES)
+        utterances.append(("user", caller, t, t + len(caller) * 0.06, False, []))
+        tools = []
+        if rng.random() < args.tool_rate:
+            name, arguments, output = rng.choice(TOOLS)
+            tools.append((name, json.dumps(arguments), output))
+        reply = rng.choice(AGENT_LINES)
+        reply_start = t + len(caller) * 0.06 + 0.9
+        utterances.append(("agent", reply, reply_start, reply_start + len(reply) * 0.07, rng.random() < args.interrupt_rate, tools))
+    return utterances
+
+
+def legacy_segments(utterances) -> list[dict]:
+    return [
+        {"seq": i, "role": role, "speaker": SPEAKERS[role], "text": text, "start": start, "end": end}
+        for i, (role, text, start, end, _, _) in enumerate(utterances)
+    ]
+
+
+def record_list(utterances) -> list[TranscriptRecord]:
+    stream = TranscriptStream(None, "", max_buffered=len(utterances) + 1)
+    for role, text, start, end, interrupted, tools in utterances:
+        if tools:
+            stream.add_tools([tool_invocation(*tool) for tool in tools])
+        stream.add(role, SPEAKERS[role], text, start, end, interrupted)
+    return stream._buffer
+
+
+def batches(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def request_bytes(payload: dict) -> int:
+    # What aiohttp's json= sends
+    return len(json.dumps(payload).encode())
+
+
+def measure_payload(args, utterances) -> dict:
+    call_log_id = str(uuid.uuid4())
+    segments = legacy_segments(utterances)
+    records = record_list(utterances)
+    t0 = records[0].start
+
+    def legacy(batch):
+        return request_bytes({"call_log_id": call_log_id, "segments": batch})
+
+    def compact(batch):
+        return request_bytes({"call_log_id": call_log_id, "records": encode_records(batch, t0, SPEAKERS)})
+
+    timings = []
+    for batch in batches(records, args.batch_size):
+        started = time.perf_counter()
+        encode_records(batch, t0, SPEAKERS)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "utterances": len(records),
+        "batched_bytes": {
+            "legacy": sum(legacy(b) for b in batches(segments, args.batch_size)),
+            "records": sum(compact(b) for b in batches(records, args.batch_size)),
+        },
+        "single_request_bytes": {"legacy": legacy(segments), "records": compact(records)},
+        "encode_us_p50": round(percentile(timings, 50) * 1e6, 1),
+        "encode_us_p99": round(percentile(timings, 99) * 1e6, 1),
+    }
+
+
+def measure_memory(utterances) -> dict:
+    def held(build) -> float:
+        tracemalloc.start()
+        items = build(utterances)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del items
+        return size / len(utterances)
+
+    return {"legacy_bytes_per_utterance": round(held(legacy_segments)), "records_bytes_per_utterance": round(held(record_list))}
+
+
+async def measure_live(args, utterances) -> dict:
+    server = MockSupabaseServer(delay=args.backend_delay)
+    client = SupabaseClient(await server.start(), "bench")
+    stream = TranscriptStream(client, str(uuid.uuid4()), flush_interval=0.05, batch_size=args.batch_size)
+    try:
+        for role, text, start, end, interrupted, tools in utterances:
+            if tools:
+                stream.add_tools([tool_invocation(*tool) for tool in tools])
+            stream.add(role, SPEAKERS[role], text, start, end, interrupted)
+            await asyncio.sleep(args.gap)
+        result = await stream.finalize()
+    finally:
+        await client.close()
+        await server.stop()
+
+    received = sorted(server.records, key=lambda r: r["i"])
+    expected_tools = sum(len(u[5]) for u in utterances)
+    return {
+        "ok": bool(result.get("success")),
+        "records": len(received),
+        "complete": [r["i"] for r in received] == list(range(len(utterances))),
+        "turns": received[-1]["n"] if received else 0,
+        "interrupted": sum(1 for r in received if r.get("int")),
+        "tool_calls": sum(len(r.get("tools", [])) for r in received),
+        "tool_calls_expected": expected_tools,
+        "requests": server.calls.get("end-call", 0),
+        "bytes": server.received_bytes.get("end-call", 0),
+    }
+
+
+async def run(args) -> dict:
+    utterances = simulate(args)
+    return {
+        "minutes": args.minutes,
+        "payload": measure_payload(args, utterances),
+        "memory": measure_memory(utterances),
+        "live": await measure_live(args, utterances),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=15)
+    parser.add_argument("--turn-seconds", type=float, default=10)
+    parser.add_argument("--tool-rate", type=float, default=0.15)
+    parser.add_argument("--interrupt-rate", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=8, help="TranscriptStream batch_size")
+    parser.add_argument("--gap", type=float, default=0.002, help="real seconds between utterances in the live run")
+    parser.add_argument("--backend-delay", type=float, default=0.02, help="Supabase stand-in latency (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    p, m, live = report["payload"], report["memory"], report["live"]
+    b, one = p["batched_bytes"], p["single_request_bytes"]
+    print(f"{args.minutes} min call, {p['utterances']} utterances")
+    print(
+        f"payload bytes: batches of {args.batch_size} legacy {b['legacy']} | records {b['records']} "
+        f"({b['records'] / b['legacy']:.0%}); one request legacy {one['legacy']} | records {one['records']} "
+        f"({one['records'] / one['legacy']:.0%})"
+    )
+    print(f"memory per buffered utterance: legacy {m['legacy_bytes_per_utterance']} B | records {m['records_bytes_per_utterance']} B")
+    print(f"encode per batch us p50/p99: {p['encode_us_p50']}/{p['encode_us_p99']}")
+    print(
+        f"live: ok={live['ok']} {live['records']} records complete={live['complete']} turns {live['turns']}, "
+        f"interrupted {live['interrupted']}, tool calls {live['tool_calls']}/{live['tool_calls_expected']}, "
+        f"{live['requests']} requests, {live['bytes']} bytes"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
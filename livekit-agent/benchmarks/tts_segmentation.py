@@ -0,0 +1,217 @@
+"""Text segmentation benchmark: LLM token stream -> chunks sent to TTS.
+
+Replays LLM token streams (delta text + arrival time) through the sentence
+tokenizer Cartesia uses by default and through the agent's German
+tokenizer with tag filtering, on a virtual clock. Reported per tokenizer:
+time from the first LLM token to the first chunk handed to TTS (the part
+of time-to-first-audio segmentation controls), chunk count and size,
+inline tags that would be spoken literally, and tokenizer CPU per delta.
+
+    python benchmarks/tts_segmentation.py
+    python benchmarks/tts_segmentation.py --streams streams.jsonl --output report.json
+
+Recorded streams are JSONL, one reply per line: {"deltas": [[seconds, "text"], ...]}.
+--record captures such streams from the configured LLM (needs its API key):
+
+    python benchmarks/tts_segmentation.py --record streams.jsonl --provider openai
+
+Without --streams, built-in replies in the style the prompt asks for are
+cut into LLM-sized tokens and timed at --tokens-per-second.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.agents import tokenize  # noqa: E402
+
+from speech_text import GermanSentenceTokenizer, SpeechTagFilter  # noqa: E402
+from turn_metrics import percentile  # noqa: E402
+
+REPLIES = [
+    "Ah, verstehe ich total, also ehrlich gesagt hoeren wir das oefter. Darf ich kurz fragen, wie Sie das heute machen?",
+    "Hmm, ja. [pause: 0.3s] Also wir helfen z.B. Firmen mit ca. 30 Mitarbeitern, die viel am Telefon sind, bei der Kaltakquise Zeit zu sparen.",
+    "[laugh] Ja klar, das kenn ich. Naja, genau deshalb rufe ich an, weil viele Teams da echt Stunden verlieren.",
+    "Oh! [pause: 0.5s] Das ist ja spannend, wie viele Anrufe machen Sie denn so pro Woche, grob geschaetzt?",
+    "Also max punkt mustermann at gmail punkt com, richtig? [pause: 0.3s] Ich schreib mir das grad auf.",
+    "Super, dann schicke ich Ihnen gerne ein paar Infos per E-Mail, und wir telefonieren am 3. Oktober nochmal kurz, passt das?",
+    "[sigh] Hmm, verstehe. Ist voellig okay, wenn es gerade nicht passt, darf ich mich in zwei, drei Wochen nochmal melden?",
+    "Genau, das laeuft bei uns komplett automatisch – Sie muessen eigentlich nur die Kontakte hochladen, den Rest machen wir.",
+    "Ach so, ja, also das kostet bei uns ab ca. 200 Euro im Monat, je nachdem wie viele Minuten Sie brauchen.",
+    "Ja. Nein, also da muss ich kurz nachfragen, aber ich melde mich dazu bis Freitag bei Ihnen, versprochen!",
+    "[chuckle] Na das hoer ich gern! Dann trage ich Sie fuer die Demo am Dienstag um 10 Uhr ein, okay?",
+    "Alles klar, vielen Dank fuer Ihre Zeit, Herr Dr. Weber, und einen schoenen Tag noch!",
+]
+
+# Rough shape of LLM deltas: a leading space plus up to six characters
+_TOKEN_RE = re.compile(r"\s*[^\s]{1,6}")
+# The prompt's tags; Cartesia's own [laughter] is not counted
+_TAG_RE = re.compile(r"\[(?:laugh|chuckle|gasp|sigh|pause)(?::[^\]]*)?\]")
+
+
+def synthetic_streams(tokens_per_second: float, seed: int) -> list[list[tuple[float, str]]]:
+    rng = random.Random(seed)
+    streams = []
+    for reply in REPLIES:
+        t = 0.0
+        deltas = []
+        for token in _TOKEN_RE.findall(reply):
+            deltas.append((t, token))
+            t += max(0.002, rng.gauss(1 / tokens_per_second, 0.3 / tokens_per_second))
+        streams.append(deltas)
+    return streams
+
+
+def load_streams(path: str) -> list[list[tuple[float, str]]]:
+    with open(path) as f:
+        return [[(float(t), text) for t, text in json.loads(line)["deltas"]] for line in f if line.strip()]
+
+
+async def record_streams(path: str, provider: str):
+    import agent as agent_module
+    from livekit.agents import llm
+    from prompts import build_instructions
+
+    instructions, _ = build_instructions(
+        "Lisa", "Acme GmbH", "freundlich und locker", None, "Max Mustermann", "Mustermann GmbH",
+        None, "KI-Telefonassistent fuer Vertriebsteams", "Demo-Termin vereinbaren", None,
+    )
+    model = agent_module.build_llm(provider, "segmentation-bench")
+    user_turns = [
+        "Ja, hallo?", "Worum geht's denn?", "Hm, wir haben eigentlich schon einen Anbieter.",
+        "Was kostet das denn?", "Schicken Sie mir mal was per Mail.", "M A X Punkt Mustermann at G Mail Punkt com.",
+    ]
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="system", content=instructions)
+    with open(path, "w") as f:
+        for text in user_turns:
+            chat_ctx.add_message(role="user", content=text)
+            deltas, reply, t0 = [], "", None
+            async with model.chat(chat_ctx=chat_ctx) as stream:
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        now = time.perf_counter()
+                        t0 = t0 if t0 is not None else now
+                        deltas.append([round(now - t0, 4), chunk.delta.content])
+                        reply += chunk.delta.content
+            chat_ctx.add_message(role="assistant", content=reply)
+            f.write(json.dumps({"deltas": deltas}, ensure_ascii=False) + "\n")
+            print(f"recorded {len(deltas)} deltas: {reply[:60]}...")
+    await model.aclose()
+
+
+async def replay(tokenizer, deltas: list[tuple[float, str]], filter_tags: bool) -> dict:
+    """Feed one stream on a virtual clock; returns chunk timings and cost."""
+    stream = tokenizer.stream()
+    tag_filter = SpeechTagFilter() if filter_tags else None
+    clock = [0.0]
+    chunks: list[tuple[float, str]] = []
+
+    async def consume():
+        async for ev in stream:
+            chunks.append((clock[0], ev.token))
+
+    consumer = asyncio.create_task(consume())
+    cpu = 0.0
+    for t, text in deltas:
+        clock[0] = t
+        started = time.perf_counter()
+        if tag_filter is not None:
+            text = tag_filter.push(text)
+        if text:
+            stream.push_text(text)
+        cpu += time.perf_counter() - started
+        # Let the consumer pick up whatever this delta released
+        await asyncio.sleep(0)
+    clock[0] = deltas[-1][0] if deltas else 0.0
+    if tag_filter is not None and (rest := tag_filter.flush()):
+        stream.push_text(rest)
+    stream.end_input()
+    await consumer
+
+    return {
+        "first_chunk": chunks[0][0] - deltas[0][0] if chunks else 0.0,
+        "chunks": [text for _, text in chunks],
+        "spoken_tags": sum(len(_TAG_RE.findall(text)) for _, text in chunks),
+        "cpu_per_delta": cpu / max(1, len(deltas)),
+    }
+
+
+def summarize(results: list[dict], tts_ttfb: float) -> dict:
+    first = sorted(r["first_chunk"] for r in results)
+    lengths = [len(c) for r in results for c in r["chunks"]]
+    return {
+        "first_chunk_p50_ms": round(percentile(first, 50) * 1000),
+        "first_chunk_p95_ms": round(percentile(first, 95) * 1000),
+        "first_audio_p50_ms": round((percentile(first, 50) + tts_ttfb) * 1000),
+        "chunks_per_reply": round(sum(len(r["chunks"]) for r in results) / max(1, len(results)), 1),
+        "mean_chunk_chars": round(sum(lengths) / max(1, len(lengths)), 1),
+        "spoken_tags": sum(r["spoken_tags"] for r in results),
+        "cpu_us_per_delta": round(sum(r["cpu_per_delta"] for r in results) / max(1, len(results)) * 1e6, 1),
+    }
+
+
+def default_tokenizer():
+    # What cartesia.TTS uses when no tokenizer is passed
+    try:
+        return "blingfire", tokenize.blingfire.SentenceTokenizer()
+    except AttributeError:
+        return "basic", tokenize.basic.SentenceTokenizer()
+
+
+async def run(args) -> dict:
+    streams = load_streams(args.streams) if args.streams else synthetic_streams(args.tokens_per_second, args.seed)
+    name, baseline = default_tokenizer()
+    candidates = [
+        (f"default ({name})", baseline, False),
+        ("german + tags", GermanSentenceTokenizer(min_clause_len=args.min_clause_len), True),
+    ]
+    report = {"streams": len(streams), "tts_ttfb_ms": round(args.tts_ttfb * 1000), "tokenizers": {}}
+    for label, tokenizer, filter_tags in candidates:
+        results = [await replay(tokenizer, deltas, filter_tags) for deltas in streams if deltas]
+        report["tokenizers"][label] = summarize(results, args.tts_ttfb)
+        if args.verbose:
+            for r in results:
+                print(f"  [{label}] " + " | ".join(r["chunks"]))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", help="JSONL file of recorded LLM token streams")
+    parser.add_argument("--record", metavar="FILE", help="record token streams from the configured LLM and exit")
+    parser.add_argument("--provider", default="openai", help="LLM provider for --record")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="delta rate of the built-in streams")
+    parser.add_argument("--tts-ttfb", type=float, default=0.12, help="TTS time to first byte added for first audio (s)")
+    parser.add_argument("--min-clause-len", type=int, default=20)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="print the chunks of every reply")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_streams(args.record, args.provider))
+        return
+
+    report = asyncio.run(run(args))
+    print(f"{report['streams']} replies, TTS TTFB {report['tts_ttfb_ms']}ms")
+    print(f"{'tokenizer':<20} {'1st chunk p50':>13} {'p95':>6} {'1st audio':>9} {'chunks':>7} {'chars':>6} {'tags':>5} {'us/delta':>9}")
+    for label, s in report["tokenizers"].items():
+        print(
+            f"{label:<20} {s['first_chunk_p50_ms']:>11}ms {s['first_chunk_p95_ms']:>4}ms {s['first_audio_p50_ms']:>7}ms "
+            f"{s['chunks_per_reply']:>7} {s['mean_chunk_chars']:>6} {s['spoken_tags']:>5} {s['cpu_us_per_delta']:>9}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
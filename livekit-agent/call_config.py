@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from prompts import build_lead_section, compile_campaign_prompt
+
+logger = logging.getLogger("ColdCallAgent")
+
+# Campaign fields that older dispatches still send inline
+INLINE_CAMPAIGN_FIELDS = ("ai_prompt", "product_description", "call_goal", "campaign_name")
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+@dataclass(frozen=True)
+class CampaignConfig:
+    """Validated campaign settings with the compiled campaign prompt."""
+
+    campaign_id: str
+    version: str
+    name: str
+    product_description: str
+    call_goal: str
+    ai_name: str
+    ai_greeting: str
+    ai_personality: str
+    company_name: str
+    custom_prompt: str
+    voice_id: str
+    llm_provider: str
+    prompt: str
+    prompt_key: str
+    knowledge_version: str = ""
+
+    @classmethod
+    def from_row(cls, row: dict, voices: dict, default_voice: str, llm_providers, default_llm: str) -> "CampaignConfig":
+        """Builds the config from a campaigns row (or inline job metadata).
+
+        `ai_prompt` holds the wizard settings as JSON or a plain custom
+        prompt; unknown voices and LLM providers fall back to the defaults.
+        """
+        settings = {}
+        custom_prompt = ""
+        ai_prompt = _text(row.get("ai_prompt"))
+        if ai_prompt:
+            try:
+                parsed = json.loads(ai_prompt)
+                if isinstance(parsed, dict):
+                    settings = parsed
+            except json.JSONDecodeError:
+                custom_prompt = ai_prompt
+        if settings:
+            custom_prompt = _text(settings.get("customPrompt"))
+
+        voice_setting = _text(settings.get("aiVoice")).lower()
+        llm_setting = _text(settings.get("llmProvider")).lower()
+        if voice_setting and voice_setting not in voices:
+            logger.warning(f"Unbekannte Stimme {voice_setting!r} in Kampagne {row.get('id')}, nutze Standard")
+        if llm_setting and llm_setting not in llm_providers:
+            logger.warning(f"Unbekannter LLM-Provider {llm_setting!r} in Kampagne {row.get('id')}, nutze Standard")
+
+        ai_name = _text(settings.get("aiName"))
+        ai_greeting = _text(settings.get("aiGreeting"))
+        ai_personality = _text(settings.get("aiPersonality"))
+        company_name = _text(settings.get("companyName"))
+        product_description = _text(row.get("product_description"))
+        call_goal = _text(row.get("call_goal"))
+        prompt, prompt_key = compile_campaign_prompt(
+            ai_name, company_name, ai_personality, ai_greeting,
+            product_description, call_goal, custom_prompt,
+        )
+        return cls(
+            campaign_id=_text(row.get("id")),
+            version=_text(row.get("updated_at")),
+            name=_text(row.get("name") or row.get("campaign_name")),
+            product_description=product_description,
+            call_goal=call_goal,
+            ai_name=ai_name,
+            ai_greeting=ai_greeting,
+            ai_personality=ai_personality,
+            company_name=company_name,
+            custom_prompt=custom_prompt,
+            voice_id=voices.get(voice_setting, default_voice),
+            llm_provider=llm_setting if llm_setting in llm_providers else default_llm,
+            prompt=prompt,
+            prompt_key=prompt_key,
+            knowledge_version=_text(row.get("knowledge_version")),
+        )
+
+
+@dataclass(frozen=True)
+class CallConfig:
+    """Per-call fields from the job metadata.
+
+    Dispatches carry IDs plus the lead fields; the campaign itself comes
+    from the CampaignConfigCache. `inline_campaign` keeps the campaign
+    fields of dispatches that still send them (ad-hoc calls, old clients).
+    """
+
+    phone_number: str = ""
+    lead_id: str = ""
+    call_log_id: str = ""
+    campaign_id: str = ""
+    campaign_version: str = ""
+    lead_name: str = ""
+    lead_company: str = ""
+    lead_email: str = ""
+    lead_phone: str = ""
+    lead_notes: str = ""
+    sip_trunk_id: str = ""
+    ring_timeout: float | None = None
+    inline_campaign: dict = field(default_factory=dict)
+
+    @property
+    def is_outbound(self) -> bool:
+        return bool(self.phone_number)
+
+    @classmethod
+    def from_metadata(cls, raw: str) -> "CallConfig":
+        """Parses job (or room) metadata; raises ValueError if it is not a JSON object."""
+        if not raw:
+            return cls()
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError(f"metadata is {type(data).__name__}, not an object")
+        ring_timeout = data.get("ring_timeout")
+        phone_number = _text(data.get("phone_number"))
+        return cls(
+            phone_number=phone_number,
+            lead_id=_text(data.get("lead_id")),
+            call_log_id=_text(data.get("call_log_id")),
+            campaign_id=_text(data.get("campaign_id")),
+            campaign_version=_text(data.get("campaign_version")),
+            lead_name=_text(data.get("lead_name")),
+            lead_company=_text(data.get("lead_company")),
+            lead_email=_text(data.get("lead_email")),
+            lead_phone=_text(data.get("lead_phone")) or phone_number,
+            lead_notes=_text(data.get("lead_notes")),
+            sip_trunk_id=_text(data.get("sip_trunk_id")),
+            ring_timeout=float(ring_timeout) if ring_timeout else None,
+            inline_campaign={k: data[k] for k in INLINE_CAMPAIGN_FIELDS if data.get(k)},
+        )
+
+    def instructions(self, campaign: CampaignConfig) -> str:
+        return campaign.prompt + build_lead_section(self.lead_name, self.lead_company, self.lead_notes)
+
+
+class CampaignConfigCache:
+    """Campaign settings per worker process, fetched once and shared by its calls.
+
+    Entries are keyed by campaign id and expire after `ttl` seconds; at most
+    `max_entries` campaigns are kept (least recently used are dropped). A
+    dispatch carrying a different `campaign_version` (the campaign's
+    updated_at) than the cached entry forces a refetch, so edits apply to
+    the next call. Concurrent calls of the same campaign share one fetch,
+    bounded by `fetch_timeout` since the call waits for it; if it fails, a
+    stale entry is used, then the campaign fields of dispatches that still
+    send them. Without either, get() raises RuntimeError - a lead must not
+    be called with the default persona and an empty campaign prompt.
+    """
+
+    def __init__(
+        self,
+        fetch,
+        voices: dict,
+        default_voice: str,
+        llm_providers,
+        default_llm: str,
+        ttl: float = 300.0,
+        max_entries: int = 64,
+        fetch_timeout: float = 3.0,
+    ) -> None:
+        self.fetch = fetch
+        self.voices = voices
+        self.default_voice = default_voice
+        self.llm_providers = set(llm_providers)
+        self.default_llm = default_llm
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fetch_timeout = fetch_timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._entries: OrderedDict[str, tuple[float, CampaignConfig]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+
+    def parse(self, row: dict) -> CampaignConfig:
+        return CampaignConfig.from_row(row, self.voices, self.default_voice, self.llm_providers, self.default_llm)
+
+    def invalidate(self, campaign_id: str = None):
+        if campaign_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(campaign_id, None)
+
+    def _lookup(self, campaign_id: str, version: str) -> CampaignConfig | None:
+        entry = self._entries.get(campaign_id)
+        if entry is None:
+            return None
+        stored_at, config = entry
+        if time.monotonic() - stored_at > self.ttl or (version and version != config.version):
+            return None
+        self._entries.move_to_end(campaign_id)
+        return config
+
+    def _store(self, config: CampaignConfig):
+        self._entries[config.campaign_id] = (time.monotonic(), config)
+        self._entries.move_to_end(config.campaign_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, call: CallConfig) -> CampaignConfig:
+        if not call.campaign_id:
+            # Ad-hoc call without a campaign: settings come with the dispatch
+            return self.parse(call.inline_campaign)
+        if (config := self._lookup(call.campaign_id, call.campaign_version)) is not None:
+            self.hits += 1
+            return config
+        self.misses += 1
+        pending = self._pending.get(call.campaign_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(call.campaign_id))
+            self._pending[call.campaign_id] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(call.campaign_id, None))
+        config = await asyncio.shield(pending)
+        if config is not None:
+            return config
+
+        # Fetch failed: stale entry, then the campaign fields the dispatch carried (old clients)
+        if (entry := self._entries.get(call.campaign_id)) is not None:
+            logger.warning(f"Kampagne {call.campaign_id}: nutze veraltete Einstellungen")
+            return entry[1]
+        if call.inline_campaign.get("ai_prompt"):
+            logger.warning(f"Kampagne {call.campaign_id}: keine Einstellungen verfuegbar, nutze Metadaten")
+            return self.parse({"id": call.campaign_id, **call.inline_campaign})
+        raise RuntimeError(f"Kampagne {call.campaign_id}: keine Einstellungen verfuegbar")
+
+    async def _fetch(self, campaign_id: str) -> CampaignConfig | None:
+        try:
+            row = await asyncio.wait_for(self.fetch(campaign_id), self.fetch_timeout)
+        except Exception as e:
+            row = None
+            logger.warning(f"Kampagne {campaign_id} konnte nicht geladen werden: {e!r}")
+        if not row:
+            self.errors += 1
+            return None
+        config = self.parse(row)
+        self._store(config)
+        return config
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "errors": self.errors}
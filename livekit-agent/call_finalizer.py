@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("ColdCallAgent")
+
+# Finalizations still running in this process, drained on job/worker shutdown
+_pending: set[asyncio.Task] = set()
+
+
+class CallFinalizer:
+    """Single-flight end-of-call pipeline.
+
+    end_call, participant_disconnected and job shutdown all trigger it; the
+    first trigger starts the pipeline, every later one just awaits the same
+    task, so transcript upload and summary generation happen once per call.
+    """
+
+    def __init__(self, finalize_fnc: Callable[[str], Awaitable[None]]) -> None:
+        self._finalize_fnc = finalize_fnc
+        self._task: asyncio.Task | None = None
+        self.reason: str | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    @property
+    def done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def trigger(self, reason: str) -> asyncio.Task:
+        if self._task is None:
+            self.reason = reason
+            logger.info(f"Finalizing call ({reason})")
+            self._task = asyncio.create_task(self._run(reason))
+            _pending.add(self._task)
+            self._task.add_done_callback(_pending.discard)
+        elif reason != self.reason:
+            logger.debug(f"Finalization already started by {self.reason}, ignoring {reason}")
+        return self._task
+
+    async def _run(self, reason: str):
+        try:
+            await self._finalize_fnc(reason)
+        except Exception as e:
+            logger.error(f"Call finalization failed: {e}")
+
+    async def run(self, reason: str):
+        # Shielded: cancelling the caller (e.g. the tool call) must not abort the upload
+        await asyncio.shield(self.trigger(reason))
+
+
+async def drain_finalizers(timeout: float):
+    if not _pending:
+        return
+    logger.info(f"Waiting for {len(_pending)} call finalization(s)")
+    _, still_running = await asyncio.wait(set(_pending), timeout=timeout)
+    if still_running:
+        logger.error(f"{len(still_running)} call finalization(s) did not finish within {timeout}s")
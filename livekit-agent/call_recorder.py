@@ -0,0 +1,489 @@
+import asyncio
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+
+import av
+import numpy as np
+from livekit import rtc
+from livekit.agents.voice import io
+
+from supabase_client import SupabaseClient
+
+logger = logging.getLogger("ColdCallAgent")
+
+CALLER, AGENT = 0, 1
+# Audio is only written once it can no longer change (late caller frames, resampler tail)
+SETTLE_SECONDS = 0.5
+# Caller frames closer than this to where their run ends continue the run
+RESYNC_TOLERANCE = 0.1
+# codec -> (container format, file extension)
+CODECS = {"opus": ("ogg", "ogg"), "flac": ("flac", "flac")}
+# Plenty for two speech channels at 16 kHz
+OPUS_BITRATE = 32000
+# Recordings that still fail to upload after this long move to <spool dir>/failed
+UPLOAD_MAX_AGE = 24 * 3600.0
+DEAD_LETTER_DIR = "failed"
+
+
+class _Channel:
+    """One side of the call as runs of mono int16 samples on the recording timeline."""
+
+    def __init__(self, sample_rate: int, t0: float) -> None:
+        self.sample_rate = sample_rate
+        self.t0 = t0
+        self.placed: list[tuple[int, np.ndarray]] = []
+        self.late_samples = 0
+        self._resampler: rtc.AudioResampler | None = None
+        self._source_rate = None
+        self._run_start: int | None = None
+        self._run_samples = 0
+
+    @property
+    def run_start(self) -> int | None:
+        return self._run_start
+
+    @property
+    def run_end(self) -> int | None:
+        return None if self._run_start is None else self._run_start + self._run_samples
+
+    def start_run(self, at: float):
+        self.end_run()
+        self._run_start = round((at - self.t0) * self.sample_rate)
+        self._run_samples = 0
+
+    def push(self, frame: rtc.AudioFrame):
+        data = np.frombuffer(frame.data, dtype=np.int16)
+        if frame.num_channels > 1:
+            data = data.reshape(-1, frame.num_channels).mean(axis=1).astype(np.int16)
+        if frame.sample_rate == self.sample_rate:
+            self._place(data)
+            return
+        if self._resampler is None or self._source_rate != frame.sample_rate:
+            self._source_rate = frame.sample_rate
+            self._resampler = rtc.AudioResampler(frame.sample_rate, self.sample_rate, num_channels=1)
+        mono = rtc.AudioFrame(data.tobytes(), frame.sample_rate, 1, len(data))
+        for out in self._resampler.push(mono):
+            self._place(np.frombuffer(out.data, dtype=np.int16))
+
+    def end_run(self):
+        if self._resampler is not None and self._run_start is not None:
+            for out in self._resampler.flush():
+                self._place(np.frombuffer(out.data, dtype=np.int16))
+        self._resampler = None
+        self._source_rate = None
+        self._run_start = None
+        self._run_samples = 0
+
+    def truncate(self, end: int):
+        # Interrupted reply: everything after the point where playout stopped was never heard
+        keep = []
+        for pos, samples in self.placed:
+            if pos < end:
+                keep.append((pos, samples[: end - pos]))
+        self.placed = keep
+
+    def _place(self, samples: np.ndarray):
+        if self._run_start is None or not len(samples):
+            return
+        self.placed.append((self._run_start + self._run_samples, samples))
+        self._run_samples += len(samples)
+
+    def take(self, start: int, end: int) -> np.ndarray:
+        block = np.zeros(end - start, dtype=np.int16)
+        keep = []
+        for pos, samples in self.placed:
+            stop = pos + len(samples)
+            if stop <= start:
+                self.late_samples += len(samples)
+                continue
+            if pos >= end:
+                keep.append((pos, samples))
+                continue
+            lo, hi = max(pos, start), min(stop, end)
+            block[lo - start : hi - start] = samples[lo - pos : hi - pos]
+            if stop > end:
+                keep.append((end, samples[end - pos :]))
+        self.placed = keep
+        return block
+
+
+class CallRecorder:
+    """Opt-in stereo recording of one call (left: caller, right: agent).
+
+    The taps on the session's audio input/output only hand frame references
+    to a bounded queue; a worker thread places them on the call timeline
+    (agent audio where it actually played, cut at interruptions), encodes
+    settled audio every `chunk_seconds` and appends it to a spool file on
+    local disk. When more than `max_queued` frames wait, new frames are
+    dropped and counted instead of growing memory or slowing the call.
+    aclose() returns the finished <call_log_id>.<ext> file, which
+    upload_recordings() picks up.
+    """
+
+    def __init__(
+        self,
+        spool_dir: str,
+        call_log_id: str,
+        codec: str = "opus",
+        sample_rate: int = 16000,
+        chunk_seconds: float = 5.0,
+        max_queued: int = 1500,
+    ) -> None:
+        if codec not in CODECS:
+            raise ValueError(f"unknown recording codec {codec!r}")
+        self.path = os.path.join(spool_dir, f"{call_log_id}.{CODECS[codec][1]}")
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.chunk_seconds = chunk_seconds
+        self.max_queued = max_queued
+        self.t0: float | None = None
+        self.frames = [0, 0]
+        self.dropped = [0, 0]
+        self.dropped_seconds = 0.0
+        self.encoded_seconds = 0.0
+        self.encode_cpu_seconds = 0.0
+        self.late_seconds = 0.0
+        self.failed = False
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    @property
+    def recording(self) -> bool:
+        return self._thread is not None and not self._closed
+
+    def attach(self, session):
+        """Taps the session's current audio input and output (call after session.start)."""
+        if session.input.audio is not None:
+            session.input.audio = RecordedAudioInput(self, session.input.audio)
+        if session.output.audio is not None:
+            session.output.audio = RecordedAudioOutput(self, session.output.audio)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.t0 = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="call-recorder")
+        self._thread.start()
+
+    def put_frame(self, channel: int, frame: rtc.AudioFrame, at: float = None):
+        if not self.recording:
+            return
+        self.frames[channel] += 1
+        if self._queue.qsize() >= self.max_queued:
+            self.dropped[channel] += 1
+            self.dropped_seconds += frame.duration
+            return
+        self._queue.put_nowait(("frame", channel, frame, at))
+
+    def put_event(self, kind: str, value: float):
+        # Playout start/end of an agent segment; never dropped, they keep the timeline right
+        if self.recording:
+            self._queue.put_nowait((kind, AGENT, None, value))
+
+    async def aclose(self, timeout: float = 10.0) -> str | None:
+        """Stops recording and waits for the encoder; returns the file path or None."""
+        if self._thread is None or self._closed:
+            return None
+        self._closed = True
+        self._queue.put_nowait(None)
+        await asyncio.to_thread(self._thread.join, timeout)
+        if self._thread.is_alive():
+            logger.error(f"Aufnahme {self.path}: Encoder nicht rechtzeitig fertig")
+            return None
+        if self.dropped_seconds:
+            logger.warning(f"Aufnahme {self.path}: {self.dropped_seconds:.1f}s Audio verworfen (Queue voll)")
+        return None if self.failed else self.path
+
+    def stats(self) -> dict:
+        return {
+            "frames": sum(self.frames),
+            "dropped_frames": sum(self.dropped),
+            "dropped_seconds": round(self.dropped_seconds, 2),
+            "late_seconds": round(self.late_seconds, 2),
+            "encoded_seconds": round(self.encoded_seconds, 1),
+            "encode_cpu_seconds": round(self.encode_cpu_seconds, 3),
+        }
+
+    def _run(self):
+        channels = [_Channel(self.sample_rate, self.t0), _Channel(self.sample_rate, self.t0)]
+        fmt, _ = CODECS[self.codec]
+        part_path = f"{self.path}.part"
+        cursor = 0
+        # Agent segment: frames captured, playout start (from the sink) not known yet
+        pending: list[rtc.AudioFrame] = []
+        pending_since = None
+        segment_start = None
+        next_write = time.monotonic() + self.chunk_seconds
+        cpu_started = time.thread_time()
+        try:
+            with av.open(part_path, mode="w", format=fmt) as container:
+                stream = container.add_stream(self._codec_name(), rate=self.sample_rate, layout="stereo")
+                if self.codec == "opus":
+                    stream.bit_rate = OPUS_BITRATE
+
+                def write(until: float):
+                    nonlocal cursor
+                    end = round((until - self.t0) * self.sample_rate)
+                    if end <= cursor:
+                        return
+                    left, right = (c.take(cursor, end) for c in channels)
+                    block = np.stack([left, right], axis=1).reshape(1, -1)
+                    frame = av.AudioFrame.from_ndarray(block, format="s16", layout="stereo")
+                    frame.sample_rate = self.sample_rate
+                    for packet in stream.encode(frame):
+                        container.mux(packet)
+                    self.encoded_seconds += (end - cursor) / self.sample_rate
+                    cursor = end
+
+                while True:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, next_write - time.monotonic()))
+                    except queue.Empty:
+                        item = "write"
+                    if item is None:
+                        break
+                    if item != "write":
+                        kind, channel, frame, value = item
+                        if kind == "frame" and channel == CALLER:
+                            started = value - frame.duration
+                            run_end = channels[CALLER].run_end
+                            expected = None if run_end is None else self.t0 + run_end / self.sample_rate
+                            if expected is None or abs(started - expected) > RESYNC_TOLERANCE:
+                                channels[CALLER].start_run(started)
+                            channels[CALLER].push(frame)
+                        elif kind == "frame":
+                            if segment_start is None:
+                                pending.append(frame)
+                                pending_since = pending_since or value
+                            else:
+                                channels[AGENT].push(frame)
+                        elif kind == "started" and segment_start is None:
+                            segment_start = value
+                            channels[AGENT].start_run(value)
+                            for frame in pending:
+                                channels[AGENT].push(frame)
+                            pending, pending_since = [], None
+                        elif kind == "finished":
+                            if segment_start is None and pending:
+                                # Sink never reported a start: assume it played right up to now
+                                channels[AGENT].start_run(time.time() - value)
+                                for frame in pending:
+                                    channels[AGENT].push(frame)
+                            start = channels[AGENT].run_start
+                            channels[AGENT].end_run()
+                            if start is not None:
+                                channels[AGENT].truncate(start + round(value * self.sample_rate))
+                            pending, pending_since, segment_start = [], None, None
+                        if time.monotonic() < next_write:
+                            continue
+                    next_write = time.monotonic() + self.chunk_seconds
+                    settled = time.time() - SETTLE_SECONDS
+                    if pending_since is not None:
+                        settled = min(settled, pending_since)
+                    write(settled)
+
+                for channel in channels:
+                    channel.end_run()
+                ends = [max((pos + len(s) for pos, s in c.placed), default=0) for c in channels]
+                write(self.t0 + max(max(ends), cursor) / self.sample_rate)
+                for packet in stream.encode(None):
+                    container.mux(packet)
+            os.replace(part_path, self.path)
+        except Exception:
+            self.failed = True
+            logger.exception(f"Aufnahme {self.path} fehlgeschlagen")
+        finally:
+            self.late_seconds = sum(c.late_samples for c in channels) / self.sample_rate
+            self.encode_cpu_seconds = time.thread_time() - cpu_started
+
+    def _codec_name(self) -> str:
+        # ffmpeg's native opus encoder only takes 48 kHz, libopus any Opus rate
+        return "libopus" if self.codec == "opus" else self.codec
+
+
+class RecordedAudioInput(io.AudioInput):
+    """Caller audio on its way to VAD/STT; frames are passed on untouched."""
+
+    def __init__(self, recorder: CallRecorder, source: io.AudioInput) -> None:
+        super().__init__(label="CallRecorder", source=source)
+        self._recorder = recorder
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        frame = await self.source.__anext__()
+        self._recorder.put_frame(CALLER, frame, time.time())
+        return frame
+
+
+class RecordedAudioOutput(io.AudioOutput):
+    """Agent audio on its way to the room; playout events place it on the timeline."""
+
+    def __init__(self, recorder: CallRecorder, sink: io.AudioOutput) -> None:
+        super().__init__(
+            label="CallRecorder",
+            capabilities=io.AudioOutputCapabilities(pause=True),
+            next_in_chain=sink,
+        )
+        self._recorder = recorder
+
+    @property
+    def sample_rate(self) -> int | None:
+        # The room sink's rate, so TTS audio is still resampled for it
+        return self.next_in_chain.sample_rate
+
+    def on_playback_started(self, *, created_at: float) -> None:
+        super().on_playback_started(created_at=created_at)
+        self._recorder.put_event("started", created_at)
+
+    def on_playback_finished(self, *, playback_position: float, interrupted: bool, synchronized_transcript: str = None) -> None:
+        super().on_playback_finished(
+            playback_position=playback_position,
+            interrupted=interrupted,
+            synchronized_transcript=synchronized_transcript,
+        )
+        self._recorder.put_event("finished", playback_position)
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        await self.next_in_chain.capture_frame(frame)
+        self._recorder.put_frame(AGENT, frame, time.time())
+
+    def flush(self) -> None:
+        super().flush()
+        self.next_in_chain.flush()
+
+    def clear_buffer(self) -> None:
+        self.next_in_chain.clear_buffer()
+
+
+async def upload_recordings(
+    client: SupabaseClient,
+    spool_dir: str,
+    timeout: float = 60.0,
+    max_age: float = UPLOAD_MAX_AGE,
+) -> int:
+    """Uploads every finished recording in the spool dir, also those left by earlier calls.
+
+    Files are named <call_log_id>.<ext>; a file is claimed by renaming it,
+    so concurrent jobs on one machine do not upload it twice. Uploaded
+    files are deleted, failed ones are put back for the next sweep, as are
+    claims of processes that died mid-upload. A file still failing
+    `max_age` seconds after it was written goes to the dead-letter dir
+    (<spool dir>/failed) instead of being retried forever.
+    """
+    _release_stale_claims(spool_dir)
+    uploaded = 0
+    paths = [p for _, ext in CODECS.values() for p in glob.glob(os.path.join(spool_dir, f"*.{ext}"))]
+    for path in paths:
+        claimed = f"{path}.uploading-{os.getpid()}"
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue
+        call_log_id, ext = os.path.basename(path).rsplit(".", 1)
+        ok = False
+        try:
+            ok = await _upload(client, claimed, call_log_id, ext, timeout)
+        except Exception as e:
+            logger.warning(f"Aufnahme {call_log_id}: Upload fehlgeschlagen: {e!r}")
+        finally:
+            # Also on cancellation (job shutdown): the file stays in the spool for the next sweep
+            if ok:
+                os.remove(claimed)
+                uploaded += 1
+            elif time.time() - os.path.getmtime(claimed) > max_age:
+                _dead_letter(spool_dir, claimed, os.path.basename(path), max_age)
+            else:
+                os.rename(claimed, path)
+    return uploaded
+
+
+def _dead_letter(spool_dir: str, claimed: str, name: str, max_age: float):
+    dead_dir = os.path.join(spool_dir, DEAD_LETTER_DIR)
+    os.makedirs(dead_dir, exist_ok=True)
+    os.rename(claimed, os.path.join(dead_dir, name))
+    logger.error(f"Aufnahme {name}: Upload seit ueber {max_age / 3600:.1f}h fehlgeschlagen, verschoben nach {dead_dir}")
+
+
+def _release_stale_claims(spool_dir: str):
+    for claimed in glob.glob(os.path.join(spool_dir, "*.uploading-*")):
+        path, _, pid = claimed.rpartition(".uploading-")
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            try:
+                os.rename(claimed, path)
+            except OSError:
+                pass
+        except (ValueError, PermissionError):
+            pass
+
+
+class UploadSweep:
+    """Background upload of the recording spool dir, one sweep at a time per process.
+
+    kick() starts a sweep (upload_recordings) unless one is running; a kick
+    during a sweep runs another one right after it, so a recording that
+    was finished meanwhile is not left behind. The call's finalization only
+    kicks it - job shutdown gives it up to `timeout` via drain().
+    """
+
+    def __init__(self, client: SupabaseClient, spool_dir: str, timeout: float = 60.0) -> None:
+        self.client = client
+        self.spool_dir = spool_dir
+        self.timeout = timeout
+        self.uploaded = 0
+        self._task: asyncio.Task | None = None
+        self._again = False
+
+    def kick(self) -> asyncio.Task:
+        if self._task is not None and not self._task.done():
+            self._again = True
+        else:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        while True:
+            self._again = False
+            try:
+                self.uploaded += await upload_recordings(self.client, self.spool_dir, self.timeout)
+            except Exception as e:
+                logger.warning(f"Upload-Sweep fehlgeschlagen: {e!r}")
+            if not self._again:
+                return
+
+    async def drain(self, timeout: float):
+        """Waits up to `timeout` for the running sweep; what it did not get to stays in the spool dir."""
+        if self._task is None or self._task.done():
+            return
+        _, still_running = await asyncio.wait({self._task}, timeout=timeout)
+        if still_running:
+            logger.warning(f"Aufnahme-Upload nach {timeout}s abgebrochen, Rest beim naechsten Sweep")
+            self._task.cancel()
+            await asyncio.wait(still_running)
+
+
+async def _upload(client: SupabaseClient, path: str, call_log_id: str, ext: str, timeout: float) -> bool:
+    result = await client.action("create_recording_upload", {"call_log_id": call_log_id, "extension": ext})
+    if not result.get("success"):
+        logger.warning(f"Aufnahme {call_log_id}: keine Upload-URL: {result.get('error')}")
+        return False
+    data = await asyncio.to_thread(_read_file, path)
+    content_type = "audio/ogg" if ext == "ogg" else f"audio/{ext}"
+    if not await client.upload(result["signed_url"], data, content_type, timeout=timeout):
+        return False
+    saved = await client.action("save_recording", {"call_log_id": call_log_id, "path": result["path"]})
+    if saved.get("success"):
+        logger.info(f"Aufnahme {call_log_id} hochgeladen ({len(data) // 1024} KiB)")
+    return bool(saved.get("success"))
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+
+from livekit.agents import llm
+
+logger = logging.getLogger("ColdCallAgent")
+
+SUMMARY_INSTRUCTIONS = """Du fasst den bisherigen Verlauf eines Verkaufsgespraechs am Telefon fuer den Agenten zusammen, der das Gespraech weiterfuehrt.
+- Stichpunkte, hoechstens 120 Woerter, auf Deutsch
+- Behalten: Situation und Bedarf des Kunden, Einwaende, Zusagen, genannte Zahlen, Namen und Termine, offene Fragen, Stimmung
+- Weglassen: Begruessung, Fuellwoerter, Wiederholungen
+- Nur den Inhalt, keine Einleitung"""
+
+SUMMARY_ID = "coldcall_history_summary"
+# Rough token estimate (~4 characters per token for German); the budget is a target, not an exact limit
+CHARS_PER_TOKEN = 4
+ITEM_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(item) -> int:
+    if item.type == "message":
+        text = item.text_content or ""
+    elif item.type == "function_call":
+        text = f"{item.name}{item.arguments}"
+    elif item.type == "function_call_output":
+        text = item.output
+    else:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + ITEM_OVERHEAD_TOKENS
+
+
+def render_item(item) -> str:
+    if item.type == "message":
+        speaker = {"user": "Kunde", "assistant": "Agent"}.get(item.role, item.role)
+        return f"{speaker}: {item.text_content or ''}"
+    if item.type == "function_call":
+        return f"[Tool {item.name}({item.arguments})]"
+    if item.type == "function_call_output":
+        return f"[Ergebnis {item.name}: {item.output}]"
+    return ""
+
+
+class ContextWindow:
+    """Keeps the chat history of a call within a token budget.
+
+    Once the history behind the instructions grows past `budget_tokens`,
+    the oldest whole turns are folded into a running summary by a separate
+    (small) LLM in the background, until the history is back to half the
+    budget. The last `keep_recent` messages always stay verbatim. Tool
+    calls are folded with their turn, but facts captured by the tools
+    (`facts`: e-mail, callback, ...) are pinned in the summary message, so
+    they survive any number of compactions. Folding in steps rather than
+    every turn keeps the provider prompt cache warm in between.
+    """
+
+    def __init__(
+        self,
+        agent,
+        summary_llm: llm.LLM,
+        budget_tokens: int,
+        keep_recent: int = 6,
+        facts: dict = None,
+        timeout: float = 15.0,
+    ) -> None:
+        self.agent = agent
+        self.summary_llm = summary_llm
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.facts = facts if facts is not None else {}
+        self.timeout = timeout
+        self.summary = ""
+        self.compactions = 0
+        self.failures = 0
+        self.last_ms = 0.0
+        self._task: asyncio.Task | None = None
+
+    def history_tokens(self, chat_ctx: llm.ChatContext = None) -> int:
+        return sum(estimate_tokens(item) for item in self._history(chat_ctx or self.agent.chat_ctx))
+
+    def _history(self, chat_ctx: llm.ChatContext) -> list:
+        # Everything but the instructions and our own summary
+        return [
+            item for item in chat_ctx.items
+            if item.id != SUMMARY_ID and not (item.type == "message" and item.role == "system")
+        ]
+
+    def maybe_compact(self):
+        """Called after each turn; starts a background compaction when over budget."""
+        if self._task is not None and not self._task.done():
+            return
+        if self.history_tokens() <= self.budget_tokens:
+            return
+        self._task = asyncio.create_task(self._compact())
+
+    def _fold_candidates(self, history: list) -> list:
+        """Oldest whole turns to fold so that the rest fits in half the budget."""
+        target = self.budget_tokens // 2
+        remaining = sum(estimate_tokens(item) for item in history)
+        messages_after = sum(1 for item in history if item.type == "message")
+        cut = 0
+        for i, item in enumerate(history):
+            if remaining <= target or messages_after <= self.keep_recent:
+                break
+            remaining -= estimate_tokens(item)
+            if item.type == "message":
+                messages_after -= 1
+            cut = i + 1
+        # Never cut between a user message and the reply/tool calls that answer it
+        while 0 < cut < len(history) and not (history[cut].type == "message" and history[cut].role == "user"):
+            cut -= 1
+        return history[:cut]
+
+    async def _compact(self):
+        history = self._history(self.agent.chat_ctx)
+        fold = self._fold_candidates(history)
+        if not fold:
+            return
+        started = time.perf_counter()
+        try:
+            summary = await asyncio.wait_for(self._summarize(fold), self.timeout)
+        except Exception as e:
+            self.failures += 1
+            # Keep the turns and try again next turn - unless the context keeps growing unchecked
+            if self.history_tokens() <= self.budget_tokens * 2:
+                logger.warning(f"Context summary failed, retrying next turn: {e}")
+                return
+            logger.warning(f"Context summary failed, dropping {len(fold)} old items: {e}")
+            summary = self.summary
+        before = self.history_tokens()
+        await self._apply(fold, summary)
+        self.compactions += 1
+        self.last_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Context compacted: {len(fold)} items folded, history {before} -> {self.history_tokens()} tokens "
+            f"in {self.last_ms:.0f}ms"
+        )
+
+    async def _summarize(self, fold: list) -> str:
+        ctx = llm.ChatContext()
+        ctx.add_message(role="system", content=SUMMARY_INSTRUCTIONS)
+        previous = f"Bisherige Zusammenfassung:\n{self.summary}\n\n" if self.summary else ""
+        turns = "\n".join(line for line in (render_item(item) for item in fold) if line)
+        ctx.add_message(role="user", content=f"{previous}Neuer Gespraechsteil:\n{turns}")
+        text = ""
+        async with self.summary_llm.chat(chat_ctx=ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    text += chunk.delta.content
+        if not text.strip():
+            raise ValueError("empty summary")
+        return text.strip()
+
+    def render(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append(f"Bisheriges Gespraech (zusammengefasst):\n{self.summary}")
+        if self.facts:
+            parts.append("Festgehalten:\n" + "\n".join(f"- {key}: {value}" for key, value in self.facts.items()))
+        return "\n\n".join(parts)
+
+    async def _apply(self, fold: list, summary: str):
+        # Re-read the context: turns may have been added while the summary was generated
+        chat_ctx = self.agent.chat_ctx.copy()
+        folded = {item.id for item in fold} | {SUMMARY_ID}
+        chat_ctx.items = [item for item in chat_ctx.items if item.id not in folded]
+        self.summary = summary
+        rest = self._history(chat_ctx)
+        created_at = rest[0].created_at - 0.001 if rest else time.time()
+        if content := self.render():
+            chat_ctx.add_message(role="system", content=content, id=SUMMARY_ID, created_at=created_at)
+        await self.agent.update_chat_ctx(chat_ctx)
+
+    async def aclose(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
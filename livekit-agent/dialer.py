@@ -0,0 +1,404 @@
+"""Campaign dialer: pushes a lead list through the SIP trunks as fast as they allow.
+
+Every lead is one job in the existing metadata contract (phone_number,
+lead fields, lead_id, call_log_id, campaign_id and campaign_version; the
+agent loads the campaign settings itself). The dialer creates the
+room with a ColdCallAgent dispatch in one request; the agent dials through
+the trunk passed in `sip_trunk_id` and reports the outcome in the room
+metadata (`dial_status`), which the dialer polls for all running calls in a
+single ListRooms request.
+
+    python dialer.py leads.jsonl --trunk ST_55KNF9cwavz2:10:1 --window "Mo-Fr 09:00-18:00"
+
+leads.jsonl: one job metadata object per line, optionally with
+"callback_at" (ISO timestamp) to not call before the agreed callback time.
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+from livekit import api
+
+logger = logging.getLogger("ColdCallAgent")
+
+AGENT_NAME = "ColdCallAgent"
+DIAL_STATUS_KEY = "dial_status"
+
+# SIP response codes -> dial status; busy/no_answer/congestion are retried
+BUSY_CODES = {486, 600}
+NO_ANSWER_CODES = {408, 480, 487}
+CONGESTION_CODES = {503}
+RETRY_STATUSES = ("busy", "no_answer", "congestion")
+# Base delay before the next attempt (s), doubled per attempt
+DEFAULT_BACKOFF = {"busy": 300.0, "no_answer": 3600.0, "congestion": 30.0}
+
+WEEKDAYS = ["mo", "di", "mi", "do", "fr", "sa", "so"]
+
+
+def dial_outcome(error: Exception = None) -> tuple[str, int | None]:
+    """Dial status and SIP code for the result of create_sip_participant."""
+    if error is None:
+        return "answered", None
+    code = None
+    metadata = getattr(error, "metadata", None) or {}
+    try:
+        code = int(metadata.get("sip_status_code"))
+    except (TypeError, ValueError):
+        pass
+    if code in BUSY_CODES:
+        return "busy", code
+    if code in NO_ANSWER_CODES:
+        return "no_answer", code
+    if code in CONGESTION_CODES or getattr(error, "code", None) == "resource_exhausted":
+        return "congestion", code
+    return "failed", code
+
+
+class CallWindow:
+    """Allowed calling hours, e.g. "Mo-Fr 09:00-18:00" in Europe/Berlin."""
+
+    def __init__(self, days=range(5), start: dtime = dtime(9), end: dtime = dtime(18), tz: str = "Europe/Berlin"):
+        self.days = set(days)
+        self.start = start
+        self.end = end
+        self.tz = ZoneInfo(tz)
+
+    @classmethod
+    def parse(cls, spec: str, tz: str = "Europe/Berlin") -> "CallWindow":
+        match = re.fullmatch(r"\s*(\w\w)(?:-(\w\w))?\s+(\d{1,2}):(\d\d)-(\d{1,2}):(\d\d)\s*", spec.lower())
+        if not match or match.group(1) not in WEEKDAYS or (match.group(2) or "mo") not in WEEKDAYS:
+            raise ValueError(f"Invalid call window: {spec!r} (expected e.g. 'Mo-Fr 09:00-18:00')")
+        first = WEEKDAYS.index(match.group(1))
+        last = WEEKDAYS.index(match.group(2) or match.group(1))
+        start = dtime(int(match.group(3)), int(match.group(4)))
+        end = dtime(int(match.group(5)), int(match.group(6)))
+        return cls(range(first, last + 1), start, end, tz)
+
+    def next_open(self, ts: float) -> float:
+        """`ts` if calls are allowed then, otherwise the next opening time."""
+        now = datetime.fromtimestamp(ts, self.tz)
+        for offset in range(8):
+            day = now.date() + timedelta(days=offset)
+            if day.weekday() not in self.days:
+                continue
+            opens = datetime.combine(day, self.start, self.tz)
+            closes = datetime.combine(day, self.end, self.tz)
+            if now < opens:
+                return opens.timestamp()
+            if now < closes:
+                return ts
+        raise ValueError("Call window has no open days")
+
+
+@dataclass
+class Trunk:
+    trunk_id: str
+    max_concurrent: int = 10
+    calls_per_second: float = 1.0
+    active: int = 0
+    peak: int = 0
+    _next_call_at: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Trunk":
+        """Parses "ST_xxx[:max_concurrent[:calls_per_second]]"."""
+        parts = spec.split(":")
+        trunk = cls(parts[0])
+        if len(parts) > 1:
+            trunk.max_concurrent = int(parts[1])
+        if len(parts) > 2:
+            trunk.calls_per_second = float(parts[2])
+        return trunk
+
+    @property
+    def free(self) -> int:
+        return self.max_concurrent - self.active
+
+    def reserve_start(self, now: float) -> float:
+        """Reserves the next start slot under the CPS limit; returns its time."""
+        start = max(now, self._next_call_at)
+        self._next_call_at = start + 1 / self.calls_per_second
+        return start
+
+
+@dataclass
+class DialJob:
+    metadata: dict
+    attempts: int = 0
+    not_before: float = 0.0
+    status: str = "pending"
+    sip_status_code: int | None = None
+    history: list = field(default_factory=list)
+
+    @property
+    def phone_number(self) -> str:
+        return self.metadata.get("phone_number", "")
+
+
+@dataclass
+class _ActiveCall:
+    job: DialJob
+    trunk: Trunk
+    room: str
+    started: float
+    status: str = "creating"
+
+
+class CampaignDialer:
+    """Dispatches ColdCallAgent jobs for a lead list.
+
+    Per trunk at most `max_concurrent` calls run at once and new calls start
+    no faster than `calls_per_second`. Busy, no answer and congestion are
+    retried up to `max_attempts` with exponential backoff; every attempt
+    starts no earlier than the lead's callback time and only inside the
+    call window. A call holds its trunk slot until the agent reports it
+    ended or the room is gone.
+    """
+
+    def __init__(
+        self,
+        lkapi: api.LiveKitAPI,
+        trunks: list[Trunk],
+        window: CallWindow = None,
+        max_attempts: int = 3,
+        backoff: dict = None,
+        ring_timeout: float = 30.0,
+        max_call_seconds: float = 1800.0,
+        poll_interval: float = 1.0,
+        room_prefix: str = "outbound",
+    ) -> None:
+        if not trunks:
+            raise ValueError("At least one SIP trunk is required")
+        self.lkapi = lkapi
+        self.trunks = trunks
+        self.window = window
+        self.max_attempts = max_attempts
+        self.backoff = {**DEFAULT_BACKOFF, **(backoff or {})}
+        self.ring_timeout = ring_timeout
+        self.max_call_seconds = max_call_seconds
+        self.poll_interval = poll_interval
+        self.room_prefix = room_prefix
+        self.jobs: list[DialJob] = []
+        self.stats = {"dispatched": 0, "retries": 0, "dispatch_errors": 0}
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._active: dict[str, _ActiveCall] = {}
+        # Calls waiting for their CPS slot, not yet in _active
+        self._starting: set[asyncio.Task] = set()
+        self._changed = asyncio.Event()
+
+    def add(self, metadata: dict, callback_at: float = None):
+        job = DialJob(metadata=dict(metadata))
+        self.jobs.append(job)
+        self._schedule(job, callback_at or 0.0)
+
+    def _schedule(self, job: DialJob, not_before: float):
+        if self.window is not None:
+            not_before = self.window.next_open(max(not_before, time.time()))
+        job.not_before = not_before
+        job.status = "pending"
+        heapq.heappush(self._queue, (not_before, next(self._seq), job))
+        self._changed.set()
+
+    async def run(self):
+        poller = asyncio.create_task(self._poll())
+        try:
+            while self._queue or self._active or self._starting:
+                trunk = self._free_trunk()
+                due = self._queue[0][0] if self._queue else None
+                if trunk is None or due is None or due > time.time():
+                    # Wait for a free slot, a due job or a new/retried job
+                    self._changed.clear()
+                    timeout = None if due is None or trunk is None else max(0.0, due - time.time())
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                _, _, job = heapq.heappop(self._queue)
+                if self.window is not None and (opens := self.window.next_open(time.time())) > time.time():
+                    # Window closed while waiting
+                    self._schedule(job, opens)
+                    continue
+                trunk.active += 1
+                trunk.peak = max(trunk.peak, trunk.active)
+                start_at = trunk.reserve_start(time.monotonic())
+                task = asyncio.create_task(self._start_call(job, trunk, start_at))
+                self._starting.add(task)
+                task.add_done_callback(self._started)
+        finally:
+            poller.cancel()
+            for task in self._starting:
+                task.cancel()
+            await asyncio.gather(*self._starting, return_exceptions=True)
+        return self.summary()
+
+    def _started(self, task: asyncio.Task):
+        self._starting.discard(task)
+        self._changed.set()
+
+    def _free_trunk(self) -> Trunk | None:
+        # Least loaded trunk with a free slot
+        candidates = [t for t in self.trunks if t.free > 0]
+        return max(candidates, key=lambda t: t.free / t.max_concurrent, default=None)
+
+    async def _start_call(self, job: DialJob, trunk: Trunk, start_at: float):
+        await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+        job.attempts += 1
+        room = f"{self.room_prefix}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:9]}"
+        metadata = {**job.metadata, "sip_trunk_id": trunk.trunk_id, "ring_timeout": self.ring_timeout}
+        self._active[room] = _ActiveCall(job, trunk, room, time.monotonic())
+        try:
+            # Room and agent dispatch in one request
+            await self.lkapi.room.create_room(
+                api.CreateRoomRequest(
+                    name=room,
+                    empty_timeout=300,
+                    departure_timeout=20,
+                    max_participants=2,
+                    agents=[api.RoomAgentDispatch(agent_name=AGENT_NAME, metadata=json.dumps(metadata))],
+                )
+            )
+        except Exception as e:
+            logger.error(f"Dialer: Dispatch fuer {job.phone_number} fehlgeschlagen: {e}")
+            self.stats["dispatch_errors"] += 1
+            self._finish(room, "congestion" if isinstance(e, api.TwirpError) and e.status >= 500 else "failed")
+            return
+        call = self._active.get(room)
+        if call is not None:
+            call.status = "dispatched"
+            call.started = time.monotonic()
+        self.stats["dispatched"] += 1
+        logger.info(f"Dialer: {job.phone_number} ueber {trunk.trunk_id} (Versuch {job.attempts}, Room {room})")
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            names = [room for room, call in self._active.items() if call.status != "creating"]
+            if not names:
+                continue
+            try:
+                response = await self.lkapi.room.list_rooms(api.ListRoomsRequest(names=names))
+            except Exception as e:
+                logger.warning(f"Dialer: ListRooms fehlgeschlagen: {e}")
+                continue
+            rooms = {room.name: room for room in response.rooms}
+            now = time.monotonic()
+            for name in names:
+                call = self._active.get(name)
+                if call is None:
+                    continue
+                room = rooms.get(name)
+                if room is None:
+                    # Room is gone: call over (or never came up)
+                    if now - call.started > self.poll_interval:
+                        self._finish(name, "ended" if call.status == "answered" else "failed")
+                    continue
+                status = self._room_status(room)
+                if status and status != call.status:
+                    self._on_status(call, status, room)
+                elif now - call.started > self.max_call_seconds:
+                    logger.warning(f"Dialer: {name} laeuft seit {self.max_call_seconds:.0f}s, Slot wird freigegeben")
+                    self._finish(name, call.status if call.status == "answered" else "failed")
+
+    def _room_status(self, room) -> dict | None:
+        try:
+            return json.loads(room.metadata).get(DIAL_STATUS_KEY) if room.metadata else None
+        except (json.JSONDecodeError, AttributeError):
+            return None
+
+    def _on_status(self, call: _ActiveCall, status: str, room):
+        call.status = status
+        if status == "answered":
+            return
+        try:
+            call.job.sip_status_code = json.loads(room.metadata).get("sip_status_code")
+        except (json.JSONDecodeError, AttributeError):
+            pass
+        self._finish(call.room, status)
+        if status != "ended":
+            # Nobody in the room any more - free it now instead of waiting for empty_timeout
+            asyncio.create_task(self._delete_room(call.room))
+
+    async def _delete_room(self, room: str):
+        try:
+            await self.lkapi.room.delete_room(api.DeleteRoomRequest(room=room))
+        except Exception as e:
+            logger.debug(f"Dialer: DeleteRoom {room} fehlgeschlagen: {e}")
+
+    def _finish(self, room: str, status: str):
+        call = self._active.pop(room, None)
+        if call is None:
+            return
+        call.trunk.active -= 1
+        job = call.job
+        job.history.append(status)
+        if status == "ended":
+            status = "answered"
+        job.status = status
+        if status in RETRY_STATUSES and job.attempts < self.max_attempts:
+            delay = self.backoff[status] * 2 ** (job.attempts - 1) * random.uniform(0.8, 1.2)
+            self.stats["retries"] += 1
+            logger.info(f"Dialer: {job.phone_number} {status}, neuer Versuch in {delay:.0f}s")
+            self._schedule(job, time.time() + delay)
+        self._changed.set()
+
+    def summary(self) -> dict:
+        outcomes: dict[str, int] = {}
+        for job in self.jobs:
+            outcomes[job.status] = outcomes.get(job.status, 0) + 1
+        return {
+            "leads": len(self.jobs),
+            "outcomes": outcomes,
+            **self.stats,
+            "peak_per_trunk": {t.trunk_id: t.peak for t in self.trunks},
+        }
+
+
+def parse_callback(value) -> float | None:
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+async def main_async(args):
+    trunks = [Trunk.parse(spec) for spec in args.trunk]
+    window = CallWindow.parse(args.window, args.timezone) if args.window else None
+    async with api.LiveKitAPI() as lkapi:
+        dialer = CampaignDialer(lkapi, trunks, window, max_attempts=args.max_attempts, ring_timeout=args.ring_timeout)
+        with open(args.leads) as f:
+            for line in f:
+                if line.strip():
+                    lead = json.loads(line)
+                    dialer.add(lead, parse_callback(lead.pop("callback_at", None)))
+        report = await dialer.run()
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("leads", help="JSONL file with one job metadata object per lead")
+    parser.add_argument("--trunk", action="append", required=True, help="ST_xxx[:max_concurrent[:calls_per_second]], repeatable")
+    parser.add_argument("--window", default="Mo-Fr 09:00-18:00", help="allowed calling hours, empty for always")
+    parser.add_argument("--timezone", default="Europe/Berlin")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--ring-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+
+# Spoken separators (Deepgram writes "ät" as often as "at")
+AT_WORDS = {"@", "at", "ät", "aet", "et", "klammeraffe", "klammeraffen", "affenschwanz"}
+DOT_WORDS = {".", "punkt", "dot", "point"}
+DASH_WORDS = {"-", "minus", "bindestrich", "dash", "strich"}
+UNDERSCORE_WORDS = {"_", "unterstrich", "underscore", "unterstrichen"}
+
+# Deutsches Buchstabieralphabet (DIN 5009, alt und neu) - only used in "X wie ..." spelling
+SPELLING_ALPHABET = {
+    "anton": "a", "aachen": "a", "ärger": "ae", "berta": "b", "berlin": "b", "caesar": "c", "cäsar": "c",
+    "chemnitz": "c", "dora": "d", "düsseldorf": "d", "emil": "e", "essen": "e", "friedrich": "f",
+    "frankfurt": "f", "gustav": "g", "goslar": "g", "heinrich": "h", "hamburg": "h", "ida": "i",
+    "ingelheim": "i", "julius": "j", "jena": "j", "kaufmann": "k", "köln": "k", "ludwig": "l",
+    "leipzig": "l", "martha": "m", "marta": "m", "münchen": "m", "nordpol": "n", "nürnberg": "n",
+    "otto": "o", "offenbach": "o", "paula": "p", "potsdam": "p", "quelle": "q", "richard": "r",
+    "rostock": "r", "samuel": "s", "siegfried": "s", "salzwedel": "s", "theodor": "t", "tübingen": "t",
+    "ulrich": "u", "unna": "u", "viktor": "v", "völklingen": "v", "wilhelm": "w", "wuppertal": "w",
+    "xanthippe": "x", "ypsilon": "y", "zacharias": "z", "zeppelin": "z",
+}
+# Letter names as STT writes them when a caller spells without "wie"
+LETTER_NAMES = {
+    "be": "b", "ce": "c", "ze": "c", "zeh": "c", "de": "d", "ef": "f", "eff": "f", "ge": "g",
+    "ha": "h", "jot": "j", "ka": "k", "el": "l", "em": "m", "en": "n", "pe": "p", "ku": "q",
+    "er": "r", "es": "s", "te": "t", "vau": "v", "fau": "v", "we": "w", "ix": "x", "iks": "x",
+    "zet": "z", "tzet": "z",
+}
+NUMBER_WORDS = {
+    "null": "0", "eins": "1", "ein": "1", "zwei": "2", "zwo": "2", "drei": "3", "vier": "4",
+    "fünf": "5", "fuenf": "5", "sechs": "6", "sieben": "7", "acht": "8", "neun": "9",
+}
+# Words that end the address part of a sentence ("meine Mail ist ...", "... ist das richtig")
+STOP_WORDS = {
+    "ist", "lautet", "heißt", "heisst", "meine", "mein", "mail", "e-mail", "email", "adresse", "mailadresse",
+    "e-mail-adresse", "emailadresse", "also", "ja", "nein", "genau", "die", "das", "der", "und", "oder", "mit",
+    "schreiben", "schreib", "sie", "ich", "du", "hab", "habe", "einfach", "okay", "ok", "nochmal", "bitte",
+    "so", "unter", "an", "von", "dann", "aber", "mir", "mich", "gerne", "gern", "klar", "richtig", "privat",
+    "geschäftlich", "eigentlich", "wie", "gesagt", "alles", "zusammen", "geschrieben", "erreichen",
+    "wäre", "waere", "war", "sind", "wir", "uns", "unsere", "unser",
+}
+FILLER_WORDS = {"äh", "ähm", "öhm", "hm", "hmm", "mhm", "ehm", "groß", "gross", "kleines", "großes"}
+
+# Providers boosted in the STT keywords; spoken forms -> domain label
+PROVIDERS = {
+    "gmail": "gmail", "g-mail": "gmail", "googlemail": "googlemail", "outlook": "outlook", "yahoo": "yahoo",
+    "hotmail": "hotmail", "web": "web", "gmx": "gmx", "icloud": "icloud", "t-online": "t-online",
+    "freenet": "freenet", "posteo": "posteo", "aol": "aol",
+}
+# TLD a provider gets when the caller leaves it out ("at gmail") - only where it is unambiguous
+PROVIDER_DEFAULT_TLD = {
+    "gmail": "com", "googlemail": "com", "icloud": "com", "web": "de", "t-online": "de", "freenet": "de",
+    "posteo": "de",
+}
+TLDS = {
+    "com", "de", "net", "org", "at", "ch", "eu", "io", "info", "biz", "co", "uk", "nl", "fr", "it", "es", "me",
+    "au", "nz", "za", "br", "tr", "jp",
+}
+# Suffixes whose first label is a TLD of its own ("co punkt uk" must not end at "co")
+SECOND_LEVEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "me.uk", "co.at", "or.at", "ac.at", "gv.at", "com.au", "net.au", "org.au",
+    "co.nz", "co.za", "com.br", "com.tr", "co.jp",
+}
+
+# Below this the parser stays quiet and the LLM handles the address on its own
+MIN_CONFIDENCE = 0.75
+
+_EMAIL_RE = re.compile(r"^[a-z0-9._%+-]+@[a-z0-9-]+(\.[a-z0-9-]+)*\.[a-z]{2,}$")
+_LITERAL_EMAIL_RE = re.compile(r"[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}")
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+
+@dataclass
+class EmailCandidate:
+    address: str
+    confidence: float
+    spelled: bool
+
+
+def _tokens(text: str) -> list[str]:
+    text = text.lower().replace("@", " @ ")
+    tokens = []
+    for raw in text.split():
+        token = raw.strip(",;:!?\"'()„“”…")
+        token = token.rstrip(".") if token not in (".",) else token
+        if not token:
+            continue
+        if token in STOP_WORDS or token in PROVIDERS or "." not in token and "_" not in token:
+            tokens.append(token)
+            continue
+        # "web.de", "max_mustermann" - keep the separators as their own tokens
+        tokens.extend(t for t in re.split(r"([._])", token) if t)
+    # "g mail" -> gmail, "t online" -> t-online
+    for i in range(len(tokens) - 1, 0, -1):
+        joined = f"{tokens[i - 1]}{tokens[i]}" if tokens[i - 1] == "g" else f"{tokens[i - 1]}-{tokens[i]}"
+        if joined in PROVIDERS and len(tokens[i - 1]) == 1:
+            tokens[i - 1 : i + 1] = [joined]
+    return tokens
+
+
+def _symbols(tokens: list[str]) -> list[tuple[str, str]]:
+    """(kind, value) per spoken unit: at, dot, dash, underscore, letter, digit, word, stop."""
+    symbols: list[tuple[str, str]] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else ""
+        # "M wie Martha" / "M wie Marta"
+        if nxt == "wie" and i + 2 < len(tokens) and tokens[i + 2] in SPELLING_ALPHABET:
+            # The spelling word is what the caller says clearly - it wins over the letter
+            symbols.append(("letter", SPELLING_ALPHABET[tokens[i + 2]]))
+            i += 3
+            continue
+        if token in ("doppel", "doppel-") and nxt and (len(nxt) == 1 or nxt in LETTER_NAMES):
+            letter = nxt if len(nxt) == 1 else LETTER_NAMES[nxt]
+            symbols.append(("letter", letter * 2))
+            i += 2
+            continue
+        if token in FILLER_WORDS:
+            pass
+        elif token in AT_WORDS and not (symbols and symbols[-1][0] == "dot"):
+            symbols.append(("at", "@"))
+        elif token in DOT_WORDS:
+            symbols.append(("dot", "."))
+        elif token in UNDERSCORE_WORDS:
+            symbols.append(("underscore", "_"))
+        elif token in DASH_WORDS:
+            symbols.append(("dash", "-"))
+        elif token in PROVIDERS:
+            symbols.append(("word", PROVIDERS[token]))
+        elif token in STOP_WORDS:
+            symbols.append(("stop", token))
+        elif token in NUMBER_WORDS:
+            symbols.append(("digit", NUMBER_WORDS[token]))
+        elif token.isdigit():
+            symbols.append(("digit", token))
+        elif len(token) == 1 and token.isalpha():
+            symbols.append(("letter", token.translate(_UMLAUTS)))
+        elif token in LETTER_NAMES:
+            symbols.append(("letter_name", token))
+        elif re.fullmatch(r"[\w-]+", token):
+            symbols.append(("word", token.translate(_UMLAUTS)))
+        else:
+            symbols.append(("stop", token))
+        i += 1
+
+    # Letter names ("em a iks") only count as letters next to other letters; alone they are words
+    for j, (kind, value) in enumerate(symbols):
+        if kind != "letter_name":
+            continue
+        neighbours = [symbols[k][0] for k in (j - 1, j + 1) if 0 <= k < len(symbols)]
+        if any(n in ("letter", "letter_name") for n in neighbours):
+            symbols[j] = ("letter", LETTER_NAMES[value])
+        else:
+            symbols[j] = ("word", value)
+    return symbols
+
+
+def _join(symbols: list[tuple[str, str]]) -> tuple[str, int]:
+    """Concatenate symbols; also returns how many words were glued together without a separator."""
+    out = []
+    glued = 0
+    previous = None
+    for kind, value in symbols:
+        if kind == "word" and previous == "word":
+            glued += 1
+        out.append(value)
+        previous = kind
+    return "".join(out), glued
+
+
+def _domain(symbols: list[tuple[str, str]]) -> tuple[str, float] | None:
+    """Domain from the symbols after "@"; returns it with a confidence penalty."""
+    parts: list[tuple[str, str]] = []
+    for kind, value in symbols:
+        if kind == "stop" or kind == "at":
+            break
+        parts.append((kind, value))
+
+    # Cut after the first TLD that follows a dot ("gmail punkt com punkt ...")
+    labels = [[]]
+    for kind, value in parts:
+        if kind == "dot":
+            labels.append([])
+        else:
+            labels[-1].append((kind, value))
+    texts = [_join(label) for label in labels]
+    domain_labels = []
+    penalty = 0.0
+    for i, (text, glued) in enumerate(texts):
+        if not text:
+            break
+        domain_labels.append(text)
+        penalty += 0.3 * glued
+        if len(domain_labels) > 1 and text in TLDS:
+            following = texts[i + 1][0] if i + 1 < len(texts) else ""
+            if f"{text}.{following}" in SECOND_LEVEL_SUFFIXES:
+                continue
+            if following in TLDS:
+                # More domain labels follow than we understand - rather ask than write a wrong address
+                penalty += 0.3
+            break
+    if not domain_labels:
+        return None
+
+    if len(domain_labels) == 1:
+        # No "punkt": "web de", "gmx de" or a provider without TLD
+        head = parts[0][1] if parts else ""
+        tail = [value for _, value in parts[1:]]
+        if head in PROVIDERS and len(tail) == 1 and tail[0] in TLDS:
+            domain_labels = [head, tail[0]]
+            penalty = 0.1
+        elif domain_labels[0] in PROVIDER_DEFAULT_TLD:
+            domain_labels.append(PROVIDER_DEFAULT_TLD[domain_labels[0]])
+            penalty += 0.15
+        else:
+            return None
+    elif domain_labels[-1] not in TLDS:
+        return None
+    if domain_labels[0] not in PROVIDERS:
+        penalty += 0.1
+    return ".".join(domain_labels), penalty
+
+
+def parse_spoken_email(text: str) -> EmailCandidate | None:
+    """Normalized address from a German transcript of a spoken or spelled e-mail.
+
+    Understands "at"/"Klammeraffe", "punkt", "minus", "Unterstrich",
+    "M wie Martha" spelling, bare letters, number words and the common
+    providers. Returns None when no complete address was said.
+    """
+    if not text:
+        return None
+    literal = _LITERAL_EMAIL_RE.search(text.lower())
+    if literal:
+        return EmailCandidate(literal.group(0), 1.0, spelled=False)
+
+    symbols = _symbols(_tokens(text))
+    at_positions = [i for i, (kind, _) in enumerate(symbols) if kind == "at"]
+    if len(at_positions) != 1:
+        return None
+    at = at_positions[0]
+
+    # Local part: everything between the last stop word and "@"
+    start = at
+    while start > 0 and symbols[start - 1][0] != "stop":
+        start -= 1
+    local_symbols = symbols[start:at]
+    while local_symbols and local_symbols[0][0] in ("dot", "dash", "underscore"):
+        local_symbols = local_symbols[1:]
+    local, glued = _join(local_symbols)
+    if not local:
+        return None
+
+    domain = _domain(symbols[at + 1 :])
+    if domain is None:
+        return None
+    domain_text, penalty = domain
+
+    address = f"{local}@{domain_text}"
+    if not _EMAIL_RE.match(address) or ".." in address or local.endswith("."):
+        return None
+
+    spelled = any(kind == "letter" for kind, _ in local_symbols)
+    # Words said without a separator are probably one word ("maxmustermann") - but not certainly
+    confidence = 1.0 - penalty - 0.3 * glued
+    if len(local) > 40:
+        confidence -= 0.3
+    return EmailCandidate(address, round(max(0.0, confidence), 2), spelled)
+
+
+class SpokenEmailTracker:
+    """Watches final transcripts for a spoken e-mail address.
+
+    Callers often split an address over several utterances ("max punkt
+    mustermann" ... "at gmail punkt com"), so the last few finals are
+    parsed together. A confident candidate waits in `candidate` until the
+    agent picks it up for the next LLM turn.
+    """
+
+    def __init__(self, window: int = 3, min_confidence: float = MIN_CONFIDENCE) -> None:
+        self.finals: deque[str] = deque(maxlen=window)
+        self.min_confidence = min_confidence
+        self.candidate: EmailCandidate | None = None
+        self.parse_ms = 0.0
+
+    def feed(self, transcript: str) -> EmailCandidate | None:
+        transcript = (transcript or "").strip()
+        if not transcript:
+            return None
+        self.finals.append(transcript)
+        started = time.perf_counter()
+        candidate = parse_spoken_email(" ".join(self.finals))
+        self.parse_ms = (time.perf_counter() - started) * 1000
+        if candidate is None or candidate.confidence < self.min_confidence:
+            return None
+        self.candidate = candidate
+        self.finals.clear()
+        return candidate
+
+    def take(self) -> EmailCandidate | None:
+        candidate, self.candidate = self.candidate, None
+        return candidate
+
+
+def email_hint(candidate: EmailCandidate) -> str:
+    return (
+        f"Erkannte E-Mail: {candidate.address} (aus der letzten Aussage). "
+        "Zur Bestaetigung wiederholen, nach Ja save_email_address damit aufrufen."
+    )
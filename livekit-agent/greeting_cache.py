@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import wave
+
+from livekit import rtc
+
+logger = logging.getLogger("ColdCallAgent")
+
+FRAME_MS = 20
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip())
+
+
+class GreetingCache:
+    """Pre-synthesized greeting audio on local disk.
+
+    Entries are 16-bit PCM WAV files keyed by (voice_id, model, language,
+    normalized text). Reads refresh the file mtime and writes evict the
+    least recently used files once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._filling: dict[str, asyncio.Task] = {}
+
+    def key(self, voice_id: str, model: str, language: str, text: str) -> str:
+        raw = "\x1f".join([voice_id or "", model, language, normalize_text(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _read(self, key: str):
+        path = self._path(key)
+        try:
+            with wave.open(path, "rb") as f:
+                data = f.readframes(f.getnframes())
+                sample_rate, num_channels = f.getframerate(), f.getnchannels()
+        except (FileNotFoundError, wave.Error, EOFError):
+            return None
+        os.utime(path)
+        return data, sample_rate, num_channels
+
+    def _write(self, key: str, data: bytes, sample_rate: int, num_channels: int):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with wave.open(tmp_path, "wb") as f:
+            f.setnchannels(num_channels)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(data)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    async def load_frames(self, key: str) -> list[rtc.AudioFrame] | None:
+        entry = await asyncio.to_thread(self._read, key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return split_frames(*entry)
+
+    def fill(self, key: str, tts, text: str) -> asyncio.Task:
+        """Synthesize `text` and store it; concurrent fills for one key share a task.
+
+        The task resolves to the synthesized frames, or None if synthesis failed.
+        """
+        task = self._filling.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fill(key, tts, text))
+            self._filling[key] = task
+            task.add_done_callback(lambda _: self._filling.pop(key, None))
+        return task
+
+    async def _fill(self, key: str, tts, text: str) -> list[rtc.AudioFrame] | None:
+        try:
+            frames = []
+            async with tts.synthesize(normalize_text(text)) as stream:
+                async for audio in stream:
+                    frames.append(audio.frame)
+            if not frames:
+                return None
+            combined = rtc.combine_audio_frames(frames)
+            data = bytes(combined.data)
+            await asyncio.to_thread(self._write, key, data, combined.sample_rate, combined.num_channels)
+            logger.info(f"Greeting cached ({combined.duration:.1f}s audio)")
+            return split_frames(data, combined.sample_rate, combined.num_channels)
+        except Exception as e:
+            logger.warning(f"Greeting cache fill failed: {e}")
+            return None
+
+
+def split_frames(data: bytes, sample_rate: int, num_channels: int) -> list[rtc.AudioFrame]:
+    frame_bytes = sample_rate * FRAME_MS // 1000 * num_channels * 2
+    frames = []
+    for offset in range(0, len(data), frame_bytes):
+        chunk = data[offset:offset + frame_bytes]
+        frames.append(rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=num_channels,
+            samples_per_channel=len(chunk) // (2 * num_channels),
+        ))
+    return frames
+
+
+async def iter_frames(frames: list[rtc.AudioFrame]):
+    for frame in frames:
+        yield frame
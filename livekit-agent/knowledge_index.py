@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger("ColdCallAgent")
+
+CHUNK_CHARS = 600
+BM25_K1 = 1.2
+BM25_B = 0.75
+INDEX_FORMAT = 1
+
+STOP_WORDS = frozenset("""
+aber alle allem allen aller alles als also am an auch auf aus bei bin bis bist da dabei damit dann das dass
+dem den denn der des die dies diese diesem diesen dieser dieses doch dort du durch ein eine einem einen einer
+eines er es etwas euch euer fuer gibt hab habe haben hat hatte ich ihr ihre im in ist ja jetzt kann kein keine
+koennen koennte man mein mich mir mit muss nach nicht noch nun nur ob oder ohne sehr sein seine sich sie sind
+so soll sollte sondern ueber um und uns unser unter viel vom von vor war waren warum was weil welche welcher
+wenn wer werden wie wieder wir wird wo wohl zu zum zur
+a an and are as at be by for from how in is it of on or that the this to was what when where which with you
+""".split())
+
+# Longest first; stems keep at least four characters
+SUFFIXES = ("ungen", "heiten", "keiten", "ung", "heit", "keit", "lich", "isch", "ern", "em", "en", "er", "es", "e", "n", "s")
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.*)$")
+MARKDOWN_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)|[*_`>|~]+|^\s*[-+]\s+", re.MULTILINE)
+
+
+def stem(token: str) -> str:
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, umlaut-folded, stop-word-free, lightly stemmed terms.
+
+    Hyphenated words yield their parts and the joined form, so "Start-ups"
+    matches "Startups" and "E-Mail" matches "Email".
+    """
+    terms = []
+    for word in TOKEN_RE.findall((text or "").lower().translate(UMLAUTS)):
+        parts = word.split("-")
+        if len(parts) > 1:
+            parts.append("".join(parts))
+        terms.extend(stem(t) for t in parts if t not in STOP_WORDS and len(t) > 1)
+    return terms
+
+
+def plain_text(markdown: str) -> str:
+    return re.sub(r"[ \t]+", " ", MARKDOWN_RE.sub(r"\1", markdown or "")).strip()
+
+
+def chunk_item(item: dict, max_chars: int = CHUNK_CHARS) -> list[dict]:
+    """Splits a knowledge item into passages of about `max_chars`.
+
+    Markdown headings become the passage title (prefixed by the item
+    title), paragraphs are packed until the limit and long paragraphs are
+    cut at sentence ends.
+    """
+    title = (item.get("title") or "").strip()
+    sections: list[tuple[str, list[str]]] = [(title, [])]
+    for line in (item.get("content") or "").splitlines():
+        if match := HEADING_RE.match(line):
+            heading = plain_text(match.group(1))
+            sections.append((f"{title} - {heading}" if title else heading, []))
+        else:
+            sections[-1][1].append(line)
+
+    chunks = []
+    for section_title, lines in sections:
+        paragraphs = [plain_text(p) for p in re.split(r"\n\s*\n", "\n".join(lines))]
+        pieces = []
+        for paragraph in filter(None, paragraphs):
+            paragraph = paragraph.replace("\n", " ")
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(". ", 0, max_chars)
+                cut = cut + 1 if cut > max_chars // 3 else max_chars
+                pieces.append(paragraph[:cut].strip())
+                paragraph = paragraph[cut:].strip()
+            pieces.append(paragraph)
+        text = ""
+        for piece in pieces:
+            if text and len(text) + len(piece) + 1 > max_chars:
+                chunks.append({"title": section_title, "text": text})
+                text = piece
+            else:
+                text = f"{text} {piece}".strip()
+        if text:
+            chunks.append({"title": section_title, "text": text})
+
+    for chunk in chunks:
+        chunk["item_id"] = item.get("id", "")
+        chunk["source_url"] = item.get("source_url") or ""
+    return chunks
+
+
+class KnowledgeIndex:
+    """BM25 index over the chunked knowledge items of one campaign.
+
+    Titles are indexed with the passage text. Postings are kept per term,
+    so a lookup only touches the passages that share a term with the
+    question.
+    """
+
+    def __init__(self, version: str, chunks: list[dict], postings: dict[str, list[tuple[int, int]]], lengths: list[int]) -> None:
+        self.version = version
+        self.chunks = chunks
+        self.postings = postings
+        self.lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        n = len(chunks)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in postings.items()}
+
+    @classmethod
+    def build(cls, items: list[dict], version: str = "") -> "KnowledgeIndex":
+        chunks = [chunk for item in items for chunk in chunk_item(item)]
+        postings: dict[str, list[tuple[int, int]]] = {}
+        lengths = []
+        for i, chunk in enumerate(chunks):
+            terms = Counter(tokenize(f"{chunk['title']} {chunk['text']}"))
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                postings.setdefault(term, []).append((i, tf))
+        return cls(version, chunks, postings, lengths)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: str, k: int = 3) -> list[dict]:
+        """Top `k` passages for the question, best first, each with its score."""
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / self.avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda s: s[1], reverse=True)[:k]
+        return [{**self.chunks[i], "score": round(score, 3)} for i, score in best]
+
+    def to_dict(self) -> dict:
+        return {
+            "format": INDEX_FORMAT,
+            "version": self.version,
+            "chunks": self.chunks,
+            "postings": self.postings,
+            "lengths": self.lengths,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KnowledgeIndex":
+        postings = {term: [tuple(p) for p in entries] for term, entries in data["postings"].items()}
+        return cls(data["version"], data["chunks"], postings, data["lengths"])
+
+
+class KnowledgeStore:
+    """Knowledge indexes per worker process, keyed by campaign id.
+
+    The index for a campaign is built once from `fetch(campaign_id)` (a
+    dict with `items` and `version`) and kept in memory for every call of
+    that campaign; at most `max_entries` campaigns stay loaded. Built
+    indexes are also written to `cache_dir`, so a restarted worker loads
+    them from disk instead of fetching and building again. A different
+    `version` (the campaign's knowledge_version) replaces the index.
+    """
+
+    def __init__(self, fetch, cache_dir: str, max_entries: int = 32) -> None:
+        self.fetch = fetch
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.builds = 0
+        self.disk_loads = 0
+        self._indexes: OrderedDict[str, KnowledgeIndex] = OrderedDict()
+        self._pending: dict[tuple[str, str], asyncio.Future] = {}
+
+    def _path(self, campaign_id: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", campaign_id)
+        return os.path.join(self.cache_dir, f"{safe}.json")
+
+    def _read(self, campaign_id: str, version: str) -> KnowledgeIndex | None:
+        try:
+            with open(self._path(campaign_id), encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("format") != INDEX_FORMAT or data.get("version") != version:
+            return None
+        return KnowledgeIndex.from_dict(data)
+
+    def _write(self, campaign_id: str, index: KnowledgeIndex):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(campaign_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _store(self, campaign_id: str, index: KnowledgeIndex):
+        self._indexes[campaign_id] = index
+        self._indexes.move_to_end(campaign_id)
+        while len(self._indexes) > self.max_entries:
+            self._indexes.popitem(last=False)
+
+    async def get(self, campaign_id: str, version: str) -> KnowledgeIndex | None:
+        """Index for the campaign at `version`; None if it cannot be loaded."""
+        index = self._indexes.get(campaign_id)
+        if index is not None and index.version == version:
+            self._indexes.move_to_end(campaign_id)
+            self.hits += 1
+            return index
+        key = (campaign_id, version)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(campaign_id, version))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _load(self, campaign_id: str, version: str) -> KnowledgeIndex | None:
+        index = await asyncio.to_thread(self._read, campaign_id, version)
+        if index is not None:
+            self.disk_loads += 1
+        else:
+            try:
+                data = await self.fetch(campaign_id)
+            except Exception as e:
+                logger.warning(f"Wissensbasis fuer Kampagne {campaign_id} konnte nicht geladen werden: {e!r}")
+                return self._indexes.get(campaign_id)
+            index = await asyncio.to_thread(KnowledgeIndex.build, data.get("items") or [], version)
+            self.builds += 1
+            try:
+                await asyncio.to_thread(self._write, campaign_id, index)
+            except OSError as e:
+                logger.warning(f"Wissensindex konnte nicht gespeichert werden: {e}")
+            logger.info(f"Wissensindex Kampagne {campaign_id}: {len(index)} Abschnitte")
+        self._store(campaign_id, index)
+        return index
+
+    def stats(self) -> dict:
+        return {"entries": len(self._indexes), "hits": self.hits, "builds": self.builds, "disk_loads": self.disk_loads}
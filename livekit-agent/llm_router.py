@@ -0,0 +1,305 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import time
+from collections import deque
+
+from livekit.agents import APIConnectionError, llm
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions
+
+from turn_metrics import percentile
+
+logger = logging.getLogger("ColdCallAgent")
+
+# Consecutive failures before a provider is parked, and for how long
+FAILURE_LIMIT = 2
+COOLDOWN = 30.0
+
+# Provider health is per process, shared by every call routed here
+_health: dict = {}
+
+
+class ProviderHealth:
+    """Rolling time-to-first-token and error rate of one provider/model."""
+
+    def __init__(self, window: int = 20) -> None:
+        self.ttfts: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, ttft: float):
+        self.ttfts.append(ttft)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def record_slow(self, elapsed: float):
+        # Lost a hedge race without a token - elapsed is a lower bound for its TTFT
+        self.ttfts.append(elapsed)
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= FAILURE_LIMIT:
+            self.cooldown_until = time.time() + COOLDOWN
+
+    def ttft(self) -> float | None:
+        return percentile(sorted(self.ttfts), 50) if self.ttfts else None
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def healthy(self) -> bool:
+        if time.time() < self.cooldown_until:
+            return False
+        return len(self.outcomes) < 4 or self.error_rate() <= 0.5
+
+    def as_dict(self) -> dict:
+        return {
+            "ttfts": list(self.ttfts),
+            "outcomes": list(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+            "cooldown_until": self.cooldown_until,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, window: int = 20) -> "ProviderHealth":
+        health = cls(window)
+        health.ttfts.extend(data.get("ttfts", []))
+        health.outcomes.extend(data.get("outcomes", []))
+        health.consecutive_failures = data.get("consecutive_failures", 0)
+        health.cooldown_until = data.get("cooldown_until", 0.0)
+        return health
+
+
+class RoutingLLM(llm.LLM):
+    """Routes each LLM request to the fastest healthy provider.
+
+    `preferred` (the campaign's llmProvider) is used unless it is unhealthy
+    or its median TTFT is worse than the best alternative by `switch_margin`
+    seconds. If no token arrives within `hedge_after`, the next candidate is
+    started in parallel and the first to answer wins. A provider that fails
+    before sending anything is failed over to the next one. The chat context
+    travels with every request, so switching mid-call loses nothing.
+
+    Health is shared by all calls in the process and can be persisted to
+    `health_file` so the next job process starts with the same knowledge.
+    """
+
+    def __init__(
+        self,
+        llms: dict[str, llm.LLM],
+        preferred: str,
+        hedge_after: float = None,
+        attempt_timeout: float = 8.0,
+        switch_margin: float = 0.3,
+        health_file: str = None,
+    ) -> None:
+        super().__init__()
+        self.llms = llms
+        self.preferred = preferred
+        self.hedge_after = hedge_after
+        self.attempt_timeout = attempt_timeout
+        self.switch_margin = switch_margin
+        self.health_file = health_file
+        self.health = {name: _health.setdefault(name, ProviderHealth()) for name in llms}
+        self.served: dict[str, int] = {}
+        self.hedged = 0
+        self.failovers = 0
+        self._load_health()
+        for instance in llms.values():
+            instance.on("metrics_collected", self._forward_metrics)
+
+    def _forward_metrics(self, *args, **kwargs):
+        self.emit("metrics_collected", *args, **kwargs)
+
+    def order(self) -> list[str]:
+        names = list(self.llms)
+        healthy = [n for n in names if self.health[n].healthy()]
+        unhealthy = [n for n in names if n not in healthy]
+
+        def score(name: str) -> float:
+            ttft = self.health[name].ttft()
+            # Unknown providers neither win nor lose on speed
+            score = ttft if ttft is not None else (self.health[self.preferred].ttft() or 0.0)
+            return score - (self.switch_margin if name == self.preferred else 0.0)
+
+        healthy.sort(key=score)
+        return healthy + unhealthy
+
+    @property
+    def model(self) -> str:
+        return self.llms[self.order()[0]].model
+
+    @property
+    def provider(self) -> str:
+        return self.llms[self.order()[0]].provider
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs,
+    ) -> "RoutingLLMStream":
+        return RoutingLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options, chat_kwargs=kwargs)
+
+    def prewarm(self, **kwargs):
+        self.llms[self.order()[0]].prewarm(**kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "served": dict(self.served),
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            "ttft_ms": {n: round(h.ttft() * 1000) for n, h in self.health.items() if h.ttft() is not None},
+            "error_rate": {n: round(h.error_rate(), 2) for n, h in self.health.items() if h.outcomes},
+        }
+
+    def _load_health(self):
+        if not self.health_file:
+            return
+        try:
+            with open(self.health_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, entry in data.items():
+            # Only seed providers this process has not measured itself yet
+            if name in self.health and not self.health[name].outcomes:
+                self.health[name] = _health[name] = ProviderHealth.from_dict(entry)
+
+    def save_health(self):
+        if not self.health_file:
+            return
+        try:
+            tmp = f"{self.health_file}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({n: h.as_dict() for n, h in self.health.items()}, f)
+            os.replace(tmp, self.health_file)
+        except OSError as e:
+            logger.debug(f"Could not save LLM health: {e}")
+
+    async def aclose(self):
+        for instance in self.llms.values():
+            instance.off("metrics_collected", self._forward_metrics)
+            await instance.aclose()
+
+
+class _Attempt:
+    """One provider request; chunks are buffered until the attempt wins the race."""
+
+    def __init__(self, name: str, stream_ctx) -> None:
+        self.name = name
+        self.started = time.perf_counter()
+        self.ttft: float | None = None
+        self.error: Exception | None = None
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.ready = asyncio.Event()
+        self.finished = False
+        self.task = asyncio.create_task(self._run(stream_ctx))
+
+    async def _run(self, stream_ctx):
+        try:
+            async with stream_ctx as stream:
+                async for chunk in stream:
+                    if self.ttft is None:
+                        self.ttft = time.perf_counter() - self.started
+                        self.ready.set()
+                    self.chunks.put_nowait(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            self.chunks.put_nowait(None)
+            self.ready.set()
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class RoutingLLMStream(llm.LLMStream):
+    def __init__(self, router: RoutingLLM, *, chat_ctx, tools, conn_options, chat_kwargs) -> None:
+        super().__init__(router, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._router = router
+        self._chat_kwargs = {k: v for k, v in chat_kwargs.items() if v is not NOT_GIVEN}
+
+    def _start(self, name: str) -> _Attempt:
+        stream_ctx = self._router.llms[name].chat(
+            chat_ctx=self._chat_ctx,
+            tools=self._tools,
+            conn_options=dataclasses.replace(self._conn_options, max_retry=0, timeout=self._router.attempt_timeout),
+            **self._chat_kwargs,
+        )
+        return _Attempt(name, stream_ctx)
+
+    async def _run(self) -> None:
+        router = self._router
+        candidates = router.order()
+        if not router.health[candidates[0]].healthy():
+            logger.error("All LLM providers are unhealthy, trying anyway")
+        attempts = [self._start(candidates.pop(0))]
+        try:
+            await self._race(attempts, candidates)
+        finally:
+            for attempt in attempts:
+                if not attempt.finished:
+                    attempt.cancel()
+
+    async def _race(self, attempts: list[_Attempt], candidates: list[str]):
+        router = self._router
+        winner = None
+
+        while winner is None:
+            live = [a for a in attempts if not (a.finished and a.ttft is None)]
+            hedge_deadline = None
+            if router.hedge_after and candidates and len(live) == 1:
+                hedge_deadline = max(0.0, router.hedge_after - (time.perf_counter() - live[0].started))
+            waiters = {asyncio.ensure_future(a.ready.wait()): a for a in live}
+            done, pending = await asyncio.wait(waiters, timeout=hedge_deadline, return_when=asyncio.FIRST_COMPLETED)
+            for w in pending:
+                w.cancel()
+
+            if not done:
+                name = candidates.pop(0)
+                logger.warning(f"LLM {live[0].name}: no token after {router.hedge_after:.1f}s, hedging with {name}")
+                router.hedged += 1
+                attempts.append(self._start(name))
+                continue
+
+            for w in done:
+                attempt = waiters[w]
+                if attempt.ttft is not None:
+                    winner = attempt
+                    break
+                # Finished without a single chunk: failed (or empty) - fail over
+                router.health[attempt.name].record_failure()
+                logger.warning(f"LLM {attempt.name} failed before first token: {attempt.error}")
+
+            if winner is None and not any(not a.finished for a in attempts):
+                if not candidates:
+                    raise APIConnectionError(f"all LLM providers failed ({', '.join(a.name for a in attempts)})")
+                router.failovers += 1
+                attempts.append(self._start(candidates.pop(0)))
+
+        for attempt in attempts:
+            if attempt is not winner and not attempt.finished:
+                router.health[attempt.name].record_slow(time.perf_counter() - attempt.started)
+                attempt.cancel()
+
+        router.served[winner.name] = router.served.get(winner.name, 0) + 1
+        while (chunk := await winner.chunks.get()) is not None:
+            self._event_ch.send_nowait(chunk)
+        if winner.error is not None:
+            # Text already went to TTS - retrying elsewhere would repeat it
+            router.health[winner.name].record_failure()
+            raise winner.error
+        router.health[winner.name].record_success(winner.ttft)
+
+    async def _metrics_monitor_task(self, event_aiter):
+        # The provider streams emit their own metrics (forwarded by RoutingLLM)
+        async for _ in event_aiter:
+            pass
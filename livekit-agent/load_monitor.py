@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import prometheus_client
+import psutil
+from livekit.agents.utils.hw import get_cpu_monitor
+
+from turn_metrics import percentile
+
+logger = logging.getLogger("ColdCallAgent")
+
+LOOP_LAG = prometheus_client.Gauge(
+    "coldcall_event_loop_lag_seconds",
+    "p95 event-loop lag of a job process over the last window",
+    multiprocess_mode="livemax",
+)
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up compared to the scheduled tick.
+
+    Audio frames are 10-20ms; once the loop runs tens of milliseconds late,
+    callers hear it. The p95 over the window is exported as a gauge and
+    written to `report_dir/<pid>` so the worker's load function can see it.
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 50, report_dir: str = None) -> None:
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=window)
+        self.report_dir = report_dir
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def p95(self) -> float:
+        return percentile(sorted(self.samples), 95)
+
+    async def _run(self):
+        ticks = 0
+        while True:
+            scheduled = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - scheduled))
+            ticks += 1
+            if ticks % 10 == 0:
+                self._publish()
+
+    def _publish(self):
+        lag = self.p95()
+        LOOP_LAG.set(lag)
+        if not self.report_dir:
+            return
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            path = os.path.join(self.report_dir, str(os.getpid()))
+            with open(f"{path}.tmp", "w") as f:
+                f.write(f"{lag:.4f}")
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.debug(f"Could not write loop lag report: {e}")
+
+
+def read_loop_lag(report_dir: str) -> float:
+    """Worst reported lag across live job processes; stale reports are removed."""
+    try:
+        names = os.listdir(report_dir)
+    except FileNotFoundError:
+        return 0.0
+    worst = 0.0
+    for name in names:
+        if not name.isdigit():
+            continue
+        path = os.path.join(report_dir, name)
+        if not psutil.pid_exists(int(name)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                worst = max(worst, float(f.read() or 0))
+        except (OSError, ValueError):
+            continue
+    return worst
+
+
+class WorkerLoad:
+    """Load function and admission check for the AgentServer.
+
+    Load is the highest of three ratios: CPU (container-aware, averaged like
+    the framework default), occupied session slots, and job-process loop lag
+    against `max_loop_lag`. Admission additionally projects the CPU of one
+    more call from the measured CPU per running session, so a worker says no
+    before a new call pushes everyone over the edge.
+    """
+
+    def __init__(self, max_sessions: int, max_loop_lag: float, threshold: float, lag_dir: str) -> None:
+        self.max_sessions = max_sessions
+        self.max_loop_lag = max_loop_lag
+        self.threshold = threshold
+        self.lag_dir = lag_dir
+        self._cpu_monitor = get_cpu_monitor()
+        self._cpu_samples: deque[float] = deque(maxlen=5)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def _sample_cpu(self):
+        while True:
+            value = self._cpu_monitor.cpu_percent(interval=0.5)
+            with self._lock:
+                self._cpu_samples.append(value)
+
+    def cpu(self) -> float:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample_cpu, daemon=True, name="coldcall_cpu_load")
+            self._thread.start()
+        with self._lock:
+            return sum(self._cpu_samples) / len(self._cpu_samples) if self._cpu_samples else 0.0
+
+    def snapshot(self, sessions: int) -> dict:
+        cpu = self.cpu()
+        return {
+            "sessions": sessions,
+            "cpu": cpu,
+            "cpu_per_session": cpu / sessions if sessions else 0.0,
+            "loop_lag": read_loop_lag(self.lag_dir),
+        }
+
+    def __call__(self, server) -> float:
+        s = self.snapshot(len(server.active_jobs))
+        return min(1.0, max(
+            s["cpu"],
+            s["sessions"] / self.max_sessions if self.max_sessions else 0.0,
+            s["loop_lag"] / self.max_loop_lag if self.max_loop_lag else 0.0,
+        ))
+
+    def admit(self, server) -> tuple[bool, str]:
+        s = self.snapshot(len(server.active_jobs))
+        if self.max_sessions and s["sessions"] >= self.max_sessions:
+            return False, f"{s['sessions']}/{self.max_sessions} sessions"
+        if self.max_loop_lag and s["loop_lag"] >= self.max_loop_lag * self.threshold:
+            return False, f"loop lag {s['loop_lag'] * 1000:.0f}ms"
+        projected = s["cpu"] + s["cpu_per_session"]
+        if projected >= self.threshold:
+            return False, f"CPU {s['cpu']:.0%} + {s['cpu_per_session']:.0%} per session"
+        return True, ""
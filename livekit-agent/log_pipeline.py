@@ -0,0 +1,177 @@
+import contextvars
+import logging
+import queue
+import re
+import threading
+import time
+
+# Per-call log fields, set once in the job's entrypoint; tasks created afterwards inherit them
+_call_fields: contextvars.ContextVar[dict] = contextvars.ContextVar("call_log_fields", default={})
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# +49 / 0049 / 0151 ... with at least 8 digits; dates and ids do not start like that
+PHONE_RE = re.compile(r"(?<![\w.-])(?:\+|0)\d[\d /-]{6,}\d")
+# Name parts shorter than this are not redacted on their own ("Li", "Bo" are too common)
+MIN_NAME_PART = 3
+
+
+def set_call_fields(call_log_id: str = None, lead_name: str = None, lead_email: str = None, lead_phone: str = None):
+    """Tags every record logged from this call's tasks with call_log_id and redacts its lead data."""
+    secrets = []
+    if lead_name:
+        parts = [p for p in lead_name.split() if len(p) >= MIN_NAME_PART]
+        secrets.extend(sorted({lead_name, *parts}, key=len, reverse=True))
+    secrets.extend(s for s in (lead_email, lead_phone) if s)
+    _call_fields.set({"call_log_id": call_log_id or "", "secrets": tuple(secrets)})
+
+
+def redact(text: str, secrets: tuple = ()) -> str:
+    # Addresses first, so a name part inside an address does not break the e-mail pattern
+    text = PHONE_RE.sub("[Telefon]", EMAIL_RE.sub("[E-Mail]", text))
+    for secret in secrets:
+        text = re.sub(rf"(?<!\w){re.escape(secret)}(?!\w)", "[Lead]", text, flags=re.IGNORECASE)
+    return text
+
+
+class _EnqueueHandler(logging.Handler):
+    """Runs on the logging thread (usually the event loop): rate limit and enqueue, nothing else."""
+
+    def __init__(self, pipeline: "LogPipeline") -> None:
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # No handler lock: put_nowait is thread-safe and there is no I/O here
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        pipeline = self.pipeline
+        fields = _call_fields.get()
+        record.call_log_id = fields.get("call_log_id", "")
+        event = getattr(record, "event", None)
+        if event is not None and record.levelno < logging.WARNING and not pipeline.allow((record.call_log_id, event), record):
+            return
+        record.lead_secrets = fields.get("secrets", ())
+        try:
+            pipeline.queue.put_nowait(record)
+        except queue.Full:
+            pipeline.dropped += 1
+
+
+class LogPipeline:
+    """Off-loop logging for the per-call logger.
+
+    Records go to a bounded queue as they are (message arguments not yet
+    formatted); a background thread formats them, redacts lead PII
+    (known name/e-mail/phone of the call plus any e-mail address or phone
+    number) and hands them to `targets`, the handlers that were on the
+    root logger (in a job process the IPC handler to the worker). Records
+    with an `event` extra are rate limited per call and event to `rate` per second
+    with bursts of `burst`; the next record of that event that gets
+    through carries the number suppressed before it. Warnings and errors
+    are never limited. When the queue is full records are dropped and
+    counted instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        targets: list[logging.Handler],
+        max_queued: int = 10000,
+        rate: float = 5.0,
+        burst: int = 20,
+        redact_pii: bool = True,
+    ) -> None:
+        self.targets = targets
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self.rate = rate
+        self.burst = burst
+        self.redact_pii = redact_pii
+        self.handler = _EnqueueHandler(self)
+        self.emitted = 0
+        self.dropped = 0
+        self.suppressed_total = 0
+        self._buckets: dict[tuple, list] = {}
+        self._reported_drops = 0
+        self._thread: threading.Thread | None = None
+
+    def allow(self, key: tuple, record: logging.LogRecord) -> bool:
+        # Token bucket per (call_log_id, event): [tokens, last refill, suppressed since last pass]
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now, 0]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            self.suppressed_total += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+    def install(self, logger: logging.Logger):
+        logger.handlers = [self.handler]
+        logger.propagate = False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="log-pipeline")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._emit(item)
+            except Exception:
+                # Never let one bad record stop the thread
+                pass
+            if self.dropped != self._reported_drops:
+                dropped, self._reported_drops = self.dropped - self._reported_drops, self.dropped
+                self._emit(logging.makeLogRecord({
+                    "name": "ColdCallAgent",
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"{dropped} Log-Eintraege verworfen (Queue voll)",
+                }))
+
+    def _emit(self, record: logging.LogRecord):
+        secrets = record.__dict__.pop("lead_secrets", ())
+        message = record.getMessage()
+        if self.redact_pii:
+            message = redact(message, secrets)
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            if record.exc_text:
+                record.exc_text = redact(record.exc_text, secrets)
+        record.msg, record.args = message, None
+        for handler in self.targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        self.emitted += 1
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Blocks until everything queued so far is handed to the targets (call off the event loop)."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self) -> dict:
+        return {"emitted": self.emitted, "suppressed": self.suppressed_total, "dropped": self.dropped}
+
+
+def install_log_pipeline(logger_name: str = "ColdCallAgent", **options) -> LogPipeline:
+    """Puts the pipeline in front of the root logger's current handlers for `logger_name`."""
+    pipeline = LogPipeline(list(logging.getLogger().handlers), **options)
+    pipeline.install(logging.getLogger(logger_name))
+    return pipeline
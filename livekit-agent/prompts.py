@@ -0,0 +1,136 @@
+import hashlib
+from functools import lru_cache
+
+# Layout: static prefix -> campaign section -> lead section.
+# The static prefix is byte-identical for every call, so provider-side prefix
+# caching (OpenAI / xAI) can reuse it; never interpolate per-call values into it.
+
+HUMAN_SPEECH = """
+SPRACHSTIL - EXTREM WICHTIG:
+Du sprichst wie ein ECHTER Mensch am Telefon, NICHT wie eine KI.
+
+Fuellwoerter und Denkpausen IMMER einbauen:
+- Satzanfaenge: Also, Na ja, Hmm, Weisst du, Ach
+- Beim Ueberlegen: Lass mich kurz ueberlegen, Moment
+- Bestaetigung: Mhm, Ja genau, Oh, Ach so
+- Unsicherheit: Ich glaub, Vielleicht, Koennte sein
+
+Emotionale Reaktionen mit Tags:
+- Freude: [laugh] oder [chuckle]
+- Ueberraschung: [gasp] oder Oh!
+- Nachdenklich: [sigh] mit Hmm
+- Pausen: [pause: 0.3s] oder [pause: 0.5s]
+
+Satzstruktur variieren:
+- Kurz: Ja klar! Oh nice! Verstehe!
+- Mittel: Ach so, das ist ja cool!
+- Lang: Also weisst du, das find ich echt interessant
+
+REGELN:
+1. JEDE Antwort mindestens 1 Fuellwort
+2. Bei laengeren Antworten [pause] Tags einbauen
+3. Emotionen zeigen wo passend
+4. Abkuerzungen: nen statt einen, grad statt gerade
+"""
+
+# Spelled addresses are parsed locally (email_parser); the LLM only gets a hint with the result
+EMAIL_INSTRUCTIONS = """
+E-MAIL ADRESSEN:
+Gesagte Adressen werden automatisch erkannt ("Erkannte E-Mail: ..." im Kontext).
+1. Wiederhole die erkannte Adresse IMMER zur Bestaetigung
+2. Nach Bestaetigung save_email_address mit genau dieser Adresse aufrufen
+Ohne Erkennung: at/Klammeraffe = @, punkt = . - bei Unsicherheit buchstabieren lassen (M wie Martha...).
+
+Beispiel:
+Du: "Also max punkt mustermann at gmail punkt com, richtig? [pause: 0.3s] Ich schreib mir das grad auf."
+"""
+
+# Details live in the campaign's knowledge base (lookup_knowledge), not in the prompt
+KNOWLEDGE_INSTRUCTIONS = """
+DETAILFRAGEN:
+Bei Fragen zu Preisen, Funktionen, Ablauf oder Bedingungen lookup_knowledge aufrufen statt zu raten.
+Nichts gefunden: ehrlich sagen und anbieten, die Info per E-Mail nachzureichen.
+"""
+
+# Spoken while a tool waits on a slow action, so the caller does not hear dead air
+ACTION_FILLERS = {
+    "send_email": "Moment, ich schick Ihnen das grad raus...",
+    "send_meeting_link": "Sekunde, ich leg den Termin grad an...",
+    "schedule_callback": "Moment, ich trag das grad ein...",
+}
+DEFAULT_FILLER = "Einen Moment bitte..."
+
+# Tool result when an action missed its deadline and finishes after the call
+DEFERRED_ACTION_RESULT = (
+    "Dauert gerade etwas laenger und wird direkt nach dem Gespraech erledigt. "
+    "Sag das dem Kunden kurz (z.B. \"Ich schick's Ihnen direkt nach dem Gespraech\") und mach normal weiter."
+)
+
+OUTPUT_FORMAT = """
+Output Format:
+- NUR Text der gesprochen wird
+- Kein JSON, kein Markdown
+- Kurze Saetze, 1-3 pro Antwort
+- IMMER auf Deutsch
+"""
+
+STATIC_PREFIX = f"""Du bist ein Telefonassistent, der ausgehende und eingehende Anrufe fuehrt.
+{HUMAN_SPEECH}
+{EMAIL_INSTRUCTIONS}
+{KNOWLEDGE_INSTRUCTIONS}
+{OUTPUT_FORMAT}"""
+
+
+@lru_cache(maxsize=256)
+def compile_campaign_prompt(ai_name, company_name, ai_personality, ai_greeting, product_description, call_goal, custom_prompt) -> tuple[str, str]:
+    """Static prefix + campaign section, memoized per campaign settings.
+
+    Returns the prompt text and a short hash of it that is used as the
+    provider prompt cache key.
+    """
+    name_str = ai_name if ai_name else "ein freundlicher Mitarbeiter"
+    company_str = company_name if company_name else "unserem Team"
+    personality_str = ai_personality if ai_personality else "Locker, freundlich, wie ein guter Freund."
+    greeting_str = f'Sage so aehnlich wie: {ai_greeting}' if ai_greeting else "Begruesse locker und natuerlich."
+    product_str = product_description if product_description else "Allgemeines Gespraech"
+    goal_str = call_goal if call_goal else "Nettes Gespraech fuehren"
+    custom_str = custom_prompt if custom_prompt else ""
+
+    text = f"""{STATIC_PREFIX}
+# Kampagne
+Du bist {name_str} von {company_str}.
+
+Deine Persoenlichkeit:
+{personality_str}
+
+Begruessung:
+{greeting_str}
+
+Produkt/Thema: {product_str}
+Ziel: {goal_str}
+
+Zusaetzliche Anweisungen:
+{custom_str}
+"""
+    return text, hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def build_lead_section(lead_name, lead_company, lead_notes) -> str:
+    lead_name_str = lead_name if lead_name else "Unbekannt"
+    lead_company_str = lead_company if lead_company else "Unbekannt"
+    lead_notes_str = lead_notes if lead_notes else "Keine"
+
+    return f"""
+Gespraechspartner:
+Name: {lead_name_str}
+Firma: {lead_company_str}
+Notizen: {lead_notes_str}
+"""
+
+
+def build_instructions(ai_name, company_name, ai_personality, ai_greeting, lead_name, lead_company, lead_notes, product_description, call_goal, custom_prompt) -> tuple[str, str]:
+    campaign_prompt, prompt_key = compile_campaign_prompt(
+        ai_name, company_name, ai_personality, ai_greeting,
+        product_description, call_goal, custom_prompt,
+    )
+    return campaign_prompt + build_lead_section(lead_name, lead_company, lead_notes), prompt_key
@@ -0,0 +1,34 @@
+import functools
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger("ColdCallAgent")
+
+
+def plugin_module(name: str) -> str:
+    return f"livekit.plugins.{name}"
+
+
+@functools.cache
+def plugin(name: str):
+    """livekit.plugins.<name>, imported on first use and cached for the process.
+
+    Plugins register themselves with livekit on import, which only works on
+    the main thread - load them in prewarm (or via the forkserver preload)
+    before a job thread asks for them.
+    """
+    module_name = plugin_module(name)
+    if module_name not in sys.modules and threading.current_thread() is not threading.main_thread():
+        raise RuntimeError(f"Plugin {name} nicht vorgeladen, Import nur im Main-Thread moeglich")
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    logger.debug("Plugin %s geladen (%.0fms)", name, (time.perf_counter() - started) * 1000)
+    return module
+
+
+def load_plugins(names) -> dict:
+    """Imports the given plugins (main thread) and returns them by name."""
+    return {name: plugin(name) for name in dict.fromkeys(names)}
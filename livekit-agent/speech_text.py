@@ -0,0 +1,226 @@
+import re
+from typing import AsyncIterable
+
+from livekit.agents.tokenize import SentenceStream, SentenceTokenizer, token_stream
+
+# Abbreviations whose period does not end a sentence (lowercase, without the final period)
+ABBREVIATIONS = {
+    "z.b", "z.t", "d.h", "u.a", "o.ä", "u.ä", "u.u", "i.d.r", "s.o", "s.u",
+    "ca", "bzw", "usw", "etc", "evtl", "ggf", "inkl", "exkl", "zzgl", "bspw", "vgl",
+    "dr", "prof", "hr", "fr", "nr", "tel", "str", "abt", "gmbh", "co", "mwst",
+    "mio", "mrd", "tsd", "std", "min", "max", "sek", "jh", "jhd",
+    "jan", "feb", "mär", "apr", "jun", "jul", "aug", "sep", "sept", "okt", "nov", "dez",
+}
+MONTHS = {
+    "januar", "februar", "märz", "maerz", "april", "mai", "juni", "juli",
+    "august", "september", "oktober", "november", "dezember",
+}
+
+# Candidate cut points; a cut only happens where whitespace follows
+_BOUNDARY_RE = re.compile(r"(\.{3}|…|[.!?]+)[\"'»«“”)]*(?=\s)|[,;:](?=\s)|\s[–—-](?=\s)|<break[^>]*/>(?=\s)|\n")
+_WORD_BEFORE_RE = re.compile(r"(\S+)\.$")
+_WORD_AFTER_RE = re.compile(r"\s*[\"'»«“”(]*(\S+)")
+
+
+def _is_abbreviation(text: str, end: int) -> bool:
+    """Whether the single period ending at text[end - 1] belongs to a word, not a sentence."""
+    match = _WORD_BEFORE_RE.search(text, 0, end)
+    if not match:
+        return False
+    word = match.group(1).lstrip("\"'»«“”(").lower()
+    # Dotted letter groups ("z.B", "u.s.w"), not numbers like "2.0" or "3.10"
+    if word in ABBREVIATIONS or re.fullmatch(r"(?!\d+(\.\d+)+$)\w(\.\w)+", word) or re.fullmatch(r"[^\W\d]", word):
+        return True
+    if word.isdigit() or re.fullmatch(r"\d+(\.\d+)+", word):
+        # "am 3. Oktober", "zum 2. mal", "am 3.10. um" - ordinal/date, the sentence goes on
+        after = _WORD_AFTER_RE.match(text, end)
+        if not after or after.end() == len(text):
+            # Next word not (completely) streamed in yet - wait for it
+            return True
+        following = after.group(1).strip(".,;:!?")
+        return following[:1].islower() or following.lower() in MONTHS
+    return False
+
+
+def split_speech(text: str, min_clause_len: int = 20) -> list[tuple[str, int, int]]:
+    """Cut German text into speakable pieces.
+
+    Sentence ends, ellipses, newlines and pause breaks always cut; commas,
+    semicolons, colons and dashes only once the piece is `min_clause_len`
+    long, so "Hmm, ja" stays together but long clauses go to TTS early.
+    """
+    pieces: list[tuple[str, int, int]] = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        boundary = match.group(0)
+        if boundary in (",", ";", ":") or boundary.lstrip() in ("–", "—", "-"):
+            if len(text[start:end].strip()) < min_clause_len:
+                continue
+        elif boundary.rstrip("\"'»«“”)") == "." and _is_abbreviation(text, match.start() + 1):
+            continue
+        piece = text[start:end].strip()
+        if piece:
+            pieces.append((piece, start, end))
+            start = end
+    if start < len(text) and text[start:].strip():
+        pieces.append((text[start:].strip(), start, len(text)))
+    return pieces
+
+
+class GermanSentenceTokenizer(SentenceTokenizer):
+    """Sentence tokenizer for streaming LLM output into TTS.
+
+    Unlike the default sentence splitter it knows German abbreviations and
+    ordinals ("z.B.", "ca.", "am 3. Oktober") and also cuts at clause
+    boundaries, so the first audio of a reply starts after the first clause
+    instead of the first full sentence. Pieces shorter than
+    `min_sentence_len` ("Ja.") are merged into the next one.
+    """
+
+    def __init__(self, min_sentence_len: int = 8, min_clause_len: int = 20, stream_context_len: int = 8) -> None:
+        self.min_sentence_len = min_sentence_len
+        self.min_clause_len = min_clause_len
+        self.stream_context_len = stream_context_len
+
+    def _split(self, text: str) -> list[tuple[str, int, int]]:
+        return split_speech(text, self.min_clause_len)
+
+    def tokenize(self, text: str, *, language: str | None = None) -> list[str]:
+        merged: list[str] = []
+        for piece, _, _ in self._split(text):
+            if merged and len(merged[-1]) < self.min_sentence_len:
+                merged[-1] = f"{merged[-1]} {piece}"
+            else:
+                merged.append(piece)
+        return merged
+
+    def stream(self, *, language: str | None = None) -> SentenceStream:
+        return token_stream.BufferedSentenceStream(
+            tokenizer=self._split,
+            min_token_len=self.min_sentence_len,
+            min_ctx_len=self.stream_context_len,
+        )
+
+
+MAX_TAG_LEN = 24
+DEFAULT_PAUSE_MS = 300
+# Cartesia sonic-3 controls for the tags the prompt asks the LLM for
+TTS_TAGS = {
+    "laugh": "[laughter]",
+    "chuckle": "[laughter]",
+    "laughter": "[laughter]",
+}
+# Tags from the prompt without a TTS control - dropped instead of spoken
+DROPPED_TAGS = {"gasp", "sigh", "breath", "cough"}
+# Only this vocabulary counts as a tag ([laugh], [pause: 0.3s], ...); other bracketed text ("[netto]") stays
+_TAG_RE = re.compile(
+    r"\[\s*(" + "|".join(sorted({"pause", *TTS_TAGS, *DROPPED_TAGS})) + r")\s*(?::\s*([\d.,]+)\s*(ms|s)?\s*)?\]",
+    re.IGNORECASE,
+)
+
+
+def _pause_ms(value: str | None, unit: str | None) -> int:
+    if not value:
+        return DEFAULT_PAUSE_MS
+    try:
+        amount = float(value.replace(",", "."))
+    except ValueError:
+        return DEFAULT_PAUSE_MS
+    ms = amount if unit == "ms" else amount * 1000
+    return int(min(2000, max(100, ms)))
+
+
+def tts_tag(tag: str) -> str:
+    """Replacement for one inline tag in the text sent to TTS."""
+    match = _TAG_RE.fullmatch(tag)
+    if not match:
+        return tag
+    name = match.group(1).lower()
+    if name == "pause":
+        return f'<break time="{_pause_ms(match.group(2), match.group(3))}ms"/>'
+    return TTS_TAGS.get(name, "")
+
+
+class SpeechTagFilter:
+    """Rewrites inline tags in streamed text.
+
+    Text is passed through as it arrives; only from an unclosed "[" on is it
+    held back, until the tag is complete or clearly is not a tag. `replace`
+    maps a complete tag to its replacement ("" removes it).
+    """
+
+    def __init__(self, replace=tts_tag) -> None:
+        self.replace = replace
+        self._buf = ""
+        self._skip_space = False
+        self._space_before_word = False
+        self._last = ""
+
+    def _emit(self, out: list[str], text: str):
+        if self._skip_space:
+            text = text.lstrip(" ")
+            if not text:
+                return
+            self._skip_space = False
+        if self._space_before_word and text:
+            # "Hallo[laugh]du" -> "Hallo du"
+            if text[0].isalnum():
+                text = " " + text
+            self._space_before_word = False
+        if text:
+            out.append(text)
+            self._last = text[-1]
+
+    def push(self, text: str) -> str:
+        self._buf += text
+        out: list[str] = []
+        while self._buf:
+            i = self._buf.find("[")
+            if i < 0:
+                self._emit(out, self._buf)
+                self._buf = ""
+                break
+            self._emit(out, self._buf[:i])
+            self._buf = self._buf[i:]
+            j = self._buf.find("]")
+            if j < 0:
+                if len(self._buf) <= MAX_TAG_LEN:
+                    break
+                # Too long for a tag - plain bracket
+                self._emit(out, self._buf[0])
+                self._buf = self._buf[1:]
+                continue
+            tag, self._buf = self._buf[: j + 1], self._buf[j + 1 :]
+            if not _TAG_RE.fullmatch(tag):
+                self._emit(out, tag)
+                continue
+            replacement = self.replace(tag)
+            if replacement:
+                self._emit(out, replacement)
+            elif not self._last or self._last.isspace():
+                # "Super [laugh] das" -> "Super das"
+                self._skip_space = True
+            elif self._last.isalnum():
+                self._space_before_word = True
+        return "".join(out)
+
+    def flush(self) -> str:
+        out: list[str] = []
+        self._emit(out, self._buf)
+        self._buf = ""
+        return "".join(out)
+
+
+def strip_tags(text: str) -> str:
+    tag_filter = SpeechTagFilter(replace=lambda tag: "")
+    return (tag_filter.push(text) + tag_filter.flush()).strip()
+
+
+async def filter_tags(text: AsyncIterable[str], replace=tts_tag) -> AsyncIterable[str]:
+    tag_filter = SpeechTagFilter(replace)
+    async for delta in text:
+        if out := tag_filter.push(delta):
+            yield out
+    if rest := tag_filter.flush():
+        yield rest
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+
+logger = logging.getLogger("ColdCallAgent")
+
+# Actions that can be re-sent safely when the first attempt may already have reached the server
+# (not update_lead_status/add_note: the server appends the note to the lead on every request)
+IDEMPOTENT_ACTIONS = {"update_lead_email", "schedule_callback", "get_campaign_config", "get_campaign_knowledge", "create_recording_upload", "save_recording"}
+
+# HTTP statuses worth retrying (gateway hiccups / rate limit), everything else is final
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ActionStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float, ok: bool):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class SupabaseClient:
+    """Shared HTTP client for the Supabase edge functions.
+
+    One instance per worker process: the aiohttp session keeps a keep-alive
+    connection pool so tool calls during a conversation skip DNS/TCP/TLS setup.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 10.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        pool_size: int = 20,
+        agent_secret: str = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.agent_secret = agent_secret
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.pool_size = pool_size
+        self.stats: dict[str, ActionStats] = {}
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
+            if self.agent_secret:
+                # Unlocks the agent-only actions (campaign settings, knowledge, recordings)
+                headers["X-Agent-Secret"] = self.agent_secret
+            self._session = aiohttp.ClientSession(connector=connector, headers=headers)
+            self._loop = loop
+        return self._session
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.backoff_base * (2 ** (attempt - 1)))
+
+    async def post(
+        self,
+        function: str,
+        payload: dict,
+        *,
+        idempotent: bool = False,
+        timeout: float = None,
+        stats_key: str = None,
+    ) -> dict:
+        stats = self.stats.setdefault(stats_key or function, ActionStats())
+        url = f"{self.base_url}/functions/v1/{function}"
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        attempts = self.max_retries + 1
+        started = time.perf_counter()
+        result = None
+
+        for attempt in range(attempts):
+            if attempt:
+                stats.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+            last_attempt = attempt == attempts - 1
+            try:
+                async with self._get_session().post(url, json=payload, timeout=client_timeout) as resp:
+                    if resp.status in RETRY_STATUSES and idempotent and not last_attempt:
+                        logger.warning(f"Supabase {function} returned {resp.status}, retrying")
+                        continue
+                    try:
+                        result = await resp.json(content_type=None)
+                    except ValueError:
+                        result = None
+                    if not isinstance(result, dict):
+                        result = {"success": False, "error": f"HTTP {resp.status}"}
+                    break
+            except aiohttp.ClientConnectorError as e:
+                # Nothing was sent yet, so even non-idempotent actions can be retried
+                result = {"success": False, "error": str(e), "transport_error": True, "connect_error": True}
+                if last_attempt:
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # The request may have reached the server - only transport_error, no connect_error
+                result = {"success": False, "error": str(e) or type(e).__name__, "transport_error": True}
+                if not idempotent or last_attempt:
+                    break
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+                break
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        stats.record(latency_ms, bool(result.get("success")))
+        return result
+
+    async def action(self, action: str, data: dict, timeout: float = None) -> dict:
+        return await self.post(
+            "agent-actions",
+            {"action": action, "data": data},
+            idempotent=action in IDEMPOTENT_ACTIONS,
+            timeout=timeout,
+            stats_key=action,
+        )
+
+    async def upload(self, url: str, data: bytes, content_type: str, timeout: float = None) -> bool:
+        """PUTs a file to a signed Storage upload URL (no retries, the caller keeps the file)."""
+        stats = self.stats.setdefault("upload", ActionStats())
+        started = time.perf_counter()
+        ok = False
+        try:
+            async with self._get_session().put(
+                url,
+                data=data,
+                headers={"Content-Type": content_type, "x-upsert": "true"},
+                timeout=aiohttp.ClientTimeout(total=timeout or self.timeout),
+            ) as resp:
+                ok = resp.status < 300
+                if not ok:
+                    logger.warning(f"Storage upload returned {resp.status}: {(await resp.text())[:200]}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Storage upload failed: {e!r}")
+        stats.record((time.perf_counter() - started) * 1000, ok)
+        return ok
+
+    def stats_snapshot(self) -> dict:
+        return {key: stats.as_dict() for key, stats in self.stats.items()}
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
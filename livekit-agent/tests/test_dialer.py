@@ -0,0 +1,46 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dialer import CampaignDialer, Trunk  # noqa: E402
+
+
+class StubRoomService:
+    """LiveKit room API: every created room reports an ended call on the next poll."""
+
+    def __init__(self):
+        self.created = []
+
+    async def create_room(self, request):
+        self.created.append(request.name)
+
+    async def list_rooms(self, request):
+        rooms = [SimpleNamespace(name=name, metadata=json.dumps({"dial_status": "ended"})) for name in request.names]
+        return SimpleNamespace(rooms=rooms)
+
+    async def delete_room(self, request):
+        pass
+
+
+class CampaignDialerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_short_lead_list_on_one_slot(self):
+        rooms = StubRoomService()
+        dialer = CampaignDialer(SimpleNamespace(room=rooms), [Trunk("ST_test", 1, 20.0)], poll_interval=0.01)
+        for i in range(3):
+            dialer.add({"phone_number": f"+49301000000{i}"})
+
+        summary = await asyncio.wait_for(dialer.run(), 5)
+
+        self.assertEqual(len(rooms.created), 3)
+        self.assertEqual(summary["dispatched"], 3)
+        self.assertEqual(summary["outcomes"], {"answered": 3})
+        self.assertEqual(summary["peak_per_trunk"], {"ST_test": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
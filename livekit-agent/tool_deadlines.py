@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from turn_metrics import ACTION_LATENCY, LatencyStats
+
+logger = logging.getLogger("ColdCallAgent")
+
+
+def parse_deadlines(spec: str) -> dict[str, float]:
+    # "send_email=6,schedule_callback=5"
+    deadlines = {}
+    for part in spec.split(","):
+        name, _, seconds = part.partition("=")
+        if name.strip() and seconds.strip():
+            deadlines[name.strip()] = float(seconds)
+    return deadlines
+
+
+class ActionDeadlines:
+    """Latency budgets for the agent-actions a tool has to wait for.
+
+    run() awaits the action; after `filler_after` seconds `on_slow` is
+    called once (the agent says a short filler), and when the action's
+    deadline passes run() returns None while the request keeps running in
+    the background. Those handed-off actions are awaited by drain() during
+    call finalization; the ones that fail or are still running then end up
+    in `failed` (with `outcome_unknown` when the request may have been
+    applied anyway) for the caller to persist. Latency per action and
+    outcome (ok, failed, deferred) goes to `stats` and the
+    coldcall_action_latency_seconds histogram.
+    """
+
+    def __init__(self, deadlines: dict[str, float], default_deadline: float, filler_after: float) -> None:
+        self.deadlines = deadlines
+        self.default_deadline = default_deadline
+        self.filler_after = filler_after
+        self.stats: dict[str, LatencyStats] = {}
+        self.fillers: dict[str, int] = {}
+        self.deferred: dict[str, int] = {}
+        self.failed: list[dict] = []
+        self._handed_off: set[asyncio.Task] = set()
+
+    def deadline(self, action: str) -> float:
+        return self.deadlines.get(action, self.default_deadline)
+
+    async def run(
+        self,
+        action: str,
+        data: dict,
+        send: Callable[[str, dict], Awaitable[dict]],
+        on_slow: Callable[[str], None] = None,
+    ) -> dict | None:
+        started = time.perf_counter()
+        task = asyncio.ensure_future(send(action, data))
+        deadline = self.deadline(action)
+        try:
+            filler_after = self.filler_after if self.filler_after and on_slow else deadline
+            done, _ = await asyncio.wait({task}, timeout=min(filler_after, deadline))
+            if not done and filler_after < deadline:
+                self.fillers[action] = self.fillers.get(action, 0) + 1
+                try:
+                    on_slow(action)
+                except Exception as e:
+                    logger.warning(f"Filler fuer {action} fehlgeschlagen: {e!r}")
+                done, _ = await asyncio.wait({task}, timeout=deadline - filler_after)
+        except asyncio.CancelledError:
+            # Tool call cancelled (interruption, session closing) - the action still has to happen
+            if not task.done():
+                self._hand_off(action, data, task, started)
+            raise
+        if not done:
+            logger.warning(f"Aktion {action} nach {deadline}s noch offen, wird nach dem Gespraech abgeschlossen")
+            self._hand_off(action, data, task, started)
+            return None
+        result = task.result()
+        self._record(action, "ok" if result.get("success") else "failed", time.perf_counter() - started)
+        return result
+
+    def _hand_off(self, action: str, data: dict, task: asyncio.Task, started: float):
+        self.deferred[action] = self.deferred.get(action, 0) + 1
+        self._handed_off.add(task)
+
+        def finished(task: asyncio.Task):
+            self._handed_off.discard(task)
+            if task.cancelled():
+                result = {"success": False, "error": "cancelled", "transport_error": True}
+            elif task.exception() is not None:
+                result = {"success": False, "error": repr(task.exception()), "transport_error": True}
+            else:
+                result = task.result()
+            self._record(action, "deferred", time.perf_counter() - started)
+            if result.get("success"):
+                logger.info(f"Aktion {action} nach {time.perf_counter() - started:.1f}s abgeschlossen")
+            else:
+                self.failed.append({
+                    "action": action,
+                    "data": data,
+                    "error": result.get("error", "unknown error"),
+                    # The request may have reached the CRM before it timed out / was cancelled
+                    "outcome_unknown": bool(result.get("transport_error")) and not result.get("connect_error"),
+                })
+                logger.error(f"Verzoegerte Aktion {action} fehlgeschlagen: {result.get('error')}")
+
+        task.add_done_callback(finished)
+
+    def _record(self, action: str, outcome: str, seconds: float):
+        self.stats.setdefault(action, LatencyStats()).add(seconds)
+        ACTION_LATENCY.labels(action=action, outcome=outcome).observe(seconds)
+
+    @property
+    def pending(self) -> int:
+        return len(self._handed_off)
+
+    async def drain(self, timeout: float):
+        """Waits for the handed-off actions; ones still running after `timeout` are cancelled and go to `failed`."""
+        if not self._handed_off:
+            return
+        logger.info(f"Warte auf {len(self._handed_off)} verzoegerte Aktion(en)")
+        _, still_running = await asyncio.wait(set(self._handed_off), timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            await asyncio.wait(still_running)
+
+    def summary(self) -> dict:
+        return {
+            action: {**stats.as_dict(), "fillers": self.fillers.get(action, 0), "deferred": self.deferred.get(action, 0)}
+            for action, stats in self.stats.items()
+        }
@@ -0,0 +1,253 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+from supabase_client import SupabaseClient
+
+logger = logging.getLogger("ColdCallAgent")
+
+TRANSCRIPT_FORMAT = 1
+# Tool results can be whole knowledge passages; analytics only needs the gist
+TOOL_OUTPUT_CHARS = 300
+# The final POST (tail + finalize marker) runs deferred actions and the summary
+# on the server, so it is only repeated when it never got there (connect error)
+FINALIZE_ATTEMPTS = 2
+FINALIZE_RETRY_DELAY = 1.0
+
+
+@dataclass(slots=True)
+class ToolInvocation:
+    name: str
+    arguments: dict | str
+    output: str
+    is_error: bool = False
+
+    def to_json(self) -> dict:
+        data = {"name": self.name, "args": self.arguments, "out": self.output}
+        if self.is_error:
+            data["err"] = True
+        return data
+
+
+@dataclass(slots=True)
+class TranscriptRecord:
+    """One utterance of the call.
+
+    `turn` counts caller turns (0 is the greeting before the caller first
+    spoke); the agent's reply and the tools it ran share the turn of the
+    caller utterance they answer. Times are unix seconds.
+    """
+
+    seq: int
+    turn: int
+    role: str
+    text: str
+    start: float | None = None
+    end: float | None = None
+    interrupted: bool = False
+    tools: tuple[ToolInvocation, ...] = ()
+
+    def to_json(self, t0: float) -> dict:
+        # Short keys and ms offsets from the batch header's t0
+        data = {"i": self.seq, "n": self.turn, "r": self.role, "x": self.text}
+        if self.start is not None:
+            data["s"] = round((self.start - t0) * 1000)
+        if self.end is not None:
+            data["e"] = round((self.end - t0) * 1000)
+        if self.interrupted:
+            data["int"] = True
+        if self.tools:
+            data["tools"] = [tool.to_json() for tool in self.tools]
+        return data
+
+
+def encode_records(records: list[TranscriptRecord], t0: float, speakers: dict) -> str:
+    """Gzip-compressed JSON Lines, base64 for the JSON body of end-call.
+
+    The first line is a header with the format version, t0 and the speaker
+    name per role; every following line is one record.
+    """
+    header = {"v": TRANSCRIPT_FORMAT, "t0": round(t0, 3), "speakers": speakers}
+    lines = [json.dumps(header, ensure_ascii=False, separators=(",", ":"))]
+    lines.extend(json.dumps(r.to_json(t0), ensure_ascii=False, separators=(",", ":")) for r in records)
+    data = gzip.compress("\n".join(lines).encode("utf-8"), compresslevel=6)
+    return base64.b64encode(data).decode("ascii")
+
+
+def decode_records(encoded: str) -> tuple[dict, list[dict]]:
+    """Inverse of encode_records (what end-call does), with absolute times."""
+    lines = gzip.decompress(base64.b64decode(encoded)).decode("utf-8").splitlines()
+    header = json.loads(lines[0])
+    records = []
+    for line in lines[1:]:
+        data = json.loads(line)
+        for key in ("s", "e"):
+            if key in data:
+                data[key] = header["t0"] + data[key] / 1000
+        records.append(data)
+    return header, records
+
+
+def tool_invocation(name: str, arguments: str, output: str, is_error: bool = False) -> ToolInvocation:
+    try:
+        parsed = json.loads(arguments) if arguments else {}
+    except json.JSONDecodeError:
+        parsed = arguments
+    output = output or ""
+    if len(output) > TOOL_OUTPUT_CHARS:
+        output = output[:TOOL_OUTPUT_CHARS] + "..."
+    return ToolInvocation(name, parsed, output, is_error)
+
+
+class TranscriptStream:
+    """Incremental transcript persistence for one call.
+
+    Records are numbered and posted to end-call in small batches while the
+    call is running (upserted by call_log_id + seq, so retries are safe),
+    each batch as compressed JSON Lines (encode_records). Only unsent
+    records are kept in memory; finalize() sends the remaining tail
+    together with the "finalize" marker that triggers the summary.
+    """
+
+    def __init__(
+        self,
+        client: SupabaseClient,
+        call_log_id: str,
+        flush_interval: float = 5.0,
+        batch_size: int = 8,
+        max_buffered: int = 1000,
+    ) -> None:
+        self.client = client
+        self.call_log_id = call_log_id
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.t0 = time.time()
+        self.seq = 0
+        self.turn = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.sent_bytes = 0
+        self.speakers: dict[str, str] = {}
+        self._buffer: list[TranscriptRecord] = []
+        self._pending_tools: list[ToolInvocation] = []
+        self._last_role = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def segment_count(self) -> int:
+        return self.seq
+
+    def add(
+        self,
+        role: str,
+        speaker: str,
+        text: str,
+        start: float = None,
+        end: float = None,
+        interrupted: bool = False,
+    ) -> TranscriptRecord:
+        if role == "user" and self._last_role != "user":
+            self.turn += 1
+        self._last_role = role
+        self.speakers.setdefault(role, speaker)
+        tools = ()
+        if role == "agent" and self._pending_tools:
+            tools, self._pending_tools = tuple(self._pending_tools), []
+        record = TranscriptRecord(self.seq, self.turn, role, text, start, end, interrupted, tools)
+        self.seq += 1
+        self._buffer.append(record)
+
+        if len(self._buffer) > self.max_buffered:
+            # Backend unreachable for a long time - keep memory bounded
+            del self._buffer[0]
+            self.dropped += 1
+        if self.call_log_id and not self._closed:
+            if self._task is None:
+                self._task = asyncio.create_task(self._run())
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+        return record
+
+    def add_tools(self, tools: list[ToolInvocation]):
+        # Attached to the agent's next utterance, the reply that used their results
+        self._pending_tools.extend(tools)
+
+    def _payload(self, batch: list[TranscriptRecord]) -> dict:
+        encoded = encode_records(batch, self.t0, self.speakers)
+        self.sent_bytes += len(encoded)
+        return {"call_log_id": self.call_log_id, "records": encoded}
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._buffer and not self._closed:
+                await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            batch = self._buffer[: self.batch_size * 4]
+            if not batch:
+                return
+            result = await self.client.post(
+                "end-call",
+                self._payload(batch),
+                idempotent=True,
+                stats_key="transcript_segments",
+            )
+            if result.get("success"):
+                # Only drop what was actually sent; add() may have appended meanwhile
+                del self._buffer[: len(batch)]
+                self.flushed += len(batch)
+            else:
+                logger.warning(f"Transcript flush failed, keeping {len(batch)} segments: {result.get('error')}")
+
+    async def finalize(self, timeout: float = None, **extra) -> dict:
+        if self._pending_tools:
+            # Call ended before the reply to the last tool calls
+            self.add("agent", self.speakers.get("agent", "Agent"), "")
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        async with self._lock:
+            # The tail stays buffered until end-call has it: a failed attempt loses nothing
+            tail = list(self._buffer)
+            payload = self._payload(tail) if tail else {"call_log_id": self.call_log_id}
+            for attempt in range(FINALIZE_ATTEMPTS):
+                if attempt:
+                    logger.warning(f"Transcript finalize failed ({result.get('error')}), retrying")
+                    await asyncio.sleep(FINALIZE_RETRY_DELAY)
+                result = await self.client.post(
+                    "end-call",
+                    {
+                        **payload,
+                        "finalize": True,
+                        "generate_summary": True,
+                        **extra,
+                    },
+                    timeout=timeout,
+                )
+                if result.get("success"):
+                    del self._buffer[: len(tail)]
+                    self.flushed += len(tail)
+                    break
+                if not result.get("connect_error"):
+                    logger.error(f"Transcript finalize failed ({result.get('error')}), {len(self._buffer)} segments may not be saved")
+                    break
+            else:
+                logger.error(f"Transcript finalize failed, {len(self._buffer)} segments not saved")
+        if self.dropped:
+            logger.error(f"{self.dropped} transcript segments were dropped before they could be saved")
+        return result
@@ -0,0 +1,133 @@
+import math
+from collections import deque
+
+import prometheus_client
+from livekit.agents import metrics
+
+# Seconds; dense around the 0.2-1.5s range where conversational latency is decided
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# stt_final: end of user speech -> final transcript
+# eou:       end of user speech -> turn committed (includes endpointing delay)
+# llm_ttft:  LLM request -> first token
+# tts_ttfb:  TTS request -> first audio byte
+# response:  end of user speech -> first agent audio (eou + llm_ttft + tts_ttfb)
+STAGES = ("stt_final", "eou", "llm_ttft", "tts_ttfb", "response")
+
+# Worker-wide view; in multiprocess mode the /metrics endpoint merges all job processes
+TURN_LATENCY = prometheus_client.Histogram(
+    "coldcall_turn_latency_seconds",
+    "Per-turn latency by pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+ACTION_LATENCY = prometheus_client.Histogram(
+    "coldcall_action_latency_seconds",
+    "Latency of agent-actions a tool waited for, by outcome (ok, failed, deferred)",
+    ["action", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+USAGE = prometheus_client.Counter(
+    "coldcall_usage_total",
+    "Provider usage (stt_seconds, llm_input_tokens, llm_output_tokens, llm_cached_tokens, tts_characters)",
+    ["kind"],
+)
+
+# Pending turns waiting for their remaining stage metrics
+MAX_OPEN_TURNS = 32
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank on the sorted samples
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyStats:
+    def __init__(self, max_samples: int = 2000) -> None:
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def as_dict(self) -> dict:
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "p50_ms": round(percentile(values, 50) * 1000),
+            "p95_ms": round(percentile(values, 95) * 1000),
+            "p99_ms": round(percentile(values, 99) * 1000),
+            "max_ms": round(values[-1] * 1000) if values else 0,
+        }
+
+
+class TurnMetrics:
+    """Turn latency and provider usage for one call, fed from `metrics_collected`.
+
+    Stage metrics arrive as separate events and are joined by speech_id; a
+    turn's total response latency is recorded once EOU, LLM and TTS are in.
+    Usage counters are written straight into the agent's usage_stats.
+    """
+
+    def __init__(self, usage_stats: dict) -> None:
+        self.usage_stats = usage_stats
+        self.stages = {stage: LatencyStats() for stage in STAGES}
+        self._turns: dict[str, dict] = {}
+
+    def _observe(self, stage: str, seconds: float):
+        if seconds is None or seconds < 0:
+            return
+        self.stages[stage].add(seconds)
+        TURN_LATENCY.labels(stage=stage).observe(seconds)
+
+    def _count(self, kind: str, amount: float):
+        if not amount:
+            return
+        self.usage_stats[kind] = round(self.usage_stats.get(kind, 0) + amount, 3)
+        USAGE.labels(kind=kind).inc(amount)
+
+    def _turn_part(self, speech_id: str, stage: str, seconds: float):
+        if not speech_id:
+            return
+        turn = self._turns.setdefault(speech_id, {})
+        # A reply can span several TTS segments / LLM calls; only the first one is on the critical path
+        if stage in turn:
+            return
+        turn[stage] = seconds
+        if all(s in turn for s in ("eou", "llm_ttft", "tts_ttfb")):
+            self._observe("response", turn["eou"] + turn["llm_ttft"] + turn["tts_ttfb"])
+        while len(self._turns) > MAX_OPEN_TURNS:
+            del self._turns[next(iter(self._turns))]
+
+    def on_metrics(self, m):
+        if isinstance(m, metrics.EOUMetrics):
+            # Zero means the framework had no reliable speaking timestamps for this turn
+            if m.end_of_utterance_delay <= 0:
+                return
+            self._observe("stt_final", m.transcription_delay)
+            self._observe("eou", m.end_of_utterance_delay)
+            self._turn_part(m.speech_id, "eou", m.end_of_utterance_delay)
+        elif isinstance(m, metrics.LLMMetrics):
+            self._count("llm_input_tokens", m.prompt_tokens)
+            self._count("llm_output_tokens", m.completion_tokens)
+            self._count("llm_cached_tokens", m.prompt_cached_tokens)
+            if m.ttft >= 0 and not self._seen(m.speech_id, "llm_ttft"):
+                self._observe("llm_ttft", m.ttft)
+                self._turn_part(m.speech_id, "llm_ttft", m.ttft)
+        elif isinstance(m, metrics.TTSMetrics):
+            self._count("tts_characters", m.characters_count)
+            if m.ttfb >= 0 and not self._seen(m.speech_id, "tts_ttfb"):
+                self._observe("tts_ttfb", m.ttfb)
+                self._turn_part(m.speech_id, "tts_ttfb", m.ttfb)
+        elif isinstance(m, metrics.STTMetrics):
+            self._count("stt_seconds", m.audio_duration)
+
+    def _seen(self, speech_id: str, stage: str) -> bool:
+        return bool(speech_id) and stage in self._turns.get(speech_id, {})
+
+    def summary(self) -> dict:
+        return {stage: stats.as_dict() for stage, stats in self.stages.items() if stats.count}
@@ -5,7 +5,7 @@ import { checkRateLimit, getRateLimitHeaders, createRateLimitResponse } from "..
 
 const corsHeaders = {
   "Access-Control-Allow-Origin": "*",
-  "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type",
+  "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type, x-agent-secret",
 };
 
 // Rate limit: 30 actions per minute
@@ -13,6 +13,17 @@ const RATE_LIMIT_PER_MINUTE = 30;
 
 const supabaseUrl = Deno.env.get("SUPABASE_URL")!;
 const supabaseServiceKey = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!;
+// Shared with the voice agent (AGENT_ACTIONS_SECRET there too)
+const agentActionsSecret = Deno.env.get("AGENT_ACTIONS_SECRET");
+
+// Actions that return campaign internals or touch recordings: only the voice agent (shared secret)
+// or the service role may call them
+const AGENT_ONLY_ACTIONS = new Set([
+  "get_campaign_config",
+  "get_campaign_knowledge",
+  "create_recording_upload",
+  "save_recording",
+]);
 
 interface ActionRequest {
   action: string;
@@ -257,6 +268,257 @@ async function addNote(data: Record<string, any>): Promise<{ success: boolean; e
   return { success: true };
 }
 
+async function updateLeadEmail(data: Record<string, any>): Promise<{ success: boolean; error?: string }> {
+  const { lead_id, email } = data;
+  
+  if (!lead_id || !email) {
+    return { success: false, error: "lead_id and email required" };
+  }
+  
+  const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  
+  const { error } = await supabase
+    .from("leads")
+    .update({ email, updated_at: new Date().toISOString() })
+    .eq("id", lead_id);
+  
+  if (error) {
+    console.error("Update lead email error:", error);
+    return { success: false, error: error.message };
+  }
+  
+  return { success: true };
+}
+
+// Knowledge items of a campaign: linked items, or all active items of the owner
+async function campaignKnowledgeItems(supabase: any, campaignId: string, userId: string, columns: string) {
+  const { data: links } = await supabase
+    .from("campaign_knowledge_links")
+    .select("knowledge_item_id")
+    .eq("campaign_id", campaignId);
+  
+  let query = supabase
+    .from("knowledge_items")
+    .select(columns)
+    .eq("user_id", userId)
+    .eq("status", "active");
+  if (links && links.length > 0) {
+    query = query.in("id", links.map((l: any) => l.knowledge_item_id));
+  }
+  
+  const { data: items, error } = await query;
+  if (error) {
+    console.error("Campaign knowledge error:", error);
+    return [];
+  }
+  return items || [];
+}
+
+// Changes whenever an item is added, removed or edited
+function knowledgeVersion(items: any[]): string {
+  if (items.length === 0) return "";
+  const latest = items.reduce((max, item) => (item.updated_at > max ? item.updated_at : max), "");
+  return `${items.length}:${latest}`;
+}
+
+// Campaign settings for the voice agent's per-worker config cache
+async function getCampaignConfig(data: Record<string, any>): Promise<{ success: boolean; error?: string; campaign?: Record<string, any> }> {
+  const { campaign_id } = data;
+  
+  if (!campaign_id) {
+    return { success: false, error: "No campaign_id provided" };
+  }
+  
+  const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  
+  const { data: campaign, error } = await supabase
+    .from("campaigns")
+    .select("id, user_id, name, product_description, call_goal, ai_prompt, updated_at")
+    .eq("id", campaign_id)
+    .single();
+  
+  if (error || !campaign) {
+    console.error("Get campaign config error:", error);
+    return { success: false, error: error?.message || "Campaign not found" };
+  }
+  
+  const { user_id, ...settings } = campaign;
+  const items = await campaignKnowledgeItems(supabase, campaign_id, user_id, "id, updated_at");
+  
+  return { success: true, campaign: { ...settings, knowledge_version: knowledgeVersion(items) } };
+}
+
+// Knowledge contents for the voice agent's local lookup index
+async function getCampaignKnowledge(data: Record<string, any>): Promise<{ success: boolean; error?: string; [key: string]: any }> {
+  const { campaign_id } = data;
+  
+  if (!campaign_id) {
+    return { success: false, error: "No campaign_id provided" };
+  }
+  
+  const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  
+  const { data: campaign, error } = await supabase
+    .from("campaigns")
+    .select("user_id")
+    .eq("id", campaign_id)
+    .single();
+  
+  if (error || !campaign) {
+    return { success: false, error: error?.message || "Campaign not found" };
+  }
+  
+  const items = await campaignKnowledgeItems(supabase, campaign_id, campaign.user_id, "id, title, content, source_url, updated_at");
+  
+  return {
+    success: true,
+    version: knowledgeVersion(items),
+    items: items.map(({ updated_at, ...item }: any) => item),
+  };
+}
+
+async function createRecordingUpload(data: Record<string, any>): Promise<{ success: boolean; error?: string; [key: string]: any }> {
+  const { call_log_id, extension } = data;
+  
+  if (!call_log_id || !["ogg", "flac"].includes(extension)) {
+    return { success: false, error: "call_log_id and extension (ogg/flac) required" };
+  }
+  
+  const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  
+  const { data: callLog, error } = await supabase
+    .from("call_logs")
+    .select("user_id")
+    .eq("id", call_log_id)
+    .single();
+  
+  if (error || !callLog) {
+    return { success: false, error: error?.message || "Call log not found" };
+  }
+  
+  // Ordner pro Nutzer, damit die Storage-Policy den Zugriff auf eigene Aufnahmen beschraenkt
+  const path = `${callLog.user_id}/${call_log_id}.${extension}`;
+  const { data: signed, error: signError } = await supabase.storage
+    .from("call-recordings")
+    .createSignedUploadUrl(path, { upsert: true });
+  
+  if (signError || !signed) {
+    return { success: false, error: signError?.message || "Could not create upload URL" };
+  }
+  
+  return { success: true, signed_url: signed.signedUrl, path };
+}
+
+async function saveRecording(data: Record<string, any>): Promise<{ success: boolean; error?: string }> {
+  const { call_log_id, path } = data;
+  
+  if (!call_log_id || !path) {
+    return { success: false, error: "call_log_id and path required" };
+  }
+  
+  const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  
+  const { error } = await supabase
+    .from("call_logs")
+    .update({ recording_path: path })
+    .eq("id", call_log_id);
+  
+  if (error) {
+    return { success: false, error: error.message };
+  }
+  
+  return { success: true };
+}
+
+// Actions the voice agent could not complete during the call, into the deferred_agent_actions outbox.
+// "pending" ones are run by end-call; "needs_review" ones may have been applied already (timeout) and wait for a human
+async function deferActions(data: Record<string, any>): Promise<{ success: boolean; error?: string; [key: string]: any }> {
+  const { call_log_id, lead_id } = data;
+  const actions: any[] = Array.isArray(data?.actions) ? data.actions : [];
+  
+  if (actions.length === 0 || (!call_log_id && !lead_id)) {
+    return { success: false, error: "actions and call_log_id or lead_id required" };
+  }
+  
+  const supabase = createClient(supabaseUrl, supabaseServiceKey);
+  
+  const { data: owner, error } = call_log_id
+    ? await supabase.from("call_logs").select("user_id").eq("id", call_log_id).single()
+    : await supabase.from("leads").select("user_id").eq("id", lead_id).single();
+  
+  if (error || !owner) {
+    return { success: false, error: error?.message || "Call log not found" };
+  }
+  
+  const rows = actions.map((item) => ({
+    user_id: owner.user_id,
+    call_log_id: call_log_id || null,
+    lead_id: lead_id || null,
+    action: item.action,
+    data: item.data || {},
+    status: item.outcome_unknown ? "needs_review" : "pending",
+    last_error: item.error || null,
+  }));
+  
+  const { error: insertError } = await supabase.from("deferred_agent_actions").insert(rows);
+  
+  if (insertError) {
+    return { success: false, error: insertError.message };
+  }
+  
+  return { success: true, stored: rows.length };
+}
+
+async function runAction(action: string, data: Record<string, any>): Promise<{ success: boolean; error?: string; [key: string]: any }> {
+  switch (action) {
+    case "send_email":
+      return await sendEmail(data);
+    case "send_meeting_link":
+      return await sendMeetingLink(data);
+    case "schedule_callback":
+      return await scheduleCallback(data);
+    case "update_lead_status":
+      return await updateLeadStatus(data);
+    case "update_lead_email":
+      return await updateLeadEmail(data);
+    case "add_note":
+      return await addNote(data);
+    case "get_campaign_config":
+      return await getCampaignConfig(data);
+    case "get_campaign_knowledge":
+      return await getCampaignKnowledge(data);
+    case "create_recording_upload":
+      return await createRecordingUpload(data);
+    case "save_recording":
+      return await saveRecording(data);
+    case "defer_actions":
+      return await deferActions(data);
+    default:
+      return { success: false, error: `Unknown action: ${action}` };
+  }
+}
+
+// Batched write-behind actions from the voice agent, run in order
+async function runBatch(data: Record<string, any>): Promise<{ success: boolean; error?: string; results?: any[] }> {
+  const actions: ActionRequest[] = Array.isArray(data?.actions) ? data.actions : [];
+  
+  if (actions.length === 0) {
+    return { success: false, error: "No actions provided" };
+  }
+  
+  const results = [];
+  for (const item of actions) {
+    try {
+      results.push(await runAction(item.action, item.data || {}));
+    } catch (error: any) {
+      console.error(`Batch action ${item.action} error:`, error);
+      results.push({ success: false, error: error?.message || "Unknown error" });
+    }
+  }
+  
+  return { success: results.every((r) => r.success), results };
+}
+
 // Helper functions
 function parseMeetingDateTime(date: string, time: string): Date {
   const now = new Date();
@@ -428,6 +690,21 @@ async function signData(data: string, key: CryptoKey): Promise<string> {
     .replace(/\//g, "_");
 }
 
+function safeEqual(a: string, b: string): boolean {
+  if (a.length !== b.length) return false;
+  let diff = 0;
+  for (let i = 0; i < a.length; i++) {
+    diff |= a.charCodeAt(i) ^ b.charCodeAt(i);
+  }
+  return diff === 0;
+}
+
+function isAgentRequest(req: Request, token: string): boolean {
+  if (safeEqual(token, supabaseServiceKey)) return true;
+  const secret = req.headers.get("x-agent-secret");
+  return !!agentActionsSecret && !!secret && safeEqual(secret, agentActionsSecret);
+}
+
 serve(async (req) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { headers: corsHeaders });
@@ -472,28 +749,16 @@ serve(async (req) => {
     const { action, data }: ActionRequest = await req.json();
     console.log(`Agent action: ${action}`, data);
 
-    let result: { success: boolean; error?: string; [key: string]: any };
-
-    switch (action) {
-      case "send_email":
-        result = await sendEmail(data);
-        break;
-      case "send_meeting_link":
-        result = await sendMeetingLink(data);
-        break;
-      case "schedule_callback":
-        result = await scheduleCallback(data);
-        break;
-      case "update_lead_status":
-        result = await updateLeadStatus(data);
-        break;
-      case "add_note":
-        result = await addNote(data);
-        break;
-      default:
-        result = { success: false, error: `Unknown action: ${action}` };
+    const requested = action === "batch" && Array.isArray(data?.actions) ? data.actions.map((item: ActionRequest) => item.action) : [action];
+    if (requested.some((name: string) => AGENT_ONLY_ACTIONS.has(name)) && !isAgentRequest(req, token)) {
+      return new Response(
+        JSON.stringify({ success: false, error: "Forbidden" }),
+        { status: 403, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      );
     }
 
+    const result = action === "batch" ? await runBatch(data) : await runAction(action, data);
+
     const responseHeaders: Record<string, string> = { 
       ...corsHeaders, 
       "Content-Type": "application/json",
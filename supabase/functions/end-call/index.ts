@@ -45,13 +45,173 @@ Antworte auf Deutsch und halte die Zusammenfassung kurz und prägnant.`
   }
 }
 
+// Uncompressed segments from agents that predate the record format
+interface TranscriptSegment {
+  seq: number;
+  role: string;
+  speaker: string;
+  text: string;
+  start?: number | null;
+  end?: number | null;
+}
+
+interface ToolInvocation {
+  name: string;
+  args: unknown;
+  out: string;
+  err?: boolean;
+}
+
+// One line of the agent's compressed JSON Lines transcript (transcript.py)
+interface TranscriptRecord {
+  i: number;      // seq
+  n: number;      // turn index
+  r: string;      // role
+  x: string;      // text
+  s?: number;     // start, ms after header t0
+  e?: number;     // end, ms after header t0
+  int?: boolean;  // agent was interrupted
+  tools?: ToolInvocation[];
+}
+
+interface TranscriptHeader {
+  v: number;
+  t0: number;
+  speakers: Record<string, string>;
+}
+
+// Agent timestamps are unix seconds
+function toIso(seconds?: number | null): string | null {
+  return typeof seconds === "number" ? new Date(seconds * 1000).toISOString() : null;
+}
+
+// base64(gzip(JSON Lines)) -> header line + records
+async function decodeRecords(encoded: string): Promise<{ header: TranscriptHeader; records: TranscriptRecord[] }> {
+  const bytes = Uint8Array.from(atob(encoded), (c) => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  const lines = (await new Response(stream).text()).split("\n").filter((line) => line.trim());
+  const [header, ...records] = lines.map((line) => JSON.parse(line));
+  return { header, records };
+}
+
+async function recordRows(callLogId: string, encoded: string) {
+  const { header, records } = await decodeRecords(encoded);
+  const at = (ms?: number) => (typeof ms === "number" ? toIso(header.t0 + ms / 1000) : null);
+  return records.map((r) => ({
+    call_log_id: callLogId,
+    seq: r.i,
+    turn_index: r.n,
+    role: r.r,
+    speaker: header.speakers?.[r.r] ?? null,
+    content: r.x,
+    started_at: at(r.s),
+    ended_at: at(r.e),
+    interrupted: !!r.int,
+    tool_calls: r.tools && r.tools.length > 0 ? r.tools : null,
+  }));
+}
+
+function segmentRows(callLogId: string, segments: TranscriptSegment[]) {
+  return segments.map((s) => ({
+    call_log_id: callLogId,
+    seq: s.seq,
+    role: s.role,
+    speaker: s.speaker,
+    content: s.text,
+    started_at: toIso(s.start),
+    ended_at: toIso(s.end),
+  }));
+}
+
+async function loadTranscript(supabase: any, callLogId: string): Promise<string> {
+  const { data, error } = await supabase
+    .from("call_transcript_segments")
+    .select("speaker, content, interrupted, tool_calls")
+    .eq("call_log_id", callLogId)
+    .order("seq", { ascending: true });
+
+  if (error) {
+    console.error("Load segments error:", error);
+    return "";
+  }
+
+  const lines: string[] = [];
+  for (const s of data || []) {
+    for (const tool of (s.tool_calls || []) as ToolInvocation[]) {
+      lines.push(`[Aktion: ${tool.name}${tool.err ? " fehlgeschlagen" : ""}]`);
+    }
+    if (s.content) {
+      lines.push(`${s.speaker}: ${s.content}${s.interrupted ? " (unterbrochen)" : ""}`);
+    }
+  }
+  return lines.join("\n");
+}
+
+// Supabase edge runtime: keeps the worker alive for work after the response
+declare const EdgeRuntime: { waitUntil(promise: Promise<unknown>): void } | undefined;
+
+// Outbox rows the voice agent left for this call (agent-actions defer_actions), run once the call is over.
+// Rows are claimed with one conditional update, so a concurrent or repeated finalize never runs a row twice;
+// "needs_review" rows (outcome unknown) and rows left "running" by a crashed run are never picked up again.
+async function runDeferredActions(supabase: any, callLogId: string): Promise<number> {
+  const { data: rows, error } = await supabase
+    .from("deferred_agent_actions")
+    .update({ status: "running" })
+    .eq("call_log_id", callLogId)
+    .eq("status", "pending")
+    .select("id, action, data, attempts");
+
+  if (error) {
+    console.error("Claim deferred actions error:", error);
+    return 0;
+  }
+
+  let done = 0;
+  for (const row of rows || []) {
+    const { data: result, error: invokeError } = await supabase.functions.invoke("agent-actions", {
+      body: { action: row.action, data: row.data },
+    });
+    const ok = !invokeError && result?.success;
+    // No response at all: the action may have run, so it goes to review instead of failed
+    const unknown = !!invokeError && invokeError.name !== "FunctionsHttpError";
+    if (ok) done++;
+    await supabase
+      .from("deferred_agent_actions")
+      .update({
+        status: ok ? "done" : unknown ? "needs_review" : "failed",
+        attempts: row.attempts + 1,
+        last_error: ok ? null : (result?.error || invokeError?.message || "unknown error"),
+        processed_at: new Date().toISOString(),
+      })
+      .eq("id", row.id);
+  }
+  if (rows?.length) {
+    console.log(`Call ${callLogId}: ${done}/${rows.length} deferred actions completed`);
+  }
+  return done;
+}
+
+// Runs the outbox after the response: these actions already missed their deadline once
+// and must not hold up the agent waiting for finalize
+function runDeferredActionsInBackground(supabase: any, callLogId: string) {
+  const task = runDeferredActions(supabase, callLogId).catch((error) => {
+    console.error("Deferred actions error:", error);
+    return 0;
+  });
+  if (typeof EdgeRuntime !== "undefined") {
+    EdgeRuntime.waitUntil(task);
+  }
+}
+
 serve(async (req) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { headers: corsHeaders });
   }
 
   try {
-    const { call_log_id, transcript, generate_summary, duration_seconds, outcome } = await req.json();
+    const body = await req.json();
+    const { call_log_id, generate_summary, duration_seconds, outcome, segments, records, finalize } = body;
+    let transcript: string | undefined = body.transcript;
 
     if (!call_log_id) {
       return new Response(
@@ -65,11 +225,57 @@ serve(async (req) => {
     const openaiKey = Deno.env.get("OPENAI_API_KEY");
     const supabase = createClient(supabaseUrl, supabaseKey);
 
+    // Incremental transcript records streamed by the voice agent during the call
+    let rows: Record<string, any>[] = [];
+    if (typeof records === "string" && records) {
+      try {
+        rows = await recordRows(call_log_id, records);
+      } catch (decodeError) {
+        console.error("Transcript decode error:", decodeError);
+        return new Response(
+          JSON.stringify({ success: false, error: "invalid records" }),
+          { status: 400, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+        );
+      }
+    } else if (Array.isArray(segments)) {
+      rows = segmentRows(call_log_id, segments as TranscriptSegment[]);
+    }
+
+    if (rows.length > 0) {
+      const { error: segmentError } = await supabase
+        .from("call_transcript_segments")
+        .upsert(rows, { onConflict: "call_log_id,seq", ignoreDuplicates: true });
+
+      if (segmentError) {
+        console.error("Segment insert error:", segmentError);
+        return new Response(
+          JSON.stringify({ success: false, error: segmentError.message }),
+          { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+        );
+      }
+
+      if (!finalize && !transcript) {
+        return new Response(
+          JSON.stringify({ success: true, stored: rows.length }),
+          { headers: { ...corsHeaders, "Content-Type": "application/json" } }
+        );
+      }
+    }
+
+    // Finalize marker: assemble the full transcript from the stored segments
+    if (finalize && !transcript) {
+      transcript = await loadTranscript(supabase, call_log_id);
+    }
+
+    if (finalize) {
+      runDeferredActionsInBackground(supabase, call_log_id);
+    }
+
     const updateData: Record<string, any> = {
       ended_at: new Date().toISOString(),
     };
 
-    if (duration_seconds !== undefined) {
+    if (duration_seconds !== undefined && duration_seconds !== null) {
       updateData.duration_seconds = duration_seconds;
     }
 
@@ -138,7 +138,7 @@ serve(async (req) => {
     if (campaignId) {
       const { data, error } = await supabase
         .from("campaigns")
-        .select("*")
+        .select("id, name, updated_at")
         .eq("id", campaignId)
         .eq("user_id", user.id)
         .single();
@@ -174,12 +174,9 @@ serve(async (req) => {
 
     // Build room metadata with all relevant info for the agent
     const roomMetadata = {
-      // Campaign info
-      ai_prompt: campaignData?.ai_prompt || null,
-      product_description: campaignData?.product_description || null,
-      call_goal: campaignData?.call_goal || null,
-      target_group: campaignData?.target_group || null,
-      campaign_name: campaignData?.name || null,
+      // Campaign info - settings are cached on the agent worker, keyed by id + version
+      campaign_id: campaignData?.id || null,
+      campaign_version: campaignData?.updated_at || null,
       // Lead info
       lead_name: leadData ? `${leadData.first_name}${leadData.last_name ? " " + leadData.last_name : ""}` : null,
       lead_company: leadData?.company || null,
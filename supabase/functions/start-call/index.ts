@@ -135,7 +135,7 @@ serve(async (req) => {
     if (campaignId) {
       const { data, error: campaignError } = await supabase
         .from("campaigns")
-        .select("*")
+        .select("id, name, updated_at")
         .eq("id", campaignId)
         .eq("user_id", user.id)
         .single();
@@ -170,13 +170,19 @@ serve(async (req) => {
     // Generate unique room name
     const roomName = `outbound-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
 
-    // Build metadata for the agent - VOLLSTÄNDIG
+    // Build metadata for the agent: IDs + lead fields. Campaign settings are cached
+    // on the worker and refetched when campaign_version (updated_at) changes;
+    // ad-hoc calls without a campaign still send their settings inline.
+    const campaignFields = campaignData
+      ? { campaign_version: campaignData.updated_at }
+      : {
+          ai_prompt: campaignPrompt || null,
+          product_description: productDescription || null,
+          call_goal: callGoal || null,
+        };
     const metadata = {
       phone_number: to,
-      ai_prompt: campaignData?.ai_prompt || campaignPrompt || null,
-      product_description: campaignData?.product_description || productDescription || null,
-      call_goal: campaignData?.call_goal || callGoal || null,
-      campaign_name: campaignData?.name || null,
+      ...campaignFields,
       lead_name: leadData
         ? `${leadData.first_name}${leadData.last_name ? " " + leadData.last_name : ""}`
         : leadName || null,
@@ -0,0 +1,22 @@
+-- Transkript-Segmente, die der Voice-Agent während des Anrufs streamt
+CREATE TABLE public.call_transcript_segments (
+  id UUID NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+  call_log_id UUID NOT NULL REFERENCES public.call_logs(id) ON DELETE CASCADE,
+  seq INTEGER NOT NULL,
+  role TEXT NOT NULL, -- 'user', 'agent'
+  speaker TEXT,
+  content TEXT NOT NULL,
+  started_at TIMESTAMP WITH TIME ZONE,
+  ended_at TIMESTAMP WITH TIME ZONE,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  UNIQUE(call_log_id, seq)
+);
+
+ALTER TABLE public.call_transcript_segments ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view segments of own calls" ON public.call_transcript_segments FOR SELECT
+  USING (EXISTS (
+    SELECT 1 FROM public.call_logs
+    WHERE call_logs.id = call_transcript_segments.call_log_id
+      AND call_logs.user_id = auth.uid()
+  ));
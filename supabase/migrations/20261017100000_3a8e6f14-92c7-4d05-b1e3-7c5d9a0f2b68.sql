@@ -0,0 +1,18 @@
+-- Wissens-Einträge pro Kampagne (lookup_knowledge im Voice-Agent).
+-- Kampagnen ohne Zuordnung nutzen alle aktiven Einträge des Besitzers.
+CREATE TABLE public.campaign_knowledge_links (
+  id UUID NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+  campaign_id UUID NOT NULL REFERENCES public.campaigns(id) ON DELETE CASCADE,
+  knowledge_item_id UUID NOT NULL REFERENCES public.knowledge_items(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  UNIQUE(campaign_id, knowledge_item_id)
+);
+
+ALTER TABLE public.campaign_knowledge_links ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own campaign links" ON public.campaign_knowledge_links FOR SELECT USING (auth.uid() = user_id);
+CREATE POLICY "Users can create own campaign links" ON public.campaign_knowledge_links FOR INSERT WITH CHECK (auth.uid() = user_id);
+CREATE POLICY "Users can delete own campaign links" ON public.campaign_knowledge_links FOR DELETE USING (auth.uid() = user_id);
+
+CREATE INDEX idx_campaign_knowledge_links_campaign ON public.campaign_knowledge_links(campaign_id);
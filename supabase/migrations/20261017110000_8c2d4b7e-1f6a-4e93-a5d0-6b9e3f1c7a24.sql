@@ -0,0 +1,8 @@
+-- Strukturierte Transkript-Records: Turn, Unterbrechung und Tool-Aufrufe pro Segment
+ALTER TABLE public.call_transcript_segments
+  ADD COLUMN turn_index INTEGER,
+  ADD COLUMN interrupted BOOLEAN NOT NULL DEFAULT false,
+  ADD COLUMN tool_calls JSONB;
+
+CREATE INDEX idx_call_transcript_segments_tools ON public.call_transcript_segments USING GIN (tool_calls)
+  WHERE tool_calls IS NOT NULL;
@@ -0,0 +1,12 @@
+-- Gespraechsaufnahmen (opt-in, RECORD_CALLS): Stereo-Datei pro Anruf, vom Agent nach dem Gespraech hochgeladen
+ALTER TABLE public.call_logs ADD COLUMN recording_path TEXT;
+
+INSERT INTO storage.buckets (id, name, public, file_size_limit)
+VALUES ('call-recordings', 'call-recordings', false, 104857600);
+
+-- Upload nur ueber signierte URLs (Service Role); Nutzer sehen ihre eigenen Aufnahmen
+CREATE POLICY "Users can view own call recordings" ON storage.objects FOR SELECT TO authenticated
+  USING (bucket_id = 'call-recordings' AND auth.uid()::text = (storage.foldername(name))[1]);
+
+CREATE POLICY "Users can delete own call recordings" ON storage.objects FOR DELETE TO authenticated
+  USING (bucket_id = 'call-recordings' AND auth.uid()::text = (storage.foldername(name))[1]);
@@ -0,0 +1,27 @@
+-- Outbox fuer Agent-Aktionen, die waehrend des Anrufs nicht abgeschlossen wurden (E-Mail/Meeting-Link "direkt nach dem Gespraech").
+-- 'pending' fuehrt end-call beim Abschluss des Anrufs aus; 'needs_review' kann trotz Timeout schon ausgefuehrt worden sein
+-- und wird nicht automatisch wiederholt.
+CREATE TABLE public.deferred_agent_actions (
+  id UUID NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  call_log_id UUID REFERENCES public.call_logs(id) ON DELETE CASCADE,
+  lead_id UUID REFERENCES public.leads(id) ON DELETE CASCADE,
+  action TEXT NOT NULL,
+  data JSONB NOT NULL DEFAULT '{}'::jsonb,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'needs_review', 'done', 'failed')),
+  last_error TEXT,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  processed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX idx_deferred_agent_actions_call ON public.deferred_agent_actions (call_log_id, status);
+
+ALTER TABLE public.deferred_agent_actions ENABLE ROW LEVEL SECURITY;
+
+-- Geschrieben nur von den Edge Functions (Service Role); Nutzer sehen und bearbeiten ihre eigenen
+CREATE POLICY "Users can view own deferred agent actions" ON public.deferred_agent_actions FOR SELECT
+  USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can update own deferred agent actions" ON public.deferred_agent_actions FOR UPDATE
+  USING (auth.uid() = user_id);
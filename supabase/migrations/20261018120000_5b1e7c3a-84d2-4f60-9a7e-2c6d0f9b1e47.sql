@@ -0,0 +1,6 @@
+-- end-call beansprucht 'pending'-Zeilen mit einem bedingten Update ('running'), damit parallele oder
+-- wiederholte Abschluesse eine Aktion nie doppelt ausfuehren. Haengengebliebene 'running'-Zeilen werden nicht
+-- automatisch wiederholt.
+ALTER TABLE public.deferred_agent_actions DROP CONSTRAINT deferred_agent_actions_status_check;
+ALTER TABLE public.deferred_agent_actions ADD CONSTRAINT deferred_agent_actions_status_check
+  CHECK (status IN ('pending', 'running', 'needs_review', 'done', 'failed'));